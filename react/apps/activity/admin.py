@@ -1,3 +1,25 @@
+# -*- coding: utf8 -*-
+# Django modules
 from django.contrib import admin
+# React modules
+from activity.models import Activity, Consumption
 
-# Register your models here.
+class ActivityAdmin(admin.ModelAdmin):
+    list_display = ('date', 'contract', 'actor', 'days')
+    list_select_related = ('contract', 'actor')
+    list_filter = ('date', 'actor')
+    raw_id_fields = ('contract', 'actor')
+
+class ConsumptionAdmin(admin.ModelAdmin):
+    list_display = ('month', 'contract', 'actor', 'days')
+    list_select_related = ('contract', 'actor')
+    list_filter = ('month', 'actor')
+    raw_id_fields = ('contract', 'actor')
+    readonly_fields = ('month', 'contract', 'actor', 'days')
+
+    def has_add_permission(self, request):
+        # Rollups are maintained from the activities only
+        return False
+
+admin.site.register(Activity, ActivityAdmin)
+admin.site.register(Consumption, ConsumptionAdmin)
@@ -0,0 +1,13 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.core.management.base import NoArgsCommand
+# React modules
+from activity.models import Consumption
+
+
+class Command(NoArgsCommand):
+    help = 'Recomputes the monthly consumption rollups from the activities.'
+
+    def handle_noargs(self, **options):
+        count = Consumption.objects.rebuild()
+        self.stdout.write(u'%d consumption rollups rebuilt' % count)
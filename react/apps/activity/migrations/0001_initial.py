@@ -0,0 +1,39 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('business', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('date', models.DateField(verbose_name='date')),
+                ('days', models.DecimalField(verbose_name='number of days', max_digits=3, decimal_places=2)),
+                ('actor', models.ForeignKey(related_name='activities', verbose_name='actor', to=settings.AUTH_USER_MODEL)),
+                ('contract', models.ForeignKey(related_name='activities', verbose_name='contract', to='business.Contract')),
+            ],
+            options={
+                'verbose_name': 'Activity',
+                'verbose_name_plural': 'Activities',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='activity',
+            unique_together=set([('actor', 'contract', 'date')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='activity',
+            index_together=set([('actor', 'date'), ('contract', 'date')]),
+        ),
+    ]
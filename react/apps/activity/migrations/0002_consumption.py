@@ -0,0 +1,52 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+def populate_consumptions(apps, schema_editor):
+    Activity = apps.get_model('activity', 'Activity')
+    Consumption = apps.get_model('activity', 'Consumption')
+    totals = {}
+    for contract_id, actor_id, date, days in Activity.objects.values_list(
+            'contract', 'actor', 'date', 'days').iterator():
+        key = (contract_id, actor_id, date.replace(day=1))
+        totals[key] = totals.get(key, 0) + days
+    Consumption.objects.bulk_create([
+        Consumption(contract_id=contract_id, actor_id=actor_id,
+                    month=month, days=days)
+        for (contract_id, actor_id, month), days in totals.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('business', '0003_indexes'),
+        ('activity', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Consumption',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('month', models.DateField(verbose_name='month')),
+                ('days', models.DecimalField(verbose_name='number of days', max_digits=8, decimal_places=2)),
+                ('actor', models.ForeignKey(related_name='consumptions', verbose_name='actor', to=settings.AUTH_USER_MODEL)),
+                ('contract', models.ForeignKey(related_name='consumptions', verbose_name='contract', to='business.Contract')),
+            ],
+            options={
+                'verbose_name': 'Consumption',
+                'verbose_name_plural': 'Consumptions',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterUniqueTogether(
+            name='consumption',
+            unique_together=set([('contract', 'actor', 'month')]),
+        ),
+        migrations.RunPython(populate_consumptions),
+    ]
@@ -1,3 +1,277 @@
-from django.db import models
+# -*- coding: utf8 -*-
+# Built-in modules
+import datetime
+from decimal import Decimal, InvalidOperation
+# Django modules
+from django.db import models, transaction
+from django.conf import settings
+from django.utils.translation import ugettext_lazy as _
+from django.core.exceptions import ValidationError
+# React modules
+from business.models import Contract
+from parameters.workingdays import is_working_day
 
-# Create your models here.
+
+def month_of(date):
+    """
+    Returns the first day of the month of the given date.
+    """
+    return date.replace(day=1)
+
+
+class ConsumptionManager(models.Manager):
+    def apply(self, deltas):
+        """
+        Adds the given {(contract id, actor id, month): days} deltas to
+        the consumption rollups, creating the missing ones.
+        """
+        deltas = dict((key, days) for key, days in deltas.items() if days)
+        if not deltas:
+            return
+        existing = set(self.filter(
+            contract__in=set(key[0] for key in deltas),
+            month__in=set(key[2] for key in deltas)
+        ).values_list('contract', 'actor', 'month'))
+        missing = []
+        for key, days in deltas.items():
+            contract_id, actor_id, month = key
+            if key in existing:
+                self.filter(
+                    contract=contract_id, actor=actor_id, month=month
+                ).update(days=models.F('days') + days)
+            else:
+                missing.append(self.model(
+                    contract_id=contract_id,
+                    actor_id=actor_id,
+                    month=month,
+                    days=days
+                ))
+        self.bulk_create(missing)
+
+    def rebuild(self, batch_size=500):
+        """
+        Recomputes every consumption rollup from the activities.
+        """
+        with transaction.atomic():
+            self.all().delete()
+            totals = {}
+            activities = Activity.objects.values_list(
+                'contract', 'actor', 'date', 'days')
+            for contract_id, actor_id, date, days in activities.iterator():
+                key = (contract_id, actor_id, month_of(date))
+                totals[key] = totals.get(key, 0) + days
+            rollups = [
+                self.model(contract_id=contract_id, actor_id=actor_id,
+                           month=month, days=days)
+                for (contract_id, actor_id, month), days in totals.items()
+            ]
+            self.bulk_create(rollups, batch_size=batch_size)
+        return len(rollups)
+
+    def burn_down(self, contract):
+        """
+        Returns the (month, consumed days, remaining days) of the given
+        contract, month by month.
+        """
+        remaining = contract.days
+        months = []
+        for month, days in self.filter(contract=contract).values_list(
+                'month').annotate(total=models.Sum('days')).order_by('month'):
+            remaining -= days
+            months.append((month, days, remaining))
+        return months
+
+
+class ActivityQuerySet(models.QuerySet):
+    def consumption_deltas(self, sign=1):
+        """
+        Returns the {(contract id, actor id, month): days} totals of the
+        activities, multiplied by sign.
+        """
+        deltas = {}
+        for contract_id, actor_id, date, days in self.values_list(
+                'contract', 'actor', 'date', 'days'):
+            key = (contract_id, actor_id, month_of(date))
+            deltas[key] = deltas.get(key, 0) + sign * days
+        return deltas
+
+    def delete(self):
+        with transaction.atomic():
+            Consumption.objects.apply(self.consumption_deltas(sign=-1))
+            super(ActivityQuerySet, self).delete()
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+class ActivityManager(models.Manager.from_queryset(ActivityQuerySet)):
+    def submit_week(self, actor, week, entries):
+        """
+        Replaces the activities of the actor during the week starting on
+        the given date by the given (contract id, date, days) entries.
+
+        Entries are validated together, with one query for the contracts,
+        then the week is rewritten in one transaction, so the number of
+        queries does not depend on the number of entries.
+        """
+        if week.weekday() != 0:
+            raise ValidationError(
+                _(u'Weeks start on Mondays, not on %(date)s.') % {
+                    'date': week})
+        end = week + datetime.timedelta(days=6)
+        entries = list(entries)
+        contracts = Contract.objects.in_bulk(
+            set(contract_id for contract_id, date, days in entries))
+        activities = []
+        errors = []
+        totals = {}
+        seen = set()
+        for contract_id, date, days in entries:
+            try:
+                value = Decimal(str(days))
+            except InvalidOperation:
+                value = None
+            # NaN and infinities would fail the comparisons below
+            if value is None or not value.is_finite():
+                errors.append(_(u'Invalid number of days: %(days)s.') % {
+                    'days': days})
+                continue
+            days = value
+            if not week <= date <= end:
+                errors.append(_(u'%(date)s is not a day of the week.') % {
+                    'date': date})
+                continue
+            if (contract_id, date) in seen:
+                errors.append(
+                    _(u'Contract %(contract)s is given twice on %(date)s.') % {
+                        'contract': contract_id, 'date': date})
+                continue
+            seen.add((contract_id, date))
+            if days == 0:
+                # Removes the activity
+                continue
+            if contract_id not in contracts:
+                errors.append(_(u'Unknown contract: %(contract)s.') % {
+                    'contract': contract_id})
+                continue
+            activity = self.model(
+                actor=actor,
+                contract=contracts[contract_id],
+                date=date,
+                days=days
+            )
+            try:
+                activity.clean_fields(exclude=['actor', 'contract'])
+                activity.clean()
+            except ValidationError as e:
+                errors.extend(e.messages)
+                continue
+            totals[date] = totals.get(date, 0) + days
+            activities.append(activity)
+        for date, total in sorted(totals.items()):
+            if total > 1:
+                errors.append(
+                    _(u'More than one day of activity on %(date)s.') % {
+                        'date': date})
+        if errors:
+            raise ValidationError(errors)
+        with transaction.atomic():
+            previous = self.filter(actor=actor, date__range=(week, end))
+            deltas = previous.consumption_deltas(sign=-1)
+            for activity in activities:
+                key = (activity.contract_id, activity.actor_id,
+                       month_of(activity.date))
+                deltas[key] = deltas.get(key, 0) + activity.days
+            Consumption.objects.apply(deltas)
+            # Rollups are already up to date
+            models.QuerySet.delete(previous)
+            self.bulk_create(activities)
+        return activities
+
+
+class Activity(models.Model):
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL,
+                              verbose_name=_(u'actor'),
+                              related_name=u'activities')
+    contract = models.ForeignKey(
+        Contract, verbose_name=_(u'contract'), related_name=u'activities')
+    date = models.DateField(_(u'date'))
+    days = models.DecimalField(
+        _(u'number of days'), max_digits=3, decimal_places=2)
+
+    objects = ActivityManager()
+
+    class Meta:
+        verbose_name = _(u'Activity')
+        verbose_name_plural = _(u'Activities')
+        unique_together = ('actor', 'contract', 'date')
+        index_together = [
+            ('actor', 'date'),
+            ('contract', 'date'),
+        ]
+
+    def __unicode__(self):
+        return u'%s - %s' % (self.contract_id, self.date)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            deltas = {}
+            if self.pk is not None:
+                deltas = Activity.objects.filter(
+                    pk=self.pk).consumption_deltas(sign=-1)
+            key = (self.contract_id, self.actor_id, month_of(self.date))
+            deltas[key] = deltas.get(key, 0) + Decimal(str(self.days))
+            super(Activity, self).save(*args, **kwargs)
+            Consumption.objects.apply(deltas)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            Consumption.objects.apply(Activity.objects.filter(
+                pk=self.pk).consumption_deltas(sign=-1))
+            super(Activity, self).delete(*args, **kwargs)
+
+    def clean(self):
+        if self.days is not None:
+            if self.days <= 0 or self.days > 1:
+                raise ValidationError(
+                    _(u'Number of days must be greater than 0 and less '
+                      u'or equal to 1.'))
+        if self.date is not None and self.contract_id is not None:
+            contract = self.contract
+            if self.actor_id != contract.actor_id:
+                raise ValidationError(
+                    _(u'Contract %(contract)s is not assigned to this '
+                      u'actor.') % {'contract': contract})
+            if not contract.start <= self.date <= contract.end:
+                raise ValidationError(
+                    _(u'%(date)s is out of the dates of contract '
+                      u'%(contract)s.') % {
+                          'date': self.date, 'contract': contract})
+            if not is_working_day(self.date):
+                raise ValidationError(
+                    _(u'%(date)s is not a working day.') % {
+                        'date': self.date})
+
+
+class Consumption(models.Model):
+    """
+    Number of days consumed by an actor on a contract during a month,
+    maintained on every activity change.
+    """
+    contract = models.ForeignKey(
+        Contract, verbose_name=_(u'contract'), related_name=u'consumptions')
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL,
+                              verbose_name=_(u'actor'),
+                              related_name=u'consumptions')
+    month = models.DateField(_(u'month'))
+    days = models.DecimalField(
+        _(u'number of days'), max_digits=8, decimal_places=2)
+
+    objects = ConsumptionManager()
+
+    class Meta:
+        verbose_name = _(u'Consumption')
+        verbose_name_plural = _(u'Consumptions')
+        unique_together = ('contract', 'actor', 'month')
+
+    def __unicode__(self):
+        return u'%s - %s' % (self.contract_id, self.month)
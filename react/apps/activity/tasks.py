@@ -0,0 +1,10 @@
+# -*- coding: utf8 -*-
+# React modules
+from activity.models import Consumption
+
+
+def rebuild_consumption(job):
+    """
+    Recomputes the monthly consumption rollups from the activities.
+    """
+    return Consumption.objects.rebuild()
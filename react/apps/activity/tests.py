@@ -1,3 +1,356 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import json
+import datetime
+from decimal import Decimal
+from StringIO import StringIO
+# Django modules
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.core.exceptions import ValidationError
+from django.core.urlresolvers import reverse
+from django.contrib.auth import get_user_model
+# React modules
+from activity.models import Activity, Consumption
+from business.models import (
+    Company,
+    Contact,
+    Contract
+)
+from parameters.models import FixedHoliday
+from parameters.cache import holiday_calendar
 
-# Create your tests here.
+
+class ActivityModelTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        FixedHoliday.objects.create(
+            name=u'Nouvel An',
+            date=u'01/01'
+        )
+        company = Company.objects.create(
+            name=u'SSII'
+        )
+        client = Contact.objects.create(
+            first_name=u'John',
+            last_name=u'Doe',
+            email=u'john.doe@ssii.org',
+            company=company
+        )
+        self.actor = get_user_model().objects.create_user(
+            username='Test',
+            password='test'
+        )
+        self.other = get_user_model().objects.create_user(
+            username='Other',
+            password='test'
+        )
+        self.contracts = [
+            Contract.objects.create(
+                name=u'test %d' % i,
+                client=client,
+                start=datetime.date(2014, 1, 1),
+                end=datetime.date(2014, 1, 31),
+                days=10,
+                actor=self.actor
+            ) for i in range(2)
+        ]
+        self.week = datetime.date(2014, 1, 6)
+
+    def entries(self, days=u'0.5'):
+        return [
+            (contract.pk, self.week + datetime.timedelta(days=i), days)
+            for contract in self.contracts
+            for i in range(5)
+        ]
+
+    def test_a_activity_is_unique_per_actor_contract_and_day(self):
+        """
+        Tests that an actor has a single activity per contract and day.
+        """
+        Activity.objects.create(
+            actor=self.actor,
+            contract=self.contracts[0],
+            date=self.week,
+            days=1
+        )
+        self.assertRaises(
+            IntegrityError,
+            Activity.objects.create,
+            actor=self.actor,
+            contract=self.contracts[0],
+            date=self.week,
+            days=1
+        )
+
+    def test_b_activity_must_be_coherent_with_contract_and_calendar(self):
+        """
+        Tests that activities are on working days of the contract, by its
+        actor, and for at most one day.
+        """
+        activity = Activity(
+            actor=self.actor,
+            contract=self.contracts[0],
+            date=self.week,
+            days=1
+        )
+        activity.full_clean()
+        for date, days, actor in (
+                (datetime.date(2014, 1, 1), 1, self.actor),
+                (datetime.date(2014, 1, 4), 1, self.actor),
+                (datetime.date(2014, 2, 3), 1, self.actor),
+                (self.week, 2, self.actor),
+                (self.week, 0, self.actor),
+                (self.week, 1, self.other)):
+            activity = Activity(
+                actor=actor,
+                contract=self.contracts[0],
+                date=date,
+                days=days
+            )
+            self.assertRaises(
+                ValidationError,
+                Activity.full_clean,
+                activity
+            )
+
+    def test_c_week_is_submitted_in_a_few_queries(self):
+        """
+        Tests that a week sheet replaces the activities of the week with a
+        number of queries independent of its size.
+        """
+        Activity.objects.create(
+            actor=self.actor,
+            contract=self.contracts[0],
+            date=self.week + datetime.timedelta(days=1),
+            days=1
+        )
+        Activity.objects.create(
+            actor=self.actor,
+            contract=self.contracts[0],
+            date=self.week - datetime.timedelta(days=1),
+            days=1
+        )
+        # Warms the holiday calendar
+        holiday_calendar.holidays_for_year(2014)
+        with CaptureQueriesContext(connection) as few:
+            Activity.objects.submit_week(
+                self.actor, self.week, self.entries()[::5])
+        with CaptureQueriesContext(connection) as many:
+            Activity.objects.submit_week(
+                self.actor, self.week, self.entries())
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(
+            Activity.objects.filter(
+                date__range=(self.week, self.week + datetime.timedelta(6))
+            ).count(),
+            10
+        )
+        self.assertEqual(
+            Activity.objects.get(
+                contract=self.contracts[0],
+                date=self.week + datetime.timedelta(days=1)
+            ).days,
+            Decimal('0.5')
+        )
+        self.assertTrue(
+            Activity.objects.filter(
+                date=self.week - datetime.timedelta(days=1)).exists()
+        )
+
+    def test_d_invalid_week_is_rejected(self):
+        """
+        Tests that a week sheet with an invalid entry leaves the week
+        untouched.
+        """
+        Activity.objects.submit_week(self.actor, self.week, self.entries())
+        for entries in (
+                self.entries(days=u'1'),
+                self.entries() + [(self.contracts[0].pk,
+                                   self.week + datetime.timedelta(days=7),
+                                   u'1')],
+                self.entries()[1:] + self.entries()[:2],
+                [(0, self.week, u'1')],
+                [(self.contracts[0].pk, self.week, u'a')],
+                [(self.contracts[0].pk, self.week, u'NaN')],
+                [(self.contracts[0].pk, self.week, u'sNaN')],
+                [(self.contracts[0].pk, self.week, u'-Infinity')]):
+            self.assertRaises(
+                ValidationError,
+                Activity.objects.submit_week,
+                self.actor,
+                self.week,
+                entries
+            )
+        self.assertRaises(
+            ValidationError,
+            Activity.objects.submit_week,
+            self.actor,
+            self.week + datetime.timedelta(days=1),
+            []
+        )
+        self.assertEqual(Activity.objects.count(), 10)
+
+    def test_e_week_is_submitted_through_json(self):
+        """
+        Tests that the current user submits week sheets as JSON.
+        """
+        url = reverse('activity_submit_week', args=('2014-01-06',))
+        body = json.dumps({'entries': [
+            {'contract': self.contracts[0].pk, 'date': '2014-01-07',
+             'days': '1'},
+        ]})
+        response = self.client.post(url, body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 302)
+        self.client.login(username='Test', password='test')
+        response = self.client.post(url, body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {'activities': 1})
+        body = json.dumps({'entries': [
+            {'contract': self.contracts[0].pk, 'date': '2014-01-11',
+             'days': '1'},
+        ]})
+        response = self.client.post(url, body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(json.loads(response.content)['errors']), 1)
+        body = json.dumps({'entries': [
+            {'contract': self.contracts[0].pk, 'date': '2014-01-07',
+             'days': 'NaN'},
+        ]})
+        response = self.client.post(url, body,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            reverse('activity_submit_week', args=('2014-01-07',)), body,
+            content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+
+class ConsumptionTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        company = Company.objects.create(
+            name=u'SSII'
+        )
+        client = Contact.objects.create(
+            first_name=u'John',
+            last_name=u'Doe',
+            email=u'john.doe@ssii.org',
+            company=company
+        )
+        self.actor = get_user_model().objects.create_user(
+            username='Test',
+            password='test'
+        )
+        self.contract = Contract.objects.create(
+            name=u'test',
+            client=client,
+            start=datetime.date(2014, 3, 1),
+            end=datetime.date(2014, 4, 30),
+            days=30,
+            actor=self.actor
+        )
+        # Week from Monday 31/03 to Sunday 06/04
+        self.week = datetime.date(2014, 3, 31)
+        Activity.objects.submit_week(self.actor, self.week, [
+            (self.contract.pk, self.week + datetime.timedelta(days=i), u'1')
+            for i in range(5)
+        ])
+
+    def consumptions(self):
+        return dict(Consumption.objects.values_list('month', 'days'))
+
+    def test_a_rollups_follow_week_submissions(self):
+        """
+        Tests that submitting week sheets keeps the monthly rollups up to
+        date.
+        """
+        self.assertEqual(self.consumptions(), {
+            datetime.date(2014, 3, 1): 1,
+            datetime.date(2014, 4, 1): 4,
+        })
+        Activity.objects.submit_week(self.actor, self.week, [
+            (self.contract.pk, self.week, u'0.5'),
+            (self.contract.pk, self.week + datetime.timedelta(days=4), u'1'),
+        ])
+        self.assertEqual(self.consumptions(), {
+            datetime.date(2014, 3, 1): Decimal('0.5'),
+            datetime.date(2014, 4, 1): 1,
+        })
+
+    def test_b_rollups_follow_single_changes(self):
+        """
+        Tests that saving and deleting activities one by one or through a
+        queryset keeps the monthly rollups up to date.
+        """
+        activity = Activity.objects.get(date=self.week)
+        activity.days = Decimal('0.25')
+        activity.save()
+        activity = Activity.objects.create(
+            actor=self.actor,
+            contract=self.contract,
+            date=datetime.date(2014, 4, 7),
+            days=1
+        )
+        self.assertEqual(self.consumptions(), {
+            datetime.date(2014, 3, 1): Decimal('0.25'),
+            datetime.date(2014, 4, 1): 5,
+        })
+        activity.delete()
+        Activity.objects.filter(date__lt=datetime.date(2014, 4, 2)).delete()
+        self.assertEqual(self.consumptions(), {
+            datetime.date(2014, 3, 1): 0,
+            datetime.date(2014, 4, 1): 3,
+        })
+
+    def test_c_rollups_can_be_rebuilt(self):
+        """
+        Tests that the rollups are rebuilt from the activities.
+        """
+        expected = self.consumptions()
+        Consumption.objects.update(days=0)
+        call_command('rebuildconsumption', stdout=StringIO())
+        self.assertEqual(self.consumptions(), expected)
+
+    def test_d_contracts_expose_consumed_and_remaining_days(self):
+        """
+        Tests that contracts are annotated with consumed and remaining
+        days read from the rollups.
+        """
+        with self.assertNumQueries(1):
+            contract = Contract.objects.with_consumption().get(
+                pk=self.contract.pk)
+            self.assertEqual(contract.consumed_days, 5)
+            self.assertEqual(contract.remaining_days, 25)
+        self.assertEqual(self.contract.remaining_days, 25)
+        self.assertEqual(
+            Consumption.objects.burn_down(self.contract),
+            [(datetime.date(2014, 3, 1), 1, 29),
+             (datetime.date(2014, 4, 1), 4, 25)]
+        )
+
+    def test_e_rollups_cannot_be_added_from_the_admin(self):
+        """
+        Tests that the admin lists the rollups but does not offer to add
+        them.
+        """
+        get_user_model().objects.create_superuser(
+            username='admin',
+            email='admin@ssii.org',
+            password='admin'
+        )
+        self.client.login(username='admin', password='admin')
+        response = self.client.get(
+            reverse('admin:activity_consumption_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(
+            response, reverse('admin:activity_consumption_add'))
+        response = self.client.get(reverse('admin:activity_consumption_add'))
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,6 @@
+from django.conf.urls import patterns, url
+
+urlpatterns = patterns('activity.views',
+    url(r'^weeks/(?P<week>\d{4}-\d{2}-\d{2})/$', 'submit_week',
+        name='activity_submit_week'),
+)
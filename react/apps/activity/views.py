@@ -1,3 +1,43 @@
-from django.shortcuts import render
+# -*- coding: utf8 -*-
+# Built-in modules
+import json
+# Django modules
+from django.http import JsonResponse, Http404
+from django.utils.dateparse import parse_date
+from django.core.exceptions import ValidationError
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+# React modules
+from activity.models import Activity
 
-# Create your views here.
+
+@require_POST
+@login_required
+def submit_week(request, week):
+    """
+    Replaces the activities of the current user during the week starting
+    on the given date by the entries of the JSON body:
+    {"entries": [{"contract": 1, "date": "2014-01-06", "days": "0.5"}]}
+    """
+    try:
+        week = parse_date(week)
+    except ValueError:
+        raise Http404
+    if week.weekday() != 0:
+        # Weeks are given by their Monday
+        raise Http404
+    try:
+        entries = [
+            (int(entry['contract']), parse_date(entry['date']),
+             entry['days'])
+            for entry in json.loads(request.body)['entries']
+        ]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'errors': [u'Invalid week sheet.']}, status=400)
+    if None in [date for contract, date, days in entries]:
+        return JsonResponse({'errors': [u'Invalid week sheet.']}, status=400)
+    try:
+        activities = Activity.objects.submit_week(request.user, week, entries)
+    except ValidationError as e:
+        return JsonResponse({'errors': e.messages}, status=400)
+    return JsonResponse({'activities': len(activities)})
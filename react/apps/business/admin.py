@@ -1,19 +1,65 @@
 # -*- coding: utf8 -*-
 # Django modules
 from django.contrib import admin
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
 # React modules
 from business.models import (
     Company,
     Contact,
     Contract
 )
+from business import search
+
+class CompanyAdmin(admin.ModelAdmin):
+    # A scan of the companies: no index serves a LIKE whose pattern is a
+    # bound parameter on SQLite, nor UPPER(name) LIKE on PostgreSQL
+    search_fields = ('^name',)
 
 class ContactAdmin(admin.ModelAdmin):
     list_display = ('__unicode__', 'email', 'company')
+    list_select_related = ('company',)
+    # Only shows the search box, get_search_results() does the searching
+    search_fields = ('last_name', 'first_name', 'email', 'company__name')
+    raw_id_fields = ('company',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the full-text index rather than LIKE scans
+        if not search_term:
+            return queryset, False
+        return search.filter_contacts(queryset, search_term), False
 
 class ContractAdmin(admin.ModelAdmin):
-    list_display = ('name', 'client', 'days', 'start', 'end', 'actor')
+    list_display = ('name', 'client', 'days', 'consumed_days',
+                    'remaining_days', 'start', 'end', 'actor')
+    list_select_related = ('client__company', 'actor')
+    list_filter = ('start', 'end', 'actor')
+    # Only shows the search box, get_search_results() does the searching
+    search_fields = ('name', 'client__last_name', 'client__email')
+    raw_id_fields = ('client', 'actor')
+
+    def get_queryset(self, request):
+        return super(ContractAdmin, self).get_queryset(
+            request).with_consumption()
+
+    def get_search_results(self, request, queryset, search_term):
+        # Names start with the search term, found by a scan like the
+        # companies, and clients are looked up in the full-text index
+        if not search_term:
+            return queryset, False
+        clients = search.filter_contacts(Contact.objects.all(), search_term)
+        return queryset.filter(Q(name__istartswith=search_term) |
+                               Q(client__in=clients)), False
+
+    def consumed_days(self, obj):
+        return obj.consumed_days or 0
+    consumed_days.short_description = _(u'consumed days')
+    consumed_days.admin_order_field = 'consumed_days'
+
+    def remaining_days(self, obj):
+        return obj.remaining_days
+    remaining_days.short_description = _(u'remaining days')
 
-admin.site.register(Company)
+admin.site.register(Company, CompanyAdmin)
 admin.site.register(Contact, ContactAdmin)
 admin.site.register(Contract, ContractAdmin)
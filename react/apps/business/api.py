@@ -0,0 +1,233 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import json
+import hashlib
+import calendar
+# Django modules
+from django.db.models import Q
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotModified
+)
+from django.utils.http import http_date
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.contrib.auth.decorators import permission_required
+# React modules
+from business.models import (
+    Company,
+    Contact,
+    Contract
+)
+from business.search import search_contacts
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+
+
+def seek_after(queryset, ordering, values):
+    """
+    Returns the rows of the queryset following the given values of the
+    ordering fields, the queryset being sorted by these fields.
+    """
+    condition = Q()
+    for i, name in enumerate(ordering):
+        seek = Q(**{'%s__gt' % name: values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            seek &= Q(**{previous: value})
+        condition |= seek
+    return queryset.filter(condition)
+
+
+class Resource(object):
+    """
+    Read-only JSON list of a model, paginated by seeking after the
+    ordering values of the last row of the previous page instead of
+    using offsets.
+    """
+    model = None
+    # Unique ordering, the last field being the primary key
+    ordering = ('id',)
+    related = ()
+    # Field name -> function returning the value of an object
+    fields = {}
+
+    def queryset(self):
+        return self.model._default_manager.select_related(
+            *self.related).order_by(*self.ordering)
+
+    def parse_cursor(self, cursor):
+        values = cursor.split(u',')
+        if len(values) != len(self.ordering):
+            raise ValidationError(u'Invalid cursor: %s' % cursor)
+        return [self.model._meta.get_field(name).to_python(value)
+                for name, value in zip(self.ordering, values)]
+
+    def cursor(self, obj):
+        return u','.join(
+            unicode(getattr(obj, name)) for name in self.ordering)
+
+    def after(self, queryset, values):
+        """
+        Returns the rows of the queryset following the given ordering
+        values.
+        """
+        return seek_after(queryset, self.ordering, values)
+
+    def page(self, params):
+        """
+        Returns the objects of the page described by the 'after', 'limit'
+        and 'fields' parameters, the cursor of the next page and the
+        latest modification date of the objects.
+        """
+        fields = sorted(self.fields)
+        if params.get('fields'):
+            fields = params['fields'].split(u',')
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise ValidationError(
+                    u'Unknown fields: %s' % u', '.join(sorted(unknown)))
+        try:
+            limit = int(params.get('limit', DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError(u'Invalid limit.')
+        if not 0 < limit <= MAX_LIMIT:
+            raise ValidationError(
+                u'The limit must be between 1 and %d.' % MAX_LIMIT)
+        queryset = self.queryset()
+        if params.get('after'):
+            queryset = self.after(
+                queryset, self.parse_cursor(params['after']))
+        objects = list(queryset[:limit + 1])
+        next_cursor = None
+        if len(objects) > limit:
+            objects = objects[:limit]
+            next_cursor = self.cursor(objects[-1])
+        results = [
+            dict((name, self.fields[name](obj)) for name in fields)
+            for obj in objects
+        ]
+        modified = max([obj.modified for obj in objects] or [None])
+        return results, next_cursor, modified
+
+
+class CompanyResource(Resource):
+    model = Company
+    fields = {
+        'id': lambda company: company.pk,
+        'name': lambda company: company.name,
+        'modified': lambda company: company.modified,
+    }
+
+
+class ContactResource(Resource):
+    model = Contact
+    related = ('company',)
+    fields = {
+        'id': lambda contact: contact.pk,
+        'first_name': lambda contact: contact.first_name,
+        'last_name': lambda contact: contact.last_name,
+        'email': lambda contact: contact.email,
+        'company_id': lambda contact: contact.company_id,
+        'company': lambda contact: contact.company.name,
+        'modified': lambda contact: contact.modified,
+    }
+
+
+class ContractResource(Resource):
+    model = Contract
+    ordering = ('start', 'id')
+    related = ('client__company', 'actor')
+    fields = {
+        'id': lambda contract: contract.pk,
+        'name': lambda contract: contract.name,
+        'start': lambda contract: contract.start,
+        'end': lambda contract: contract.end,
+        'days': lambda contract: contract.days,
+        'client_id': lambda contract: contract.client_id,
+        'client': lambda contract: contract.client.email,
+        'company': lambda contract: contract.client.company.name,
+        'actor': lambda contract: contract.actor.get_username(),
+        'modified': lambda contract: contract.modified,
+    }
+
+
+def resource_list(request, resource):
+    """
+    Returns a page of the resource as JSON, or a 304 response when the
+    client already has it, according to its If-None-Match header.
+    """
+    try:
+        results, next_cursor, modified = resource.page(request.GET)
+    except ValidationError as e:
+        return HttpResponseBadRequest(u' '.join(e.messages))
+    next_url = None
+    if next_cursor is not None:
+        params = request.GET.copy()
+        params['after'] = next_cursor
+        next_url = request.build_absolute_uri(
+            u'%s?%s' % (request.path, params.urlencode()))
+    body = json.dumps({'results': results, 'next': next_url},
+                      cls=DjangoJSONEncoder, sort_keys=True)
+    etag = '"%s"' % hashlib.md5(body).hexdigest()
+    last_modified = None
+    if modified is not None:
+        last_modified = calendar.timegm(modified.utctimetuple())
+    # Only the ETag of the body tells whether the page changed: deleting
+    # a row of the page does not move the latest modification date.
+    not_modified = etag in [tag.strip() for tag in request.META.get(
+        'HTTP_IF_NONE_MATCH', '').split(',')]
+    if not_modified:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+@permission_required('business.change_company', raise_exception=True)
+def company_list(request):
+    return resource_list(request, CompanyResource())
+
+
+@permission_required('business.change_contact', raise_exception=True)
+def contact_list(request):
+    return resource_list(request, ContactResource())
+
+
+@permission_required('business.change_contract', raise_exception=True)
+def contract_list(request):
+    return resource_list(request, ContractResource())
+
+
+@permission_required('business.change_contact', raise_exception=True)
+def contact_search(request):
+    """
+    Returns the contacts matching every word of the 'q' parameter as a
+    prefix of their names, email or company, the most relevant first.
+    """
+    query = request.GET.get('q', u'').strip()
+    if not query:
+        return HttpResponseBadRequest(u'Missing query.')
+    try:
+        limit = int(request.GET.get('limit', SEARCH_LIMIT))
+    except ValueError:
+        limit = 0
+    if not 0 < limit <= MAX_SEARCH_LIMIT:
+        return HttpResponseBadRequest(
+            u'The limit must be between 1 and %d.' % MAX_SEARCH_LIMIT)
+    fields = ContactResource.fields
+    results = [
+        dict((name, fields[name](contact)) for name in sorted(fields))
+        for contact in search_contacts(query, limit)
+    ]
+    return HttpResponse(
+        json.dumps({'results': results}, cls=DjangoJSONEncoder,
+                   sort_keys=True),
+        content_type='application/json')
@@ -0,0 +1,13 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.apps import AppConfig
+from django.utils.translation import ugettext_lazy as _
+
+
+class BusinessConfig(AppConfig):
+    name = 'business'
+    verbose_name = _(u'Business')
+
+    def ready(self):
+        # Connects the signal receivers
+        from business import signals
@@ -0,0 +1,138 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import time
+import platform
+# Django modules
+from django.db import connection, transaction
+from django.contrib.auth import get_user_model
+# React modules
+from business.models import Company, Contract
+from business.synthetic import seed, seed_holidays
+from business.exports import contracts_to_export, contract_rows, iter_csv
+from business.importers import ContactImporter, ContractImporter
+from parameters import workingdays
+from parameters.models import Holiday, FixedHoliday
+from parameters.cache import holiday_calendar
+from react.validation import full_clean_batch
+
+# Relative slowdown of the median above which an operation regresses
+DEFAULT_THRESHOLD = 0.1
+
+
+def measure(func, warmup=1, repeat=5):
+    """
+    Runs func() `warmup` times, then times `repeat` runs of it and returns
+    their minimum, median and mean durations in seconds.
+    """
+    for i in range(warmup):
+        func()
+    timings = []
+    for i in range(repeat):
+        began = time.time()
+        func()
+        timings.append(time.time() - began)
+    timings.sort()
+    return {
+        'runs': repeat,
+        'min': timings[0],
+        'median': timings[len(timings) // 2],
+        'mean': sum(timings) / len(timings),
+    }
+
+
+def rolled_back(func):
+    """
+    Returns a function running func() in a transaction rolled back
+    afterwards, so that it can be repeated on the same data.
+    """
+    def run():
+        with transaction.atomic():
+            func()
+            transaction.set_rollback(True)
+    return run
+
+
+def operations(size):
+    """
+    Returns the (name, function) operations to benchmark on the seeded
+    data, `size` being the number of records imported.
+    """
+    contract = Contract.objects.select_related('client', 'actor').first()
+    holiday = FixedHoliday(name=u'Bench', date=u'14/07')
+    company = Company.objects.values_list('name', flat=True).first()
+    contacts = [
+        (i, {'first_name': u'bench', 'last_name': u'bench %d' % i,
+             'email': u'bench.%d@example.org' % i, 'company': company})
+        for i in range(size)
+    ]
+    contracts = [
+        (i, {'name': u'Bench %d' % i, 'start': start, 'end': end,
+             'days': u'1', 'client': client, 'actor': actor})
+        for i, (start, end, client, actor) in enumerate(
+            Contract.objects.values_list(
+                'start', 'end', 'client__email',
+                'actor__%s' % get_user_model().USERNAME_FIELD)[:size])
+    ]
+    batch = list(Contract.objects.all()[:size])
+    return (
+        ('contract.full_clean', contract.full_clean),
+        ('contract.full_clean_batch', lambda: full_clean_batch(batch)),
+        ('fixedholiday.clean', holiday.clean),
+        ('holiday.iterate', lambda: list(Holiday.objects.all())),
+        ('contract.list', lambda: list(Contract.objects.select_related(
+            'client__company', 'actor'))),
+        ('contract.working_days', Contract.objects.working_days),
+        ('contract.export', lambda: list(iter_csv(contract_rows(
+            contracts_to_export())))),
+        ('contact.import', rolled_back(
+            lambda: ContactImporter().run(contacts))),
+        ('contract.import', rolled_back(
+            lambda: ContractImporter().run(contracts))),
+    )
+
+
+def run(companies=100, contacts=1000, contracts=10000, actors=20,
+        years=10, warmup=1, repeat=5, imports=1000, only=None):
+    """
+    Seeds the current database with synthetic data and returns the
+    timings of the key operations, along with the run parameters.
+    """
+    seed(companies=companies, contacts=contacts, contracts=contracts,
+         actors=actors, first_year=2010, years=years)
+    seed_holidays(first_year=2010, years=years)
+    holiday_calendar.invalidate()
+    results = {}
+    for name, func in operations(imports):
+        if only and name not in only:
+            continue
+        results[name] = measure(func, warmup=warmup, repeat=repeat)
+    return {
+        'meta': {
+            'companies': companies,
+            'contacts': contacts,
+            'contracts': contracts,
+            'actors': actors,
+            'years': years,
+            'imports': imports,
+            'warmup': warmup,
+            'repeat': repeat,
+            'database': connection.vendor,
+            'numpy': workingdays.numpy is not None,
+            'python': platform.python_version(),
+        },
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Returns the (name, baseline median, current median, ratio, regressed)
+    comparison of the operations timed in both runs.
+    """
+    rows = []
+    for name in sorted(set(baseline['results']) & set(current['results'])):
+        before = baseline['results'][name]['median']
+        after = current['results'][name]['median']
+        ratio = after / before if before else float('inf')
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
@@ -0,0 +1,222 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import bisect
+import calendar
+import datetime
+# React modules
+from react import versions
+from business.models import Contract
+from parameters.cache import holiday_calendar
+from parameters.workingdays import count_working_days
+
+ONE_DAY = datetime.timedelta(days=1)
+
+VERSION_KEY = u'business:capacity:version'
+
+
+class ActorLoad(object):
+    """
+    Workload of an actor, each contract spreading its days evenly over
+    its working days.
+
+    Working days are numbered from the first contract start: a contract
+    covers the positions from `first` (excluded) to `last` (included).
+    The cumulated load up to a position is piecewise linear, so it is
+    stored at the sorted breakpoints with the slope that follows each of
+    them, and any range query is two binary searches.
+    """
+
+    def __init__(self, contracts):
+        self.epoch = None
+        self.positions = []
+        self.totals = []
+        self.slopes = []
+        contracts = [(s, e, float(d)) for s, e, d in contracts if s <= e]
+        if not contracts:
+            return
+        self.epoch = min(s for s, e, d in contracts)
+        changes = {}
+        for start, end, days in contracts:
+            first = self.position(start - ONE_DAY)
+            last = self.position(end)
+            if last == first:
+                # No working day to spread the days over
+                continue
+            rate = days / (last - first)
+            changes[first] = changes.get(first, 0.0) + rate
+            changes[last] = changes.get(last, 0.0) - rate
+        total = 0.0
+        slope = 0.0
+        previous = 0
+        for position in sorted(changes):
+            total += slope * (position - previous)
+            slope += changes[position]
+            self.positions.append(position)
+            self.totals.append(total)
+            self.slopes.append(slope)
+            previous = position
+
+    def position(self, date):
+        """
+        Returns the number of working days from the epoch to the date.
+        """
+        return count_working_days(self.epoch, date)
+
+    def cumulated(self, position):
+        i = bisect.bisect_right(self.positions, position) - 1
+        if i < 0:
+            return 0.0
+        return self.totals[i] + self.slopes[i] * (position - self.positions[i])
+
+    def load(self, start, end):
+        """
+        Returns the number of days planned between start and end, both
+        included.
+        """
+        if self.epoch is None or start > end:
+            return 0.0
+        return (self.cumulated(self.position(end)) -
+                self.cumulated(self.position(start - ONE_DAY)))
+
+
+class CapacityPlanner(object):
+    """
+    Per-process cache of the actor workloads.
+
+    The workload of an actor is built from its contracts with one query
+    the first time it is needed, and dropped when one of its contracts
+    is saved or deleted. Changes made by other processes are detected
+    through a version counter kept in Django's cache framework, bumped
+    again once the transaction of a change is over, and drop every
+    workload, as do holiday calendar changes since the working
+    days change with them.
+    """
+
+    def __init__(self):
+        self._clear()
+
+    def _clear(self):
+        self._version = None
+        self._calendar_version = None
+        self._loads = {}
+        self._actors = {}
+        self._complete = False
+        self._stale = set()
+
+    def version(self):
+        """
+        Returns the current contracts version shared by all processes.
+        """
+        return versions.get(VERSION_KEY)
+
+    def _check_versions(self):
+        version = self.version()
+        calendar_version = holiday_calendar.version()
+        if (version != self._version or
+                calendar_version != self._calendar_version):
+            self._clear()
+            self._version = version
+            self._calendar_version = calendar_version
+
+    def _build(self, contracts):
+        by_actor = {}
+        for pk, actor_id, start, end, days in contracts:
+            self._actors[pk] = actor_id
+            by_actor.setdefault(actor_id, []).append((start, end, days))
+        return by_actor
+
+    def actor_load(self, actor_id):
+        """
+        Returns the workload of the given actor.
+        """
+        self._check_versions()
+        try:
+            return self._loads[actor_id]
+        except KeyError:
+            by_actor = self._build(Contract.objects.filter(
+                actor=actor_id).values_list(
+                    'pk', 'actor', 'start', 'end', 'days'))
+            load = ActorLoad(by_actor.get(actor_id, []))
+            self._loads[actor_id] = load
+            self._stale.discard(actor_id)
+            return load
+
+    def all_loads(self):
+        """
+        Returns the workloads of every actor having contracts.
+        """
+        self._check_versions()
+        if not self._complete:
+            contracts = Contract.objects.all()
+        elif self._stale:
+            contracts = Contract.objects.filter(actor__in=self._stale)
+        else:
+            return self._loads
+        by_actor = self._build(contracts.values_list(
+            'pk', 'actor', 'start', 'end', 'days'))
+        for actor_id in set(by_actor) | self._stale:
+            self._loads[actor_id] = ActorLoad(by_actor.get(actor_id, []))
+        self._complete = True
+        self._stale = set()
+        return self._loads
+
+    def load(self, actor_id, start, end):
+        """
+        Returns the number of days planned for the actor between start
+        and end, both included.
+        """
+        return self.actor_load(actor_id).load(start, end)
+
+    def over_capacity(self, year, month):
+        """
+        Returns a dictionary mapping the actors planned for more days
+        than the working days of the month to their load.
+        """
+        start = datetime.date(year, month, 1)
+        end = datetime.date(year, month, calendar.monthrange(year, month)[1])
+        capacity = count_working_days(start, end)
+        overloaded = {}
+        for actor_id, actor_load in self.all_loads().items():
+            load = actor_load.load(start, end)
+            # Tolerates the rounding of the spread days
+            if load - capacity > 1e-6:
+                overloaded[actor_id] = load
+        return overloaded
+
+    def invalidate(self):
+        """
+        Drops the workloads in every process.
+        """
+        versions.bump(VERSION_KEY)
+        self._clear()
+
+    def contract_changed(self, contract):
+        """
+        Drops the workloads of the actors of the given contract, before
+        and after its change.
+        """
+        self._actors_changed((self._actors.pop(contract.pk, None),
+                              contract.actor_id))
+
+    def contracts_created(self, contracts):
+        """
+        Drops the workloads of the actors of the given new contracts,
+        created without sending the signals which call contract_changed().
+        """
+        self._actors_changed(set(contract.actor_id for contract in contracts))
+
+    def _actors_changed(self, actor_ids):
+        version = versions.bump(VERSION_KEY)
+        if self._version is None or version != self._version + 1:
+            # Changed by another process as well, which can only be caught
+            # up by rebuilding everything
+            self._clear()
+            return
+        self._version = version
+        for actor_id in actor_ids:
+            if actor_id is not None:
+                self._loads.pop(actor_id, None)
+                self._stale.add(actor_id)
+
+
+capacity_planner = CapacityPlanner()
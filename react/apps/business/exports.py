@@ -0,0 +1,87 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import csv
+# Django modules
+from django.contrib.auth import get_user_model
+# React modules
+from business.models import Contract
+from business.api import seek_after
+
+HEADER = (
+    u'id', u'name', u'company', u'client', u'client_email',
+    u'actor', u'start', u'end', u'days',
+)
+
+# Unique ordering of the exported contracts
+ORDERING = ('start', 'pk')
+
+# Number of contracts fetched by each query of an export
+CHUNK_SIZE = 2000
+
+
+class Echo(object):
+    """
+    File-like object returning what is written instead of storing it.
+    """
+    def write(self, value):
+        return value
+
+
+def contracts_to_export(start=None, end=None, actor=None, company=None):
+    """
+    Returns the contracts overlapping the given dates, optionally filtered
+    by actor username and by client company name.
+    """
+    contracts = Contract.objects.select_related(
+        'client__company', 'actor').order_by('start', 'pk')
+    if start is not None:
+        contracts = contracts.filter(end__gte=start)
+    if end is not None:
+        contracts = contracts.filter(start__lte=end)
+    if actor:
+        contracts = contracts.filter(**{
+            'actor__%s' % get_user_model().USERNAME_FIELD: actor})
+    if company:
+        contracts = contracts.filter(client__company__name=company)
+    return contracts
+
+
+def contract_rows(contracts, chunk_size=CHUNK_SIZE):
+    """
+    Yields the header then one row per contract.
+
+    Contracts are fetched by chunks, each query seeking after the last
+    contract of the previous chunk, so that memory stays bounded and no
+    cursor stays open while the rows are consumed.
+    """
+    yield HEADER
+    contracts = contracts.order_by(*ORDERING)
+    chunk = list(contracts[:chunk_size])
+    while chunk:
+        for contract in chunk:
+            client = contract.client
+            yield (
+                contract.pk,
+                contract.name,
+                client.company.name,
+                u'%s' % client,
+                client.email,
+                contract.actor.get_username(),
+                contract.start.isoformat(),
+                contract.end.isoformat(),
+                u'%.2f' % contract.days,
+            )
+        if len(chunk) < chunk_size:
+            break
+        last = chunk[-1]
+        chunk = list(seek_after(
+            contracts, ORDERING, [last.start, last.pk])[:chunk_size])
+
+
+def iter_csv(rows):
+    """
+    Yields the given rows as UTF-8 encoded CSV lines.
+    """
+    writer = csv.writer(Echo())
+    for row in rows:
+        yield writer.writerow([unicode(value).encode('utf8') for value in row])
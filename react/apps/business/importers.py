@@ -0,0 +1,253 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import csv
+import json
+import itertools
+# Django modules
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils.translation import ugettext as _
+# React modules
+from business.models import (
+    Company,
+    Contact,
+    Contract
+)
+from business import search
+from business.capacity import capacity_planner
+from react.validation import validate_unique_batch
+
+# Maximum number of values of a single IN lookup, kept under the SQLite
+# limit of 999 parameters per statement.
+IN_LOOKUP_SIZE = 500
+
+
+def read_records(path):
+    """
+    Yields (line number, record) pairs read from a CSV file with a header
+    row, or from a JSON lines file when the file is not a '.csv' one.
+    """
+    with open(path, 'rb') as f:
+        for item in parse_records(f, path.lower().endswith('.csv')):
+            yield item
+
+
+def parse_records(f, is_csv):
+    """
+    Yields the (line number, record) pairs of an open CSV file with a
+    header row, or of an open JSON lines file.
+    """
+    if is_csv:
+        reader = csv.DictReader(f)
+        for row in reader:
+            record = {}
+            for key, value in row.items():
+                if key is not None:
+                    record[key.decode('utf8')] = (
+                        value.decode('utf8') if value is not None else u'')
+            yield reader.line_num, record
+    else:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if line:
+                yield number, json.loads(line)
+
+
+def values_in(queryset, field, values, *fields):
+    """
+    Returns the rows of the queryset whose field is in the given values,
+    as tuples of the given fields, splitting long lists of values.
+    """
+    values = list(set(values))
+    rows = []
+    for i in range(0, len(values), IN_LOOKUP_SIZE):
+        rows.extend(queryset.filter(**{
+            '%s__in' % field: values[i:i + IN_LOOKUP_SIZE]
+        }).values_list(*fields))
+    return rows
+
+
+class Importer(object):
+    """
+    Imports records into a model by batches.
+
+    Each batch resolves its foreign keys with one query per relation,
+    checks unique constraints with one query per constraint, and is
+    written with bulk_create() inside its own transaction. Invalid
+    records are reported and skipped.
+    """
+    model = None
+    # Columns copied as they are to the model fields
+    fields = ()
+    # Foreign key field -> (related model, lookup field)
+    relations = {}
+
+    def __init__(self, batch_size=500, on_error=None, on_batch=None):
+        self.batch_size = batch_size
+        self.on_error = on_error
+        # Called without arguments once each batch is committed
+        self.on_batch = on_batch
+        self.created = 0
+        self.rejected = 0
+        self.errors = []
+
+    def run(self, records):
+        """
+        Imports the given (line number, record) pairs.
+        """
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch)
+            if self.on_batch is not None:
+                self.on_batch()
+        return self
+
+    def import_batch(self, batch):
+        lookups = self.build_lookups([record for line, record in batch])
+        instances = []
+        for line, record in batch:
+            instance = self.model(
+                **dict((f, record.get(f)) for f in self.fields))
+            errors = self.resolve(instance, record, lookups)
+            if not errors:
+                errors = self.clean(instance)
+            if errors:
+                self.report(line, errors)
+            else:
+                instances.append((line, instance))
+        instances = self.check_unique(instances)
+        if instances:
+            with transaction.atomic():
+                self.model._default_manager.bulk_create(
+                    [instance for line, instance in instances])
+                self.after_create([instance for line, instance in instances])
+            self.created += len(instances)
+
+    def build_lookups(self, records):
+        """
+        Returns, for each relation, a mapping from lookup values to the
+        primary keys of the related objects referenced by the records.
+        """
+        lookups = {}
+        for name, (model, key) in self.relations.items():
+            values = [record.get(name) for record in records
+                      if record.get(name)]
+            lookups[name] = dict(values_in(
+                model._default_manager.all(), key, values, key, 'pk'))
+        return lookups
+
+    def resolve(self, instance, record, lookups):
+        errors = {}
+        for name, (model, key) in self.relations.items():
+            value = record.get(name)
+            if not value:
+                errors[name] = [_(u'This field cannot be blank.')]
+            elif value not in lookups[name]:
+                errors[name] = [
+                    _(u'Unknown %(model)s: %(value)s.') % {
+                        'model': model._meta.verbose_name,
+                        'value': value
+                    }
+                ]
+            else:
+                setattr(instance, self.model._meta.get_field(name).attname,
+                        lookups[name][value])
+        return errors
+
+    def clean(self, instance):
+        """
+        Applies the field validation, the normalisation and the clean()
+        rules of the model, and returns the errors found.
+        """
+        try:
+            # Foreign keys are already resolved against the database
+            instance.clean_fields(exclude=self.relations.keys())
+        except ValidationError as e:
+            return e.message_dict
+        self.normalize(instance)
+        try:
+            instance.clean()
+        except ValidationError as e:
+            return ValidationError(e.update_error_dict({})).message_dict
+        return {}
+
+    def normalize(self, instance):
+        pass
+
+    def after_create(self, instances):
+        """
+        Called with the instances of a batch once they are created, in the
+        transaction of the batch.
+        """
+        pass
+
+    def check_unique(self, instances):
+        """
+        Returns the instances whose unique fields are neither already in
+        the database nor used by a previous instance of the batch.
+        """
+        errors = validate_unique_batch(
+            [instance for line, instance in instances],
+            exclude=self.relations.keys())
+        kept = []
+        for (line, instance), instance_errors in zip(instances, errors):
+            if instance_errors:
+                self.report(line, instance_errors)
+            else:
+                kept.append((line, instance))
+        return kept
+
+    def report(self, line, errors):
+        self.rejected += 1
+        if self.on_error is None:
+            self.errors.append((line, errors))
+        else:
+            self.on_error(line, errors)
+
+
+class CompanyImporter(Importer):
+    model = Company
+    fields = ('name',)
+
+
+class ContactImporter(Importer):
+    model = Contact
+    fields = ('first_name', 'last_name', 'email')
+    relations = {
+        'company': (Company, 'name'),
+    }
+
+    def normalize(self, instance):
+        instance.normalize()
+
+    def after_create(self, instances):
+        # bulk_create() sends no signal and may not set the primary keys
+        search.index_new_contacts(instance.email for instance in instances)
+
+
+class ContractImporter(Importer):
+    model = Contract
+    fields = ('name', 'start', 'end', 'days')
+
+    @property
+    def relations(self):
+        user_model = get_user_model()
+        return {
+            'client': (Contact, 'email'),
+            'actor': (user_model, user_model.USERNAME_FIELD),
+        }
+
+    def after_create(self, instances):
+        # bulk_create() sends no signal to the capacity planner
+        capacity_planner.contracts_created(instances)
+
+
+IMPORTERS = {
+    'company': CompanyImporter,
+    'contact': ContactImporter,
+    'contract': ContractImporter,
+}
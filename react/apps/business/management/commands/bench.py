@@ -0,0 +1,103 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import json
+from optparse import make_option
+# Django modules
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+# React modules
+from business import bench
+
+
+class Command(BaseCommand):
+    help = ('Seeds a test database with synthetic data, times the key '
+            'model, validation, queryset, import and export operations, '
+            'and optionally compares the results to a previous run.')
+    option_list = BaseCommand.option_list + (
+        make_option('--companies', type='int', dest='companies',
+                    default=100,
+                    help='Number of companies (default: 100).'),
+        make_option('--contacts', type='int', dest='contacts',
+                    default=1000,
+                    help='Number of contacts (default: 1000).'),
+        make_option('--contracts', type='int', dest='contracts',
+                    default=10000,
+                    help='Number of contracts (default: 10000).'),
+        make_option('--actors', type='int', dest='actors', default=20,
+                    help='Number of actors (default: 20).'),
+        make_option('--years', type='int', dest='years', default=10,
+                    help='Years covered by contracts and holidays '
+                         '(default: 10).'),
+        make_option('--imports', type='int', dest='imports', default=1000,
+                    help='Records per import (default: 1000).'),
+        make_option('--warmup', type='int', dest='warmup', default=1,
+                    help='Untimed runs of each operation (default: 1).'),
+        make_option('--repeat', type='int', dest='repeat', default=5,
+                    help='Timed runs of each operation (default: 5).'),
+        make_option('--only', action='append', dest='only',
+                    help='Only this operation (repeatable).'),
+        make_option('-o', '--output', dest='output',
+                    help='Writes the results to this JSON file.'),
+        make_option('--baseline', dest='baseline',
+                    help='Compares the results to this JSON file.'),
+        make_option('--compare', nargs=2, dest='compare',
+                    metavar='BASELINE RESULTS',
+                    help='Compares two JSON files without running.'),
+        make_option('--threshold', type='float', dest='threshold',
+                    default=bench.DEFAULT_THRESHOLD * 100,
+                    help='Slowdown in percent reported as a regression '
+                         '(default: %d).' % (bench.DEFAULT_THRESHOLD * 100)),
+    )
+
+    def handle(self, *args, **options):
+        threshold = options['threshold'] / 100.
+        if options['compare']:
+            baseline, current = [self.load(path)
+                                 for path in options['compare']]
+            return self.compare(baseline, current, threshold)
+        if options['repeat'] < 1:
+            raise CommandError('At least one timed run is required.')
+        baseline = options['baseline'] and self.load(options['baseline'])
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            current = bench.run(
+                companies=options['companies'],
+                contacts=options['contacts'],
+                contracts=options['contracts'],
+                actors=options['actors'],
+                years=options['years'],
+                imports=options['imports'],
+                warmup=options['warmup'],
+                repeat=options['repeat'],
+                only=options['only'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        for name, timing in sorted(current['results'].items()):
+            self.stdout.write(u'%-24s median %9.3fms  min %9.3fms' % (
+                name, timing['median'] * 1000, timing['min'] * 1000))
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+        if baseline:
+            self.compare(baseline, current, threshold)
+
+    def load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (IOError, ValueError) as e:
+            raise CommandError('Cannot read %s: %s' % (path, e))
+
+    def compare(self, baseline, current, threshold):
+        regressions = []
+        for name, before, after, ratio, regressed in bench.compare(
+                baseline, current, threshold):
+            self.stdout.write(u'%-24s %9.3fms -> %9.3fms  x%.2f%s' % (
+                name, before * 1000, after * 1000, ratio,
+                regressed and u'  REGRESSION' or u''))
+            if regressed:
+                regressions.append(name)
+        if regressions:
+            raise CommandError('%d regression(s) over %d%%: %s' % (
+                len(regressions), threshold * 100, ', '.join(regressions)))
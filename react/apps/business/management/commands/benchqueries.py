@@ -0,0 +1,90 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import time
+import datetime
+from optparse import make_option
+# Django modules
+from django.db import connection
+from django.core.management.base import BaseCommand
+# React modules
+from business.models import Contact, Contract
+from business.synthetic import seed
+
+
+class Command(BaseCommand):
+    help = ('Seeds a test database with synthetic data and reports the '
+            'plans and timings of the standard business queries without '
+            'and with the composite indexes.')
+    option_list = BaseCommand.option_list + (
+        make_option('--contracts', type='int', dest='contracts',
+                    default=200000,
+                    help='Number of contracts (default: 200000).'),
+        make_option('--contacts', type='int', dest='contacts',
+                    default=20000,
+                    help='Number of contacts (default: 20000).'),
+        make_option('--repeat', type='int', dest='repeat', default=20,
+                    help='Runs of each query (default: 20).'),
+    )
+
+    def handle(self, *args, **options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False)
+        try:
+            seed(companies=max(options['contacts'] // 20, 1),
+                 contacts=options['contacts'],
+                 contracts=options['contracts'],
+                 actors=50)
+            with connection.schema_editor() as editor:
+                editor.alter_index_together(
+                    Contact, Contact._meta.index_together, [])
+                editor.alter_index_together(
+                    Contract, Contract._meta.index_together, [])
+            self.report(u'Without composite indexes', options['repeat'])
+            with connection.schema_editor() as editor:
+                editor.alter_index_together(
+                    Contact, [], Contact._meta.index_together)
+                editor.alter_index_together(
+                    Contract, [], Contract._meta.index_together)
+            self.report(u'With composite indexes', options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def queries(self):
+        actor_id, client_id = Contract.objects.values_list(
+            'actor', 'client')[0]
+        company_id = Contact.objects.values_list('company', flat=True)[0]
+        start = datetime.date(2012, 3, 1)
+        end = datetime.date(2012, 3, 31)
+        return (
+            (u'contracts of an actor in a period',
+             Contract.objects.filter(actor=actor_id,
+                                     start__range=(start, end))),
+            (u'contracts of a client by start',
+             Contract.objects.filter(client=client_id).order_by('start')),
+            (u'contracts overlapping a period',
+             Contract.objects.filter(start__lte=end, end__gte=start)),
+            (u'contacts of a company by last name',
+             Contact.objects.filter(company=company_id,
+                                    last_name__startswith=u'LAST1')),
+        )
+
+    def report(self, title, repeat):
+        self.stdout.write(u'== %s' % title)
+        for label, queryset in self.queries():
+            sql, params = queryset.query.sql_with_params()
+            cursor = connection.cursor()
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [row[-1] for row in cursor.fetchall()]
+            else:
+                cursor.execute('EXPLAIN ' + sql, params)
+                plan = [row[0] for row in cursor.fetchall()]
+            began = time.time()
+            for i in range(repeat):
+                cursor.execute(sql, params)
+                count = len(cursor.fetchall())
+            elapsed = (time.time() - began) / repeat
+            self.stdout.write(u'%s: %d rows, %.2fms' % (
+                label, count, elapsed * 1000))
+            for line in plan:
+                self.stdout.write(u'    %s' % line)
@@ -0,0 +1,56 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import time
+import random
+import datetime
+from optparse import make_option
+# Django modules
+from django.core.management.base import BaseCommand, CommandError
+# React modules
+from parameters import workingdays
+
+
+class Command(BaseCommand):
+    help = ('Compares the per-contract and the bulk computation of '
+            'working days over synthetic contracts.')
+    option_list = BaseCommand.option_list + (
+        make_option('--contracts', type='int', dest='contracts',
+                    default=100000,
+                    help='Number of synthetic contracts (default: 100000).'),
+        make_option('--seed', type='int', dest='seed', default=0,
+                    help='Seed of the random generator (default: 0).'),
+    )
+
+    def handle(self, *args, **options):
+        if options['contracts'] < 1:
+            raise CommandError('At least one contract is required.')
+        rand = random.Random(options['seed'])
+        origin = datetime.date(2010, 1, 1)
+        starts = []
+        ends = []
+        for i in range(options['contracts']):
+            start = origin + datetime.timedelta(days=rand.randint(0, 3650))
+            starts.append(start)
+            ends.append(start + datetime.timedelta(days=rand.randint(0, 400)))
+        # Warms the holiday calendar for both paths
+        workingdays.weekday_holidays_between(
+            min(starts).year, max(ends).year)
+
+        began = time.time()
+        expected = [workingdays.count_working_days(s, e)
+                    for s, e in zip(starts, ends)]
+        per_contract = time.time() - began
+
+        began = time.time()
+        counts = workingdays.bulk_count_working_days(starts, ends)
+        bulk = time.time() - began
+
+        if counts != expected:
+            raise CommandError('Bulk and per-contract counts differ.')
+        self.stdout.write(u'contracts:    %d' % len(starts))
+        self.stdout.write(u'numpy:        %s' % (
+            workingdays.numpy is not None and u'yes' or u'no'))
+        self.stdout.write(u'per-contract: %.3fs' % per_contract)
+        self.stdout.write(u'bulk:         %.3fs' % bulk)
+        self.stdout.write(u'speedup:      x%.1f' % (
+            per_contract / max(bulk, 1e-9)))
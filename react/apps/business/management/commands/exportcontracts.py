@@ -0,0 +1,49 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+from optparse import make_option
+# Django modules
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+# React modules
+from business.exports import contracts_to_export, contract_rows, iter_csv
+
+
+class Command(BaseCommand):
+    help = 'Exports the contracts as CSV.'
+    option_list = BaseCommand.option_list + (
+        make_option('--start', dest='start',
+                    help='Only contracts ending on or after this date.'),
+        make_option('--end', dest='end',
+                    help='Only contracts starting on or before this date.'),
+        make_option('--actor', dest='actor',
+                    help='Only contracts of this actor (username).'),
+        make_option('--company', dest='company',
+                    help='Only contracts of clients of this company.'),
+        make_option('-o', '--output', dest='output',
+                    help='Output file (default: standard output).'),
+    )
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ('start', 'end'):
+            if options[name]:
+                try:
+                    dates[name] = parse_date(options[name])
+                except ValueError:
+                    dates[name] = None
+                if dates[name] is None:
+                    raise CommandError(
+                        'Invalid %s date: %s' % (name, options[name]))
+        contracts = contracts_to_export(
+            actor=options['actor'],
+            company=options['company'],
+            **dates
+        )
+        lines = iter_csv(contract_rows(contracts))
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for line in lines:
+                    output.write(line)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
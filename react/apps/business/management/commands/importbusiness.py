@@ -0,0 +1,39 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+from optparse import make_option
+# Django modules
+from django.core.management.base import BaseCommand, CommandError
+# React modules
+from business.importers import IMPORTERS, read_records
+
+
+class Command(BaseCommand):
+    args = '<%s> <path>' % '|'.join(sorted(IMPORTERS))
+    help = ('Imports companies, contacts or contracts from a CSV file with '
+            'a header row or from a JSON lines file.')
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', type='int', dest='batch_size',
+                    default=500,
+                    help='Number of records written per transaction '
+                         '(default: 500).'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 2:
+            raise CommandError('Usage: importbusiness %s' % self.args)
+        kind, path = args
+        if kind not in IMPORTERS:
+            raise CommandError('Unknown record type: %s' % kind)
+        if options['batch_size'] < 1:
+            raise CommandError('The batch size must be positive.')
+        importer = IMPORTERS[kind](
+            batch_size=options['batch_size'],
+            on_error=self.report_error
+        ).run(read_records(path))
+        self.stdout.write(u'%d created, %d rejected' % (
+            importer.created, importer.rejected))
+
+    def report_error(self, line, errors):
+        for field, messages in sorted(errors.items()):
+            for message in messages:
+                self.stderr.write(u'line %d: %s: %s' % (line, field, message))
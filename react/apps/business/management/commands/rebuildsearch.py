@@ -0,0 +1,16 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.db import transaction
+from django.core.management.base import NoArgsCommand
+# React modules
+from business import search
+from business.models import Contact
+
+
+class Command(NoArgsCommand):
+    help = 'Rebuilds the full-text search index of the contacts.'
+
+    def handle_noargs(self, **options):
+        with transaction.atomic():
+            search.rebuild()
+        self.stdout.write(u'%d contacts indexed' % Contact.objects.count())
@@ -0,0 +1,47 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import os
+import sys
+import json
+import subprocess
+from optparse import make_option
+# Django modules
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILE_SCRIPT = (
+    'import json, react.warmup; '
+    'print(json.dumps(react.warmup.profile_startup()))'
+)
+
+
+class Command(BaseCommand):
+    help = ('Starts the project in a fresh Python process and reports the '
+            'time spent in each startup and warm-up phase.')
+    option_list = BaseCommand.option_list + (
+        make_option('--repeat', type='int', dest='repeat', default=1,
+                    help='Number of processes started, the fastest time '
+                         'of each phase being reported (default: 1).'),
+    )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('At least one process is required.')
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = settings.SETTINGS_MODULE
+        env['PYTHONPATH'] = os.pathsep.join(
+            path for path in sys.path if path)
+        runs = []
+        for i in range(options['repeat']):
+            try:
+                output = subprocess.check_output(
+                    [sys.executable, '-c', PROFILE_SCRIPT], env=env)
+            except subprocess.CalledProcessError as e:
+                raise CommandError('The profiled process failed: %s' % e)
+            runs.append(json.loads(output.splitlines()[-1]))
+        total = 0.0
+        for i, (name, seconds) in enumerate(runs[0]):
+            best = min(run[i][1] for run in runs)
+            total += best
+            self.stdout.write(u'%-18s %9.1fms' % (name, best * 1000))
+        self.stdout.write(u'%-18s %9.1fms' % (u'total', total * 1000))
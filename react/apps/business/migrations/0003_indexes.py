@@ -0,0 +1,41 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0002_contract'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contact',
+            name='company',
+            field=models.ForeignKey(related_name='contacts', verbose_name='company', to='business.Company'),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='contract',
+            name='actor',
+            field=models.ForeignKey(related_name='contracts', verbose_name='actor', to=settings.AUTH_USER_MODEL),
+            preserve_default=True,
+        ),
+        migrations.AlterField(
+            model_name='contract',
+            name='client',
+            field=models.ForeignKey(related_name='owned_contracts', verbose_name='client', to='business.Contact'),
+            preserve_default=True,
+        ),
+        migrations.AlterIndexTogether(
+            name='contact',
+            index_together=set([('company', 'last_name')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='contract',
+            index_together=set([('actor', 'start'), ('client', 'start'), ('start', 'end')]),
+        ),
+    ]
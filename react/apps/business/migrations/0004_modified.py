@@ -0,0 +1,33 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='modified', auto_now=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='modified', auto_now=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='contract',
+            name='modified',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='modified', auto_now=True),
+            preserve_default=False,
+        ),
+    ]
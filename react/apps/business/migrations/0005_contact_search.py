@@ -0,0 +1,57 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+def has_fts5(connection):
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA compile_options')
+    return 'ENABLE_FTS5' in [option for option, in cursor.fetchall()]
+
+
+def create_index(apps, schema_editor):
+    # Frozen copy of the search index of this migration: the business.search
+    # module may change afterwards
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE business_contact_search (contact_id integer "
+            "PRIMARY KEY REFERENCES business_contact (id) ON DELETE CASCADE "
+            "DEFERRABLE INITIALLY DEFERRED, document tsvector NOT NULL)")
+        schema_editor.execute(
+            "CREATE INDEX business_contact_search_document "
+            "ON business_contact_search USING GIN (document)")
+        schema_editor.execute(
+            "INSERT INTO business_contact_search (contact_id, document) "
+            "SELECT c.id, to_tsvector('simple', concat_ws(' ', "
+            "c.first_name, c.last_name, c.email, "
+            "translate(c.email, '@.-_+', '     '), co.name)) "
+            "FROM business_contact c "
+            "INNER JOIN business_company co ON c.company_id = co.id")
+    elif connection.vendor == 'sqlite' and has_fts5(connection):
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE business_contact_search USING "
+            "fts5(first_name, last_name, email, company, "
+            "tokenize='unicode61 remove_diacritics 2')")
+        schema_editor.execute(
+            "INSERT INTO business_contact_search "
+            "(rowid, first_name, last_name, email, company) "
+            "SELECT c.id, c.first_name, c.last_name, c.email, co.name "
+            "FROM business_contact c "
+            "INNER JOIN business_company co ON c.company_id = co.id")
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute('DROP TABLE IF EXISTS business_contact_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('business', '0004_modified'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
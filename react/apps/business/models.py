@@ -4,10 +4,16 @@ from django.db import models
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ValidationError
+# React modules
+from parameters.workingdays import (
+    count_working_days,
+    bulk_count_working_days
+)
 
 
 class Company(models.Model):
     name = models.CharField(_(u'name'), max_length='255', unique=True)
+    modified = models.DateTimeField(_(u'modified'), auto_now=True)
 
     class Meta:
         verbose_name = _(u'Company')
@@ -23,18 +29,51 @@ class Contact(models.Model):
     email = models.EmailField(_(u'email'), unique=True)
     company = models.ForeignKey(
         Company, verbose_name=_(u'company'), related_name=u'contacts')
+    modified = models.DateTimeField(_(u'modified'), auto_now=True)
 
     class Meta:
         verbose_name = _(u'Contact')
         verbose_name_plural = _(u'Contacts')
+        index_together = [
+            ('company', 'last_name'),
+        ]
 
     def __unicode__(self):
         return u'%s %s' % (self.first_name, self.last_name)
 
     def save(self, *args, **kwargs):
+        self.normalize()
+        super(Contact, self).save(*args, **kwargs)
+
+    def normalize(self):
+        """
+        Normalises the case of the first and last names.
+        """
         self.first_name = self.first_name.title()
         self.last_name = self.last_name.upper()
-        super(Contact, self).save(*args, **kwargs)
+
+
+class ContractQuerySet(models.QuerySet):
+    def working_days(self):
+        """
+        Returns a dictionary mapping the primary key of each contract to
+        the number of working days between its start and end dates.
+
+        Only the needed columns are fetched and all the counts are
+        computed in one pass.
+        """
+        rows = list(self.values_list('pk', 'start', 'end'))
+        if not rows:
+            return {}
+        pks, starts, ends = zip(*rows)
+        return dict(zip(pks, bulk_count_working_days(starts, ends)))
+
+    def with_consumption(self):
+        """
+        Annotates the contracts with the number of days consumed, summed
+        from the monthly consumption rollups of the activity app.
+        """
+        return self.annotate(consumed_days=models.Sum('consumptions__days'))
 
 
 class Contract(models.Model):
@@ -48,14 +87,34 @@ class Contract(models.Model):
     actor = models.ForeignKey(settings.AUTH_USER_MODEL,
                               verbose_name=_(u'actor'),
                               related_name=u'contracts')
+    modified = models.DateTimeField(_(u'modified'), auto_now=True)
+
+    objects = ContractQuerySet.as_manager()
 
     class Meta:
         verbose_name = _('Contract')
         verbose_name_plural = _('Contracts')
+        index_together = [
+            ('actor', 'start'),
+            ('client', 'start'),
+            ('start', 'end'),
+        ]
 
     def __unicode__(self):
         return u'%s' % self.name
 
+    @property
+    def remaining_days(self):
+        """
+        Number of days not consumed yet, read from the consumed_days
+        annotation when the contract was fetched with_consumption().
+        """
+        consumed = getattr(self, 'consumed_days', None)
+        if consumed is None and not hasattr(self, 'consumed_days'):
+            consumed = self.consumptions.aggregate(
+                total=models.Sum('days'))['total']
+        return self.days - (consumed or 0)
+
     def clean(self):
         if self.days is not None:
             if self.days < 0:
@@ -65,13 +124,10 @@ class Contract(models.Model):
             if self.start > self.end:
                 raise ValidationError(
                     _(u'Start date must be less or equal to end date.'))
-            else:
-                max_days = 1
-                if self.start != self.end:
-                    delta = self.end - self.start
-                    max_days = delta.days
+            elif self.days is not None:
+                max_days = count_working_days(self.start, self.end)
                 if self.days > max_days:
                     raise ValidationError(
-                        _(u'Number of days must be must be less or equal to '
-                          u'the maximum delta in days between start '
+                        _(u'Number of days must be less or equal to the '
+                          u'number of working days between start and '
                           u'end dates.'))
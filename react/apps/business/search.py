@@ -0,0 +1,281 @@
+# -*- coding: utf8 -*-
+"""
+Full-text search over the contacts, by first name, last name, email and
+company name.
+
+The index is a SQLite FTS5 virtual table, or a table of tsvector
+documents with a GIN index on PostgreSQL, whose rows are keyed by contact
+id. It is filled with INSERT ... SELECT statements, kept in sync by the
+signal receivers of the business app, and rebuilt in bulk by the
+rebuildsearch command. Other databases, and databases whose index was
+never created, fall back to prefix lookups on the contact columns.
+"""
+# Built-in modules
+import re
+# Django modules
+from django.db import connection
+from django.db.models import Q
+# React modules
+from business.models import Contact
+
+INDEX_TABLE = 'business_contact_search'
+
+# Maximum number of ids of a single IN lookup, kept under the SQLite
+# limit of 999 parameters per statement.
+IN_LOOKUP_SIZE = 500
+
+TERM_REGEX = re.compile(r'\w+', re.UNICODE)
+
+
+def terms(query):
+    """
+    Returns the words of a search query.
+    """
+    return TERM_REGEX.findall(query)
+
+
+class SearchBackend(object):
+    """
+    Prefix lookups on the contact columns, used when the database has no
+    full-text index.
+    """
+
+    def create(self, cursor):
+        pass
+
+    def drop(self, cursor):
+        pass
+
+    def populate(self, cursor, where=u'', params=()):
+        pass
+
+    def remove(self, cursor, pks):
+        pass
+
+    def filter(self, queryset, query):
+        for term in terms(query):
+            queryset = queryset.filter(
+                Q(first_name__istartswith=term) |
+                Q(last_name__istartswith=term) |
+                Q(email__istartswith=term) |
+                Q(company__name__istartswith=term))
+        return queryset
+
+    def search(self, cursor, query, limit):
+        return list(self.filter(Contact.objects.all(), query).order_by(
+            'last_name', 'first_name', 'pk').values_list(
+                'pk', flat=True)[:limit])
+
+
+class SQLiteBackend(SearchBackend):
+
+    def create(self, cursor):
+        cursor.execute(
+            "CREATE VIRTUAL TABLE %s USING fts5(first_name, last_name, "
+            "email, company, tokenize='unicode61 remove_diacritics 2')"
+            % INDEX_TABLE)
+
+    def drop(self, cursor):
+        cursor.execute('DROP TABLE IF EXISTS %s' % INDEX_TABLE)
+
+    def populate(self, cursor, where=u'', params=()):
+        cursor.execute(
+            'INSERT INTO %s (rowid, first_name, last_name, email, company) '
+            'SELECT c.id, c.first_name, c.last_name, c.email, co.name '
+            'FROM business_contact c '
+            'INNER JOIN business_company co ON c.company_id = co.id %s'
+            % (INDEX_TABLE, where), params)
+
+    def remove(self, cursor, pks):
+        cursor.execute('DELETE FROM %s WHERE rowid IN (%s)' % (
+            INDEX_TABLE, u', '.join([u'%s'] * len(pks))), pks)
+
+    def match(self, query):
+        # Quoted prefixes, so that the terms are not read as FTS5 syntax
+        return u' '.join(u'"%s"*' % term for term in terms(query))
+
+    def filter(self, queryset, query):
+        if not terms(query):
+            return queryset
+        return queryset.extra(
+            where=['"business_contact"."id" IN (SELECT rowid FROM %s '
+                   'WHERE %s MATCH %%s)' % (INDEX_TABLE, INDEX_TABLE)],
+            params=[self.match(query)])
+
+    def search(self, cursor, query, limit):
+        if not terms(query):
+            return []
+        cursor.execute(
+            'SELECT rowid FROM %s WHERE %s MATCH %%s ORDER BY rank, rowid '
+            'LIMIT %%s' % (INDEX_TABLE, INDEX_TABLE),
+            [self.match(query), limit])
+        return [pk for pk, in cursor.fetchall()]
+
+
+class PostgreSQLBackend(SearchBackend):
+
+    def create(self, cursor):
+        cursor.execute(
+            'CREATE TABLE %s (contact_id integer PRIMARY KEY REFERENCES '
+            'business_contact (id) ON DELETE CASCADE DEFERRABLE INITIALLY '
+            'DEFERRED, document tsvector NOT NULL)' % INDEX_TABLE)
+        cursor.execute('CREATE INDEX %s_document ON %s USING GIN (document)'
+                       % (INDEX_TABLE, INDEX_TABLE))
+
+    def drop(self, cursor):
+        cursor.execute('DROP TABLE IF EXISTS %s' % INDEX_TABLE)
+
+    def populate(self, cursor, where=u'', params=()):
+        # Emails are also indexed split on their punctuation, the parser
+        # keeping them whole otherwise
+        cursor.execute(
+            "INSERT INTO %s (contact_id, document) "
+            "SELECT c.id, to_tsvector('simple', concat_ws(' ', "
+            "c.first_name, c.last_name, c.email, "
+            "translate(c.email, '@.-_+', '     '), co.name)) "
+            "FROM business_contact c "
+            "INNER JOIN business_company co ON c.company_id = co.id %s"
+            % (INDEX_TABLE, where), params)
+
+    def remove(self, cursor, pks):
+        cursor.execute('DELETE FROM %s WHERE contact_id IN (%s)' % (
+            INDEX_TABLE, u', '.join([u'%s'] * len(pks))), pks)
+
+    def match(self, query):
+        return u' & '.join(u'%s:*' % term for term in terms(query))
+
+    def filter(self, queryset, query):
+        if not terms(query):
+            return queryset
+        return queryset.extra(
+            where=['"business_contact"."id" IN (SELECT contact_id FROM %s '
+                   "WHERE document @@ to_tsquery('simple', %%s))"
+                   % INDEX_TABLE],
+            params=[self.match(query)])
+
+    def search(self, cursor, query, limit):
+        if not terms(query):
+            return []
+        cursor.execute(
+            "SELECT contact_id FROM %s, to_tsquery('simple', %%s) query "
+            "WHERE document @@ query "
+            "ORDER BY ts_rank(document, query) DESC, contact_id LIMIT %%s"
+            % INDEX_TABLE, [self.match(query), limit])
+        return [pk for pk, in cursor.fetchall()]
+
+
+def has_fts5(connection):
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA compile_options')
+    return 'ENABLE_FTS5' in [option for option, in cursor.fetchall()]
+
+
+def backend_for(connection):
+    """
+    Returns the search backend suited to the given database connection.
+    """
+    if connection.vendor == 'postgresql':
+        return PostgreSQLBackend()
+    if connection.vendor == 'sqlite' and has_fts5(connection):
+        return SQLiteBackend()
+    return SearchBackend()
+
+
+def index_backend_for(connection):
+    """
+    Returns the search backend of the index of the given database
+    connection, which may have been migrated without FTS5 support or with
+    another SQLite library.
+    """
+    if INDEX_TABLE not in connection.introspection.table_names():
+        return SearchBackend()
+    return backend_for(connection)
+
+
+_backends = {}
+
+
+def backend():
+    try:
+        return _backends[connection.alias]
+    except KeyError:
+        _backends[connection.alias] = index_backend_for(connection)
+        return _backends[connection.alias]
+
+
+def index_contacts(pks):
+    """
+    Indexes or reindexes the contacts of the given primary keys.
+    """
+    pks = list(pks)
+    cursor = connection.cursor()
+    for i in range(0, len(pks), IN_LOOKUP_SIZE):
+        batch = pks[i:i + IN_LOOKUP_SIZE]
+        backend().remove(cursor, batch)
+        backend().populate(
+            cursor, u'WHERE c.id IN (%s)' % u', '.join([u'%s'] * len(batch)),
+            batch)
+
+
+def index_new_contacts(emails):
+    """
+    Indexes the contacts of the given emails, which must not be indexed
+    yet, such as contacts created by bulk_create().
+    """
+    emails = list(emails)
+    cursor = connection.cursor()
+    for i in range(0, len(emails), IN_LOOKUP_SIZE):
+        batch = emails[i:i + IN_LOOKUP_SIZE]
+        backend().populate(
+            cursor,
+            u'WHERE c.email IN (%s)' % u', '.join([u'%s'] * len(batch)),
+            batch)
+
+
+def index_company(pk):
+    """
+    Reindexes the contacts of the company of the given primary key.
+    """
+    index_contacts(Contact.objects.filter(
+        company=pk).values_list('pk', flat=True))
+
+
+def remove_contacts(pks):
+    """
+    Removes the contacts of the given primary keys from the index.
+    """
+    pks = list(pks)
+    cursor = connection.cursor()
+    for i in range(0, len(pks), IN_LOOKUP_SIZE):
+        backend().remove(cursor, pks[i:i + IN_LOOKUP_SIZE])
+
+
+def rebuild():
+    """
+    Rebuilds the whole index from the contacts.
+    """
+    cursor = connection.cursor()
+    # Creates the index if the database now supports it
+    supported = backend_for(connection)
+    supported.drop(cursor)
+    supported.create(cursor)
+    supported.populate(cursor)
+    _backends[connection.alias] = supported
+
+
+def filter_contacts(queryset, query):
+    """
+    Returns the contacts of the queryset matching every word of the query
+    as a prefix.
+    """
+    return backend().filter(queryset, query)
+
+
+def search_contacts(query, limit=20):
+    """
+    Returns the contacts matching every word of the query as a prefix,
+    the most relevant first.
+    """
+    pks = backend().search(connection.cursor(), query, limit)
+    contacts = Contact.objects.select_related('company').in_bulk(pks)
+    return [contacts[pk] for pk in pks if pk in contacts]
@@ -0,0 +1,42 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+# React modules
+from business.models import Company, Contact, Contract
+from business import search
+from business.capacity import capacity_planner
+
+
+@receiver(post_save, sender=Contract)
+@receiver(post_delete, sender=Contract)
+def update_capacity_planner(sender, instance, **kwargs):
+    """
+    Drops the workloads affected by a contract change.
+    """
+    capacity_planner.contract_changed(instance)
+
+
+@receiver(post_save, sender=Contact)
+def index_contact(sender, instance, **kwargs):
+    """
+    Indexes a saved contact for the full-text search.
+    """
+    search.index_contacts([instance.pk])
+
+
+@receiver(post_delete, sender=Contact)
+def remove_contact(sender, instance, **kwargs):
+    """
+    Removes a deleted contact from the full-text search index.
+    """
+    search.remove_contacts([instance.pk])
+
+
+@receiver(post_save, sender=Company)
+def index_company(sender, instance, created, **kwargs):
+    """
+    Reindexes the contacts of a renamed company.
+    """
+    if not created:
+        search.index_company(instance.pk)
@@ -0,0 +1,94 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import random
+import datetime
+# Django modules
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+# React modules
+from business.models import (
+    Company,
+    Contact,
+    Contract
+)
+from business import search
+from parameters.models import FixedHoliday, NonFixedHoliday
+
+
+def seed(companies=10, contacts=100, contracts=1000, actors=10,
+         first_year=2010, years=5, seed=0, batch_size=500):
+    """
+    Creates synthetic actors, companies, contacts and contracts with
+    bulk_create(), contracts being spread over the given years.
+    """
+    rand = random.Random(seed)
+    user_model = get_user_model()
+    password = make_password(None)
+    user_model.objects.bulk_create([
+        user_model(**{
+            user_model.USERNAME_FIELD: 'actor%d' % i,
+            'password': password,
+        }) for i in range(actors)
+    ], batch_size=batch_size)
+    actor_ids = list(user_model.objects.filter(**{
+        '%s__startswith' % user_model.USERNAME_FIELD: 'actor'
+    }).values_list('pk', flat=True))
+
+    Company.objects.bulk_create([
+        Company(name=u'Company %d' % i) for i in range(companies)
+    ], batch_size=batch_size)
+    company_ids = list(Company.objects.values_list('pk', flat=True))
+
+    Contact.objects.bulk_create([
+        Contact(
+            first_name=u'First%d' % i,
+            last_name=u'LAST%d' % rand.randint(0, contacts),
+            email=u'contact%d@example.org' % i,
+            company_id=rand.choice(company_ids)
+        ) for i in range(contacts)
+    ], batch_size=batch_size)
+    contact_ids = list(Contact.objects.values_list('pk', flat=True))
+    search.rebuild()
+
+    origin = datetime.date(first_year, 1, 1)
+    span = years * 365
+    instances = []
+    for i in range(contracts):
+        start = origin + datetime.timedelta(days=rand.randint(0, span))
+        end = start + datetime.timedelta(days=rand.randint(0, 120))
+        instances.append(Contract(
+            name=u'Contract %d' % i,
+            client_id=rand.choice(contact_ids),
+            start=start,
+            end=end,
+            days=rand.randint(1, 20),
+            actor_id=rand.choice(actor_ids)
+        ))
+        if len(instances) >= batch_size:
+            Contract.objects.bulk_create(instances)
+            instances = []
+    Contract.objects.bulk_create(instances)
+
+
+def seed_holidays(fixed=10, first_year=2010, years=5, per_year=3, seed=0):
+    """
+    Creates synthetic fixed holidays and `per_year` non fixed holidays in
+    each of the given years.
+
+    Holidays are saved one by one, as their kind and ordinal are set by
+    save().
+    """
+    rand = random.Random(seed)
+    days = rand.sample(range(365), fixed)
+    origin = datetime.date(2001, 1, 1)
+    for i, day in enumerate(days):
+        FixedHoliday.objects.create(
+            name=u'Fixed %d' % i,
+            date=(origin + datetime.timedelta(days=day)).strftime('%d/%m')
+        )
+    for year in range(first_year, first_year + years):
+        for day in rand.sample(range(365), per_year):
+            NonFixedHoliday.objects.create(
+                name=u'Non fixed %d' % year,
+                date=datetime.date(year, 1, 1) + datetime.timedelta(days=day)
+            )
@@ -0,0 +1,44 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import os
+# React modules
+from business.importers import IMPORTERS, parse_records
+from jobs.models import Job
+
+
+def enqueue_import(kind, path, batch_size=500, priority=0):
+    """
+    Queues the import of a file of records.
+
+    Imports are not retried: the batches committed before a failure would
+    be imported again, and contracts have no unique field to reject them.
+    """
+    return Job.objects.enqueue('business.tasks.import_records',
+                               priority=priority, max_attempts=1,
+                               kind=kind, path=path, batch_size=batch_size)
+
+
+def import_records(job, kind, path, batch_size=500):
+    """
+    Imports the records of a CSV or JSON lines file, reporting the
+    progress after each batch, and returns the import summary.
+
+    The file is read batch by batch, the progress being its position.
+    """
+    if job.attempts > 1:
+        raise RuntimeError(
+            u'Imports are not retried, the batches of the previous attempt '
+            u'may already be committed.')
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        importer = IMPORTERS[kind](
+            batch_size=batch_size,
+            on_batch=lambda: job.set_progress(f.tell(), size))
+        importer.run(parse_records(f, path.lower().endswith('.csv')))
+    summary = u'%d created, %d rejected' % (
+        importer.created, importer.rejected)
+    for line, errors in importer.errors:
+        for field, messages in sorted(errors.items()):
+            for message in messages:
+                summary += u'\nline %d: %s: %s' % (line, field, message)
+    return summary
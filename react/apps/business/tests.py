@@ -1,17 +1,34 @@
 # -*- coding: utf8 -*-
 # Built-in modules
+import os
+import json
+import shutil
 import datetime
+import tempfile
+from StringIO import StringIO
 # Django modules
 from django.test import TestCase
-from django.db import IntegrityError
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.urlresolvers import reverse
+from django.db import IntegrityError, connection
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
 # React modules
+from react import versions
 from business.models import (
     Company,
     Contact,
     Contract
 )
+from business import bench, search
+from business.capacity import capacity_planner
+from business.exports import contracts_to_export, contract_rows
+from business.importers import ContactImporter, ContractImporter
+from parameters.models import FixedHoliday
+from parameters.cache import holiday_calendar
+from parameters.workingdays import count_working_days
 
 
 class CompanyModelTest(TestCase):
@@ -203,6 +220,7 @@ class ContactModelTest(TestCase):
 class ContractModelTest(TestCase):
 
     def setUp(self):
+        holiday_calendar.invalidate()
         company = Company.objects.create(
             name=u'SSII'
         )
@@ -403,3 +421,859 @@ class ContractModelTest(TestCase):
             Contract.objects.get,
             pk=1
         )
+
+    def test_k_contract_number_of_days_excludes_non_working_days(self):
+        """
+        Tests that the number of days cannot exceed the number of
+        working days between start and end dates.
+        """
+        contract = Contract(
+            name='test',
+            client=Contact.objects.get(email=u'john.doe@ssii.org'),
+            start=datetime.date(2014, 1, 1),
+            end=datetime.date(2014, 1, 31),
+            days=23,
+            actor=get_user_model().objects.get(username='Test')
+        )
+        contract.full_clean()
+        contract.days = 24
+        self.assertRaises(
+            ValidationError,
+            Contract.full_clean,
+            contract
+        )
+        FixedHoliday.objects.create(
+            name=u'Nouvel An',
+            date=u'01/01'
+        )
+        contract.days = 23
+        self.assertRaises(
+            ValidationError,
+            Contract.full_clean,
+            contract
+        )
+        contract.days = 22
+        contract.full_clean()
+
+    def test_l_working_days_are_computed_in_bulk(self):
+        """
+        Tests that the working days of many contracts are computed in one
+        pass and match the per-contract computation.
+        """
+        FixedHoliday.objects.create(
+            name=u'Nouvel An',
+            date=u'01/01'
+        )
+        for month in range(1, 13):
+            Contract.objects.create(
+                name='test %d' % month,
+                client=Contact.objects.get(email=u'john.doe@ssii.org'),
+                start=datetime.date(2014, month, 1),
+                end=datetime.date(2015, month, 15),
+                days=10,
+                actor=get_user_model().objects.get(username='Test')
+            )
+        holiday_calendar.holidays_for_year(2014)
+        holiday_calendar.holidays_for_year(2015)
+        with self.assertNumQueries(1):
+            working_days = Contract.objects.all().working_days()
+        self.assertEqual(len(working_days), 13)
+        for contract in Contract.objects.all():
+            self.assertEqual(
+                working_days[contract.pk],
+                count_working_days(contract.start, contract.end)
+            )
+        self.assertEqual(
+            Contract.objects.none().working_days(),
+            {}
+        )
+
+
+class ImportTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        self.directory = tempfile.mkdtemp()
+        get_user_model().objects.create_user(
+            username='Test',
+            password='test'
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(content.encode('utf8'))
+        return path
+
+    def call(self, *args, **options):
+        stdout = StringIO()
+        stderr = StringIO()
+        call_command('importbusiness', *args, stdout=stdout, stderr=stderr,
+                     **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_a_records_are_imported_from_csv_and_json_lines(self):
+        """
+        Tests that companies, contacts and contracts are imported with
+        their foreign keys resolved and their names normalised.
+        """
+        out, err = self.call('company', self.write(
+            'companies.csv', u'name\nSSII\nGREEN Conseil\n'))
+        self.assertIn(u'2 created, 0 rejected', out)
+        out, err = self.call('contact', self.write(
+            'contacts.jsonl',
+            u'{"first_name": "john", "last_name": "doe", '
+            u'"email": "john.doe@ssii.org", "company": "SSII"}\n'
+            u'{"first_name": "émile", "last_name": "zola", '
+            u'"email": "emile.zola@green.org", "company": "GREEN Conseil"}\n'))
+        self.assertIn(u'2 created, 0 rejected', out)
+        contact = Contact.objects.get(email=u'emile.zola@green.org')
+        self.assertEqual(contact.first_name, u'Émile')
+        self.assertEqual(contact.last_name, u'ZOLA')
+        self.assertEqual(contact.company.name, u'GREEN Conseil')
+        out, err = self.call('contract', self.write(
+            'contracts.csv',
+            u'name,client,actor,start,end,days\n'
+            u'Audit,john.doe@ssii.org,Test,2014-01-01,2014-01-31,10\n'))
+        self.assertIn(u'1 created, 0 rejected', out)
+        contract = Contract.objects.get(name=u'Audit')
+        self.assertEqual(contract.client, Contact.objects.get(
+            email=u'john.doe@ssii.org'))
+        self.assertEqual(contract.start, datetime.date(2014, 1, 1))
+
+    def test_b_invalid_records_are_reported_and_skipped(self):
+        """
+        Tests that records breaking the model rules, referencing unknown
+        objects or duplicating unique values are rejected.
+        """
+        Company.objects.create(name=u'SSII')
+        out, err = self.call('company', self.write(
+            'companies.csv', u'name\nSSII\nGREEN\nGREEN\n\n'))
+        self.assertIn(u'1 created, 2 rejected', out)
+        self.assertIn(u'line 2: name:', err)
+        self.assertIn(u'line 4: name:', err)
+        out, err = self.call('contact', self.write(
+            'contacts.csv',
+            u'first_name,last_name,email,company\n'
+            u'John,Doe,john.doe@ssii.org,SSII\n'
+            u'Tee,Shirt,not an email,SSII\n'
+            u'Tee,Shirt,tee.shirt@ssii.org,Unknown\n'))
+        self.assertIn(u'1 created, 2 rejected', out)
+        self.assertIn(u'line 3: email:', err)
+        self.assertIn(u'line 4: company:', err)
+        out, err = self.call('contract', self.write(
+            'contracts.csv',
+            u'name,client,actor,start,end,days\n'
+            u'Audit,john.doe@ssii.org,Test,2014-01-31,2014-01-01,10\n'
+            u'Audit,john.doe@ssii.org,Test,2014-01-01,2014-01-31,30\n'
+            u'Audit,john.doe@ssii.org,Nobody,2014-01-01,2014-01-31,10\n'))
+        self.assertIn(u'0 created, 3 rejected', out)
+        self.assertIn(u'line 2: __all__:', err)
+        self.assertIn(u'line 3: __all__:', err)
+        self.assertIn(u'line 4: actor:', err)
+        self.assertFalse(Contract.objects.exists())
+
+    def test_c_query_count_depends_on_batches_not_records(self):
+        """
+        Tests that importing a batch costs the same number of queries
+        whatever the number of records it contains.
+        """
+        Company.objects.create(name=u'SSII')
+
+        def records(first, count):
+            for i in range(first, first + count):
+                yield i, {
+                    u'first_name': u'john',
+                    u'last_name': u'doe %d' % i,
+                    u'email': u'john.doe.%d@ssii.org' % i,
+                    u'company': u'SSII',
+                }
+
+        # Including the full-text indexing of the batch
+        with self.assertNumQueries(6):
+            importer = ContactImporter(batch_size=100).run(records(0, 10))
+        self.assertEqual(importer.created, 10)
+        with self.assertNumQueries(6):
+            importer = ContactImporter(batch_size=100).run(records(10, 90))
+        self.assertEqual(importer.created, 90)
+        self.assertEqual(Contact.objects.count(), 100)
+
+
+class ExportTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        user_model = get_user_model()
+        self.admin = user_model.objects.create_superuser(
+            username='admin',
+            email='admin@ssii.org',
+            password='admin'
+        )
+        actor = user_model.objects.create_user(
+            username='Test',
+            password='test'
+        )
+        for name in (u'SSII', u'GREEN'):
+            company = Company.objects.create(
+                name=name
+            )
+            client = Contact.objects.create(
+                first_name=u'john',
+                last_name=name,
+                email=u'john.doe@%s.org' % name.lower(),
+                company=company
+            )
+            for month in range(1, 4):
+                Contract.objects.create(
+                    name=u'%s %d' % (name, month),
+                    client=client,
+                    start=datetime.date(2014, month, 1),
+                    end=datetime.date(2014, month, 20),
+                    days=5,
+                    actor=month == 3 and self.admin or actor
+                )
+
+    def test_a_contracts_are_streamed_as_csv(self):
+        """
+        Tests that the export view streams every contract with a single
+        query for the contracts and their related objects.
+        """
+        self.client.login(username='admin', password='admin')
+        response = self.client.get(reverse('business_export_contracts'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(
+            lines[1],
+            b'1,SSII 1,SSII,John SSII,john.doe@ssii.org,Test,'
+            b'2014-01-01,2014-01-20,5.00'
+        )
+
+    def test_b_contracts_can_be_filtered(self):
+        """
+        Tests that exported contracts can be filtered by dates, actor and
+        company.
+        """
+        self.client.login(username='admin', password='admin')
+        url = reverse('business_export_contracts')
+        response = self.client.get(url, {
+            'start': '2014-02-10',
+            'end': '2014-03-01',
+            'company': 'GREEN',
+        })
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(
+            [line.split(b',')[1] for line in lines[1:]],
+            [b'GREEN 2', b'GREEN 3']
+        )
+        response = self.client.get(url, {'actor': 'admin'})
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual(
+            [line.split(b',')[1] for line in lines[1:]],
+            [b'SSII 3', b'GREEN 3']
+        )
+        response = self.client.get(url, {'start': '2014-13-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_c_export_requires_permission(self):
+        """
+        Tests that only users allowed to change contracts can export them.
+        """
+        self.client.login(username='Test', password='test')
+        response = self.client.get(reverse('business_export_contracts'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_d_contracts_are_exported_by_command(self):
+        """
+        Tests that the export command writes the filtered contracts.
+        """
+        stdout = StringIO()
+        call_command('exportcontracts', actor='Test', company='SSII',
+                     stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(
+            [line.split(b',')[1] for line in lines[1:]],
+            [b'SSII 1', b'SSII 2']
+        )
+
+    def test_e_contracts_are_fetched_by_chunks(self):
+        """
+        Tests that exported contracts are fetched by chunks seeking after
+        the previous one, contracts starting the same day included.
+        """
+        contracts = contracts_to_export()
+        with self.assertNumQueries(1):
+            rows = list(contract_rows(contracts))
+        with self.assertNumQueries(4):
+            self.assertEqual(
+                list(contract_rows(contracts, chunk_size=2)),
+                rows
+            )
+        self.assertEqual(
+            [row[1] for row in rows[1:]],
+            [u'SSII 1', u'GREEN 1', u'SSII 2', u'GREEN 2',
+             u'SSII 3', u'GREEN 3']
+        )
+
+
+class ApiTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        user_model = get_user_model()
+        user_model.objects.create_superuser(
+            username='admin',
+            email='admin@ssii.org',
+            password='admin'
+        )
+        actor = user_model.objects.create_user(
+            username='Test',
+            password='test'
+        )
+        for name in (u'SSII', u'GREEN'):
+            company = Company.objects.create(
+                name=name
+            )
+            client = Contact.objects.create(
+                first_name=u'john',
+                last_name=name,
+                email=u'john.doe@%s.org' % name.lower(),
+                company=company
+            )
+            # Contracts sharing their start date are ordered by id
+            for month in (3, 1, 2, 1):
+                Contract.objects.create(
+                    name=u'%s %d' % (name, month),
+                    client=client,
+                    start=datetime.date(2014, month, 1),
+                    end=datetime.date(2014, month, 20),
+                    days=5,
+                    actor=actor
+                )
+        self.client.login(username='admin', password='admin')
+
+    def test_a_contracts_are_paginated_by_start_and_id(self):
+        """
+        Tests that contract pages follow each other by start date and id,
+        with a single query per page besides authentication.
+        """
+        url = reverse('business_api_contracts')
+        params = {'limit': 3, 'fields': 'id,start'}
+        pages = []
+        while url is not None:
+            # Session and user, then the page
+            with self.assertNumQueries(3):
+                response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            page = json.loads(response.content)
+            pages.append([(row['start'], row['id'])
+                          for row in page['results']])
+            url, params = page['next'], {}
+        self.assertEqual([len(page) for page in pages], [3, 3, 2])
+        self.assertEqual(
+            sum(pages, []),
+            [(unicode(start), pk) for start, pk in
+             Contract.objects.order_by('start', 'id').values_list(
+                 'start', 'id')]
+        )
+
+    def test_b_fields_can_be_selected(self):
+        """
+        Tests that only the requested fields are returned and that related
+        objects are fetched with the contracts.
+        """
+        url = reverse('business_api_contracts')
+        with self.assertNumQueries(3):
+            response = self.client.get(url, {'limit': 1})
+        self.assertEqual(json.loads(response.content)['results'], [{
+            'id': 2,
+            'name': u'SSII 1',
+            'start': u'2014-01-01',
+            'end': u'2014-01-20',
+            'days': u'5',
+            'client_id': 1,
+            'client': u'john.doe@ssii.org',
+            'company': u'SSII',
+            'actor': u'Test',
+            'modified': json.loads(response.content)['results'][0][
+                'modified'],
+        }])
+        response = self.client.get(url, {'fields': 'name,company'})
+        self.assertEqual(
+            set(json.loads(response.content)['results'][0]),
+            set(['name', 'company'])
+        )
+        for params in ({'fields': 'name,password'}, {'limit': 0},
+                       {'limit': 'a'}, {'after': '2014-01-01'},
+                       {'after': '2014-13-01,1'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('business_api_contacts'),
+                                   {'fields': 'email,company'})
+        self.assertEqual(json.loads(response.content)['results'], [
+            {'email': u'john.doe@ssii.org', 'company': u'SSII'},
+            {'email': u'john.doe@green.org', 'company': u'GREEN'},
+        ])
+
+    def test_c_unchanged_pages_are_not_sent_again(self):
+        """
+        Tests that pages are validated with their ETag until one of their
+        objects changes or is deleted, the modification date not being
+        enough to tell.
+        """
+        url = reverse('business_api_companies')
+        response = self.client.get(url)
+        etag = response['ETag']
+        last_modified = response['Last-Modified']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        Company.objects.create(name=u'RED').delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Company.objects.filter(name=u'SSII').delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Last-Modified'], last_modified)
+        etag = response['ETag']
+        company = Company.objects.get(name=u'GREEN')
+        company.name = u'BLUE'
+        company.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_d_api_requires_permission(self):
+        """
+        Tests that only users allowed to change an object can list them.
+        """
+        self.client.login(username='Test', password='test')
+        for name in ('business_api_companies', 'business_api_contacts',
+                     'business_api_contracts'):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 403)
+
+
+class SearchTest(TestCase):
+
+    def setUp(self):
+        user_model = get_user_model()
+        user_model.objects.create_superuser(
+            username='admin',
+            email='admin@ssii.org',
+            password='admin'
+        )
+        user_model.objects.create_user(
+            username='Test',
+            password='test'
+        )
+        ssii = Company.objects.create(
+            name=u'SSII'
+        )
+        green = Company.objects.create(
+            name=u'GREEN'
+        )
+        for first_name, last_name, email, company in (
+                (u'jérôme', u'martin', u'jerome.martin@ssii.org', ssii),
+                (u'john', u'doe', u'john.doe@ssii.org', ssii),
+                (u'jane', u'johnson', u'jane@green.org', green),
+                (u'marc', u'dupont', u'marc.dupont@green.org', green)):
+            Contact.objects.create(
+                first_name=first_name,
+                last_name=last_name,
+                email=email,
+                company=company
+            )
+
+    def names(self, contacts):
+        return [contact.last_name for contact in contacts]
+
+    def test_a_contacts_are_found_by_prefix(self):
+        """
+        Tests that every word of a query must prefix a name, the email or
+        the company of the contacts found, accents being ignored.
+        """
+        self.assertEqual(
+            sorted(self.names(search.search_contacts(u'jo'))),
+            [u'DOE', u'JOHNSON'])
+        self.assertEqual(
+            self.names(search.search_contacts(u'jo ssii')), [u'DOE'])
+        self.assertEqual(
+            self.names(search.search_contacts(u'JEROME')), [u'MARTIN'])
+        self.assertEqual(
+            self.names(search.search_contacts(u'jérô')), [u'MARTIN'])
+        self.assertEqual(
+            self.names(search.search_contacts(u'marc.dupont@green')),
+            [u'DUPONT'])
+        self.assertEqual(search.search_contacts(u'" * ('), [])
+        self.assertEqual(search.search_contacts(u'zorro'), [])
+
+    def test_b_index_follows_changes(self):
+        """
+        Tests that saved, deleted, imported and renamed contacts and
+        companies are reflected in the index, and that it can be rebuilt.
+        """
+        contact = Contact.objects.get(last_name=u'DOE')
+        contact.last_name = u'smith'
+        contact.save()
+        self.assertEqual(
+            self.names(search.search_contacts(u'smith')), [u'SMITH'])
+        # Still found by email
+        self.assertEqual(
+            self.names(search.search_contacts(u'doe')), [u'SMITH'])
+        self.assertEqual(search.search_contacts(u'john doe ssii smi'),
+                         search.search_contacts(u'smith'))
+        company = Company.objects.get(name=u'GREEN')
+        company.name = u'BLUE'
+        company.save()
+        self.assertEqual(
+            sorted(self.names(search.search_contacts(u'blue'))),
+            [u'DUPONT', u'JOHNSON'])
+        contact.delete()
+        self.assertEqual(search.search_contacts(u'smith'), [])
+        ContactImporter().run([(1, {
+            u'first_name': u'paul',
+            u'last_name': u'durand',
+            u'email': u'paul@blue.org',
+            u'company': u'BLUE',
+        })])
+        self.assertEqual(
+            self.names(search.search_contacts(u'paul')), [u'DURAND'])
+        Contact.objects.filter(last_name=u'DURAND').update(
+            last_name=u'DUVAL')
+        call_command('rebuildsearch', stdout=StringIO())
+        self.assertEqual(
+            self.names(search.search_contacts(u'duval')), [u'DUVAL'])
+
+    def test_c_search_is_served_to_the_admin_and_as_json(self):
+        """
+        Tests that the admin contact search and the JSON endpoint use the
+        index.
+        """
+        self.client.login(username='admin', password='admin')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('admin:business_contact_changelist'), {'q': 'mar'})
+        self.assertContains(response, u'marc.dupont@green.org')
+        self.assertContains(response, u'jerome.martin@ssii.org')
+        self.assertNotContains(response, u'john.doe@ssii.org')
+        self.assertFalse([query for query in queries.captured_queries
+                          if 'LIKE' in query['sql']])
+        url = reverse('business_api_contact_search')
+        response = self.client.get(url, {'q': 'green ma'})
+        self.assertEqual(
+            [(result['email'], result['company']) for result in
+             json.loads(response.content)['results']],
+            [(u'marc.dupont@green.org', u'GREEN')])
+        for params in ({}, {'q': 'ma', 'limit': 0}, {'q': 'ma', 'limit': 'a'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400)
+        self.client.login(username='Test', password='test')
+        response = self.client.get(url, {'q': 'ma'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_d_missing_index_falls_back_to_prefix_lookups(self):
+        """
+        Tests that a database migrated without the index is searched with
+        prefix lookups until rebuildsearch creates the index.
+        """
+        self.addCleanup(search._backends.clear)
+        search.backend().drop(connection.cursor())
+        search._backends.clear()
+        self.assertEqual(type(search.backend()), search.SearchBackend)
+        self.assertEqual(
+            self.names(search.search_contacts(u'jo ssii')), [u'DOE'])
+        call_command('rebuildsearch', stdout=StringIO())
+        self.assertEqual(type(search.backend()),
+                         type(search.backend_for(connection)))
+        self.assertIn(search.INDEX_TABLE,
+                      connection.introspection.table_names())
+        self.assertEqual(
+            self.names(search.search_contacts(u'jo ssii')), [u'DOE'])
+
+
+class AdminTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        get_user_model().objects.create_superuser(
+            username='admin',
+            email='admin@ssii.org',
+            password='admin'
+        )
+        self.client.login(username='admin', password='admin')
+        for i in range(5):
+            company = Company.objects.create(
+                name=u'SSII %d' % i
+            )
+            contact = Contact.objects.create(
+                first_name=u'john',
+                last_name=u'doe %d' % i,
+                email=u'john.doe.%d@ssii.org' % i,
+                company=company
+            )
+            actor = get_user_model().objects.create_user(
+                username='actor%d' % i,
+                password='test'
+            )
+            Contract.objects.create(
+                name=u'test %d' % i,
+                client=contact,
+                start=datetime.date(2014, 1, 1),
+                end=datetime.date(2014, 1, 31),
+                days=10,
+                actor=actor
+            )
+
+    def test_a_change_forms_do_not_list_related_objects(self):
+        """
+        Tests that the change forms use raw id widgets instead of
+        rendering every related object.
+        """
+        contract = Contract.objects.all()[0]
+        response = self.client.get(
+            reverse('admin:business_contract_change', args=(contract.pk,)))
+        self.assertNotContains(response, u'john.doe.4@ssii.org')
+        self.assertContains(response, u'vForeignKeyRawIdAdminField')
+        response = self.client.get(
+            reverse('admin:business_contact_changelist'), {'q': 'john.doe.3@ssii.org'})
+        self.assertContains(response, u'john.doe.3@ssii.org')
+        self.assertNotContains(response, u'john.doe.4@ssii.org')
+
+    def test_b_contracts_are_searched_by_name_and_client(self):
+        """
+        Tests that the contract changelist finds the contracts by the
+        prefix of their name or by their client.
+        """
+        url = reverse('admin:business_contract_changelist')
+        for term, found in ((u'test 3', u'test 3'),
+                            (u'john.doe.2@ssii.org', u'test 2'),
+                            (u'doe 4', u'test 4')):
+            response = self.client.get(url, {'q': term})
+            self.assertEqual(
+                [contract.name for contract in
+                 response.context['cl'].result_list], [found])
+
+
+class CapacityTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        capacity_planner.invalidate()
+        company = Company.objects.create(
+            name=u'SSII'
+        )
+        self.contact = Contact.objects.create(
+            first_name=u'John',
+            last_name=u'Doe',
+            email=u'john.doe@ssii.org',
+            company=company
+        )
+        self.alice = get_user_model().objects.create_user(
+            username='alice',
+            password='test'
+        )
+        self.bob = get_user_model().objects.create_user(
+            username='bob',
+            password='test'
+        )
+        FixedHoliday.objects.create(
+            name=u'Nouvel An',
+            date=u'01/01'
+        )
+        # 22 working days in January 2014, 20 in February 2014
+        self.contract = self.create(
+            self.alice, datetime.date(2014, 1, 1),
+            datetime.date(2014, 2, 28), 21)
+        self.create(
+            self.alice, datetime.date(2014, 2, 1),
+            datetime.date(2014, 2, 28), 10)
+        self.create(
+            self.bob, datetime.date(2014, 1, 6),
+            datetime.date(2014, 1, 10), 5)
+
+    def create(self, actor, start, end, days):
+        return Contract.objects.create(
+            name=u'test',
+            client=self.contact,
+            start=start,
+            end=end,
+            days=days,
+            actor=actor
+        )
+
+    def test_a_contract_days_are_spread_over_working_days(self):
+        """
+        Tests that the load of an actor spreads the days of each contract
+        evenly over its working days.
+        """
+        self.assertAlmostEqual(
+            capacity_planner.load(self.alice.pk, datetime.date(2014, 1, 1),
+                                  datetime.date(2014, 1, 31)),
+            11
+        )
+        self.assertAlmostEqual(
+            capacity_planner.load(self.alice.pk, datetime.date(2014, 2, 1),
+                                  datetime.date(2014, 2, 28)),
+            20
+        )
+        self.assertAlmostEqual(
+            capacity_planner.load(self.alice.pk, datetime.date(2014, 1, 4),
+                                  datetime.date(2014, 1, 5)),
+            0
+        )
+        self.assertAlmostEqual(
+            capacity_planner.load(self.bob.pk, datetime.date(2013, 1, 1),
+                                  datetime.date(2015, 1, 1)),
+            5
+        )
+        self.assertAlmostEqual(
+            capacity_planner.load(self.bob.pk, datetime.date(2014, 1, 8),
+                                  datetime.date(2014, 1, 8)),
+            1
+        )
+
+    def test_b_over_capacity_actors_are_found(self):
+        """
+        Tests that actors planned for more days than the working days of
+        a month are reported, with no query on a warm cache.
+        """
+        self.assertEqual(capacity_planner.over_capacity(2014, 2), {})
+        self.create(
+            self.alice, datetime.date(2014, 2, 3),
+            datetime.date(2014, 2, 3), 1)
+        overloaded = capacity_planner.over_capacity(2014, 2)
+        self.assertEqual(overloaded.keys(), [self.alice.pk])
+        self.assertAlmostEqual(overloaded[self.alice.pk], 21)
+        with self.assertNumQueries(0):
+            capacity_planner.over_capacity(2014, 2)
+            capacity_planner.load(self.bob.pk, datetime.date(2014, 1, 1),
+                                  datetime.date(2014, 1, 31))
+
+    def test_c_loads_follow_contract_changes(self):
+        """
+        Tests that saving or deleting a contract only rebuilds the loads
+        of its actors.
+        """
+        january = (datetime.date(2014, 1, 1), datetime.date(2014, 1, 31))
+        capacity_planner.all_loads()
+        self.contract.actor = self.bob
+        self.contract.save()
+        self.assertAlmostEqual(
+            capacity_planner.load(self.alice.pk, *january), 0)
+        self.assertAlmostEqual(
+            capacity_planner.load(self.bob.pk, *january), 16)
+        self.contract.delete()
+        with self.assertNumQueries(1):
+            self.assertAlmostEqual(
+                capacity_planner.load(self.bob.pk, *january), 5)
+            self.assertAlmostEqual(
+                capacity_planner.load(self.alice.pk, *january), 0)
+
+    def test_d_imported_contracts_are_planned(self):
+        """
+        Tests that contracts created by the importer, which sends no
+        signal, are counted in the loads of their actors.
+        """
+        week = (datetime.date(2014, 1, 6), datetime.date(2014, 1, 10))
+        self.assertAlmostEqual(capacity_planner.load(self.bob.pk, *week), 5)
+        self.assertEqual(capacity_planner.over_capacity(2014, 1), {})
+        importer = ContractImporter().run(
+            (line, {
+                'name': u'imported %d' % line,
+                'client': u'john.doe@ssii.org',
+                'actor': u'bob',
+                'start': u'2014-01-06',
+                'end': u'2014-01-10',
+                'days': u'5',
+            }) for line in range(1, 6))
+        self.assertEqual(importer.created, 5)
+        self.assertAlmostEqual(capacity_planner.load(self.bob.pk, *week), 30)
+        self.assertEqual(capacity_planner.over_capacity(2014, 1).keys(),
+                         [self.bob.pk])
+
+    def test_e_changes_of_other_processes_are_not_hidden(self):
+        """
+        Tests that a change made by another process between two changes
+        made by this one drops every load.
+        """
+        january = (datetime.date(2014, 1, 1), datetime.date(2014, 1, 31))
+        capacity_planner.all_loads()
+        bump = versions.bump
+
+        def racing_bump(key):
+            # Another process doubles the days of the contracts of alice
+            # just before the counter is bumped
+            versions.bump = bump
+            Contract.objects.filter(actor=self.alice).update(days=42)
+            bump(key)
+            return bump(key)
+        versions.bump = racing_bump
+        self.addCleanup(setattr, versions, 'bump', bump)
+        self.create(
+            self.bob, datetime.date(2014, 1, 13),
+            datetime.date(2014, 1, 13), 1)
+        self.assertAlmostEqual(
+            capacity_planner.load(self.alice.pk, *january), 22)
+        self.assertAlmostEqual(
+            capacity_planner.load(self.bob.pk, *january), 6)
+
+
+class BenchTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+
+    def test_a_operations_are_timed(self):
+        """
+        Tests that every operation is timed on the seeded data.
+        """
+        results = bench.run(companies=2, contacts=10, contracts=20,
+                            actors=2, years=2, imports=5, warmup=0,
+                            repeat=3)
+        self.assertEqual(sorted(results['results']), sorted(
+            name for name, func in bench.operations(1)))
+        for timing in results['results'].values():
+            self.assertEqual(timing['runs'], 3)
+            self.assertTrue(0 <= timing['min'] <= timing['median'])
+        # Imports are rolled back
+        self.assertEqual(Contact.objects.count(), 10)
+        self.assertEqual(Contract.objects.count(), 20)
+
+    def test_b_runs_are_compared_with_a_threshold(self):
+        """
+        Tests that operations slower than the threshold are reported as
+        regressions by the command.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        paths = []
+        for name, medians in (('baseline', (1.0, 1.0)),
+                              ('current', (1.05, 1.5))):
+            path = os.path.join(directory, '%s.json' % name)
+            with open(path, 'w') as f:
+                json.dump({'results': {
+                    'fast': {'median': medians[0]},
+                    'slow': {'median': medians[1]},
+                }}, f)
+            paths.append(path)
+        with open(paths[0]) as f:
+            baseline = json.load(f)
+        with open(paths[1]) as f:
+            current = json.load(f)
+        self.assertEqual(
+            [(name, regressed) for name, before, after, ratio, regressed
+             in bench.compare(baseline, current)],
+            [('fast', False), ('slow', True)]
+        )
+        self.assertRaisesRegexp(
+            CommandError, 'slow',
+            call_command, 'bench', compare=paths, stdout=StringIO())
+        call_command('bench', compare=paths, threshold=60, stdout=StringIO())
@@ -0,0 +1,17 @@
+from django.conf.urls import patterns, url
+
+urlpatterns = patterns('business.views',
+    url(r'^contracts/export\.csv$', 'export_contracts',
+        name='business_export_contracts'),
+)
+
+urlpatterns += patterns('business.api',
+    url(r'^api/companies/$', 'company_list',
+        name='business_api_companies'),
+    url(r'^api/contacts/$', 'contact_list',
+        name='business_api_contacts'),
+    url(r'^api/contracts/$', 'contract_list',
+        name='business_api_contracts'),
+    url(r'^api/contacts/search/$', 'contact_search',
+        name='business_api_contact_search'),
+)
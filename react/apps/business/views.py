@@ -1,3 +1,36 @@
-from django.shortcuts import render
+# -*- coding: utf8 -*-
+# Django modules
+from django.http import StreamingHttpResponse, HttpResponseBadRequest
+from django.utils.dateparse import parse_date
+from django.contrib.auth.decorators import permission_required
+# React modules
+from business.exports import contracts_to_export, contract_rows, iter_csv
 
-# Create your views here.
+
+@permission_required('business.change_contract', raise_exception=True)
+def export_contracts(request):
+    """
+    Streams the contracts as CSV, filtered by the 'start', 'end', 'actor'
+    and 'company' query parameters.
+    """
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.GET.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                return HttpResponseBadRequest(
+                    u'Invalid %s date: %s' % (name, value))
+    contracts = contracts_to_export(
+        actor=request.GET.get('actor'),
+        company=request.GET.get('company'),
+        **dates
+    )
+    response = StreamingHttpResponse(
+        iter_csv(contract_rows(contracts)),
+        content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="contracts.csv"'
+    return response
@@ -0,0 +1,31 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.contrib import admin
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+# React modules
+from jobs.models import Job
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('__unicode__', 'status', 'priority', 'progress_display',
+                    'attempts', 'created', 'started', 'finished')
+    list_filter = ('status', 'task')
+    search_fields = ('=task',)
+    readonly_fields = ('task', 'arguments', 'status', 'attempts', 'progress',
+                       'result', 'error', 'worker', 'created', 'started',
+                       'finished')
+    actions = ('requeue',)
+
+    def progress_display(self, obj):
+        return u'%d%%' % obj.progress
+    progress_display.short_description = _(u'progress')
+    progress_display.admin_order_field = 'progress'
+
+    def requeue(self, request, queryset):
+        count = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.PENDING, attempts=0, run_after=timezone.now(),
+            worker=u'')
+        self.message_user(request, _(u'%d job(s) requeued.') % count)
+    requeue.short_description = _(u'Requeue the selected jobs')
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,121 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import os
+import time
+import socket
+import multiprocessing
+from optparse import make_option
+# Django modules
+from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+# React modules
+from jobs.models import Job
+
+
+def close_connections():
+    for connection in connections.all():
+        connection.close()
+
+
+def run_job(pk):
+    """
+    Runs a claimed job in a pool process and returns its status.
+    """
+    try:
+        return Job.objects.get(pk=pk).run()
+    finally:
+        close_connections()
+
+
+class Command(BaseCommand):
+    help = ('Claims the queued jobs and runs them in a pool of processes, '
+            'the most urgent first.')
+    option_list = BaseCommand.option_list + (
+        make_option('--processes', type='int', dest='processes',
+                    default=multiprocessing.cpu_count(),
+                    help='Number of pool processes, 0 running the jobs in '
+                         'the worker itself (default: number of CPUs).'),
+        make_option('--interval', type='float', dest='interval', default=1.0,
+                    help='Seconds between polls of an empty queue '
+                         '(default: 1).'),
+        make_option('--burst', action='store_true', dest='burst',
+                    default=False,
+                    help='Exits once the queue is empty.'),
+        make_option('--requeue-after', type='int', dest='requeue_after',
+                    help='Requeues jobs running for more than this number '
+                         'of seconds at startup.'),
+        make_option('--timeout', type='float', dest='timeout',
+                    default=3600.0,
+                    help='Seconds after which a job run by a pool process '
+                         'is given up, its process being assumed dead, '
+                         'and retried or failed (default: 3600).'),
+    )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 0:
+            raise CommandError('The number of processes cannot be negative.')
+        self.name = u'%s:%d' % (socket.gethostname(), os.getpid())
+        if options['requeue_after'] is not None:
+            count = Job.objects.requeue_stale(options['requeue_after'])
+            self.stdout.write(u'%d stale job(s) requeued' % count)
+        if options['processes'] == 0:
+            self.run_inline(options)
+        else:
+            self.run_pool(options)
+
+    def run_inline(self, options):
+        while True:
+            job = Job.objects.claim(self.name)
+            if job is None:
+                if options['burst']:
+                    return
+                time.sleep(options['interval'])
+                continue
+            self.report(job.pk, job.run())
+
+    def run_pool(self, options):
+        # Forked processes must not share the connections of the worker
+        close_connections()
+        pool = multiprocessing.Pool(options['processes'])
+        running = {}
+        lost = False
+        try:
+            while True:
+                for pk, (result, deadline) in running.items():
+                    if result.ready():
+                        del running[pk]
+                        try:
+                            status = result.get()
+                        except Exception as e:
+                            # The job could not even record its outcome
+                            status = u'error (%s)' % e
+                        self.report(pk, status)
+                    elif time.time() > deadline:
+                        # A dead pool process never returns its result
+                        del running[pk]
+                        lost = True
+                        status = Job.objects.get(pk=pk).lost(
+                            u'No result after %s seconds, the pool process '
+                            u'is assumed dead.' % options['timeout'])
+                        self.report(pk, u'lost, %s' % status)
+                job = None
+                if len(running) < options['processes']:
+                    job = Job.objects.claim(self.name)
+                if job is not None:
+                    running[job.pk] = (
+                        pool.apply_async(run_job, (job.pk,)),
+                        time.time() + options['timeout'])
+                    continue
+                if options['burst'] and not running:
+                    return
+                time.sleep(running and 0.1 or options['interval'])
+        finally:
+            if lost:
+                # The pool would wait for the lost results forever
+                pool.terminate()
+            else:
+                pool.close()
+            pool.join()
+
+    def report(self, pk, status):
+        self.stdout.write(u'job %d: %s' % (pk, status))
@@ -0,0 +1,43 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('task', models.CharField(max_length=255, verbose_name='task')),
+                ('arguments', models.TextField(default='{}', verbose_name='arguments')),
+                ('status', models.CharField(default=b'pending', max_length=10, verbose_name='status', choices=[(b'pending', 'pending'), (b'running', 'running'), (b'done', 'done'), (b'failed', 'failed')])),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='priority')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='attempts')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='maximum attempts')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='progress')),
+                ('result', models.TextField(verbose_name='result', blank=True)),
+                ('error', models.TextField(verbose_name='error', blank=True)),
+                ('worker', models.CharField(max_length=255, verbose_name='worker', blank=True)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='run after')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='created')),
+                ('started', models.DateTimeField(null=True, verbose_name='started', blank=True)),
+                ('finished', models.DateTimeField(null=True, verbose_name='finished', blank=True)),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.AlterIndexTogether(
+            name='job',
+            index_together=set([('status', 'run_after')]),
+        ),
+    ]
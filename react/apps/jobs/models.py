@@ -0,0 +1,180 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import json
+import datetime
+import traceback
+# Django modules
+from django.db import models
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.translation import ugettext_lazy as _
+
+# Seconds before the first retry of a failed job, doubled on each attempt
+RETRY_DELAY = 30
+
+
+class JobQuerySet(models.QuerySet):
+    def runnable(self):
+        """
+        Returns the pending jobs due to run, the most urgent first.
+        """
+        return self.filter(
+            status=Job.PENDING, run_after__lte=timezone.now()
+        ).order_by('-priority', 'pk')
+
+
+class JobManager(models.Manager.from_queryset(JobQuerySet)):
+    def enqueue(self, task, priority=0, max_attempts=3, **arguments):
+        """
+        Creates a job running the function at the dotted path `task` with
+        the given keyword arguments, which must be serialisable as JSON.
+
+        The function is called with the job as first argument, so that it
+        can report its progress.
+        """
+        # Fails now rather than in the worker
+        import_string(task)
+        return self.create(
+            task=task,
+            arguments=json.dumps(arguments, sort_keys=True),
+            priority=priority,
+            max_attempts=max_attempts
+        )
+
+    def claim(self, worker):
+        """
+        Marks the next runnable job as running for the given worker and
+        returns it, or returns None when no job is due.
+
+        The job is taken with an update conditioned on its pending status,
+        which only one worker can win, so no row lock is needed and the
+        same code works on SQLite and on PostgreSQL.
+        """
+        while True:
+            pk = self.runnable().values_list('pk', flat=True).first()
+            if pk is None:
+                return None
+            claimed = self.filter(pk=pk, status=Job.PENDING).update(
+                status=Job.RUNNING,
+                worker=worker,
+                started=timezone.now(),
+                finished=None,
+                progress=0,
+                attempts=models.F('attempts') + 1
+            )
+            if claimed:
+                return self.get(pk=pk)
+
+    def requeue_stale(self, seconds):
+        """
+        Sets back to pending the jobs running for more than the given
+        number of seconds, whose worker is assumed dead.
+        """
+        return self.filter(
+            status=Job.RUNNING,
+            started__lt=timezone.now() - datetime.timedelta(seconds=seconds)
+        ).update(status=Job.PENDING, worker=u'')
+
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, _(u'pending')),
+        (RUNNING, _(u'running')),
+        (DONE, _(u'done')),
+        (FAILED, _(u'failed')),
+    )
+
+    task = models.CharField(_(u'task'), max_length=255)
+    arguments = models.TextField(_(u'arguments'), default=u'{}')
+    status = models.CharField(_(u'status'), max_length=10,
+                              choices=STATUS_CHOICES, default=PENDING)
+    priority = models.SmallIntegerField(_(u'priority'), default=0)
+    attempts = models.PositiveSmallIntegerField(_(u'attempts'), default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        _(u'maximum attempts'), default=3)
+    progress = models.PositiveSmallIntegerField(_(u'progress'), default=0)
+    result = models.TextField(_(u'result'), blank=True)
+    error = models.TextField(_(u'error'), blank=True)
+    worker = models.CharField(_(u'worker'), max_length=255, blank=True)
+    run_after = models.DateTimeField(_(u'run after'), default=timezone.now)
+    created = models.DateTimeField(_(u'created'), auto_now_add=True)
+    started = models.DateTimeField(_(u'started'), null=True, blank=True)
+    finished = models.DateTimeField(_(u'finished'), null=True, blank=True)
+
+    objects = JobManager()
+
+    class Meta:
+        verbose_name = _(u'Job')
+        verbose_name_plural = _(u'Jobs')
+        index_together = [
+            ('status', 'run_after'),
+        ]
+
+    def __unicode__(self):
+        return u'%s #%s' % (self.task, self.pk)
+
+    def set_progress(self, done, total):
+        """
+        Records that `done` steps out of `total` are completed.
+        """
+        self.progress = total and min(100, 100 * done // total) or 0
+        Job.objects.filter(pk=self.pk).update(progress=self.progress)
+
+    def run(self):
+        """
+        Runs the task of the claimed job and records its outcome. Failed
+        jobs are retried later, with an exponential backoff, until they
+        reach their maximum number of attempts.
+        """
+        try:
+            result = import_string(self.task)(
+                self, **json.loads(self.arguments))
+        except Exception:
+            self.failed(traceback.format_exc())
+        else:
+            self.status = Job.DONE
+            self.progress = 100
+            self.result = result is not None and unicode(result) or u''
+            self.error = u''
+            self.finished = timezone.now()
+        self.record_outcome()
+        return self.status
+
+    def failed(self, error):
+        """
+        Sets the job up for a retry after the failure of its attempt, or
+        marks it failed once it has reached its maximum attempts.
+        """
+        self.error = error
+        if self.attempts < self.max_attempts:
+            self.status = Job.PENDING
+            self.run_after = timezone.now() + datetime.timedelta(
+                seconds=RETRY_DELAY * 2 ** (self.attempts - 1))
+        else:
+            self.status = Job.FAILED
+            self.finished = timezone.now()
+
+    def record_outcome(self):
+        Job.objects.filter(pk=self.pk).update(
+            status=self.status,
+            progress=self.progress,
+            result=self.result,
+            error=self.error,
+            run_after=self.run_after,
+            finished=self.finished
+        )
+
+    def lost(self, error):
+        """
+        Records the failure of an attempt whose process never reported
+        back, unless the attempt recorded its outcome itself. Returns the
+        status of the job.
+        """
+        if self.status == Job.RUNNING:
+            self.failed(error)
+            self.record_outcome()
+        return self.status
@@ -0,0 +1,140 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import os
+import shutil
+import datetime
+import tempfile
+from StringIO import StringIO
+# Django modules
+from django.test import TestCase
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.urlresolvers import reverse
+from django.contrib.auth import get_user_model
+# React modules
+from jobs.models import Job
+from business.models import Company
+from business.tasks import enqueue_import
+
+
+def succeed(job, value):
+    job.set_progress(1, 2)
+    return value * 2
+
+
+def fail(job):
+    raise RuntimeError(u'Expected failure')
+
+
+def die(job):
+    os._exit(1)
+
+
+class JobTest(TestCase):
+
+    def test_a_jobs_are_claimed_by_priority(self):
+        """
+        Tests that the most urgent due job is claimed first, and only once.
+        """
+        low = Job.objects.enqueue('jobs.tests.succeed', value=1)
+        high = Job.objects.enqueue('jobs.tests.succeed', priority=5, value=2)
+        later = Job.objects.enqueue('jobs.tests.succeed', priority=9, value=3)
+        Job.objects.filter(pk=later.pk).update(
+            run_after=timezone.now() + datetime.timedelta(hours=1))
+        self.assertEqual(Job.objects.claim(u'w1').pk, high.pk)
+        job = Job.objects.claim(u'w2')
+        self.assertEqual(job.pk, low.pk)
+        self.assertEqual((job.status, job.worker, job.attempts),
+                         (Job.RUNNING, u'w2', 1))
+        self.assertEqual(Job.objects.claim(u'w3'), None)
+        self.assertRaises(ImportError, Job.objects.enqueue,
+                          'jobs.tests.missing')
+
+    def test_b_jobs_record_their_outcome(self):
+        """
+        Tests that jobs record their result and progress, and that failed
+        ones are retried later until their maximum attempts.
+        """
+        Job.objects.enqueue('jobs.tests.succeed', value=21)
+        job = Job.objects.claim(u'w')
+        self.assertEqual(job.run(), Job.DONE)
+        job = Job.objects.get(pk=job.pk)
+        self.assertEqual((job.result, job.progress), (u'42', 100))
+        Job.objects.enqueue('jobs.tests.fail', max_attempts=2)
+        job = Job.objects.claim(u'w')
+        self.assertEqual(job.run(), Job.PENDING)
+        self.assertIn(u'Expected failure', Job.objects.get(pk=job.pk).error)
+        self.assertEqual(Job.objects.claim(u'w'), None)
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(Job.objects.claim(u'w').run(), Job.FAILED)
+
+    def test_c_worker_runs_the_queue(self):
+        """
+        Tests that the worker runs the queued imports until the queue is
+        empty.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'companies.csv')
+        with open(path, 'w') as f:
+            f.write(b'name\nSSII\nGREEN\nSSII\n')
+        job = enqueue_import('company', path, batch_size=2)
+        Job.objects.enqueue('activity.tasks.rebuild_consumption')
+        Job.objects.enqueue('parameters.tasks.render_calendars',
+                            years=[2014, 2015])
+        stdout = StringIO()
+        call_command('runworker', processes=0, burst=True, stdout=stdout)
+        self.assertEqual(stdout.getvalue().count(u': done'), 3)
+        self.assertEqual(Company.objects.count(), 2)
+        job = Job.objects.get(pk=job.pk)
+        self.assertTrue(job.result.startswith(u'2 created, 1 rejected'))
+        self.assertEqual(job.progress, 100)
+        # Imports are not retried, committed batches would be imported twice
+        self.assertEqual(job.max_attempts, 1)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.PENDING, attempts=1)
+        self.assertEqual(Job.objects.claim(u'test').run(), Job.FAILED)
+        self.assertEqual(Company.objects.count(), 2)
+
+    def test_d_stale_jobs_are_requeued(self):
+        """
+        Tests that jobs left running by a dead worker are requeued.
+        """
+        Job.objects.enqueue('jobs.tests.succeed', value=1)
+        job = Job.objects.claim(u'dead')
+        Job.objects.filter(pk=job.pk).update(
+            started=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(Job.objects.requeue_stale(60), 1)
+        self.assertEqual(Job.objects.claim(u'w').attempts, 2)
+
+    def test_e_progress_is_visible_in_the_admin(self):
+        """
+        Tests that the admin lists the jobs with their progress.
+        """
+        get_user_model().objects.create_superuser(
+            username='admin',
+            email='admin@ssii.org',
+            password='admin'
+        )
+        self.client.login(username='admin', password='admin')
+        job = Job.objects.enqueue('jobs.tests.succeed', value=1)
+        job.set_progress(1, 4)
+        response = self.client.get(reverse('admin:jobs_job_changelist'))
+        self.assertContains(response, u'25%')
+
+    def test_f_pool_reports_results_and_gives_up_lost_jobs(self):
+        """
+        Tests that the pool processes report the status of their jobs, and
+        that the jobs of a dead pool process are given up after the
+        timeout.
+        """
+        done = Job.objects.enqueue('jobs.tests.succeed', priority=1, value=1)
+        dead = Job.objects.enqueue('jobs.tests.die', max_attempts=1)
+        stdout = StringIO()
+        call_command('runworker', processes=1, burst=True, timeout=1,
+                     stdout=stdout)
+        self.assertIn(u'job %d: done' % done.pk, stdout.getvalue())
+        self.assertIn(u'job %d: lost, failed' % dead.pk, stdout.getvalue())
+        job = Job.objects.get(pk=dead.pk)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn(u'assumed dead', job.error)
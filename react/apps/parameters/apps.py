@@ -0,0 +1,13 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.apps import AppConfig
+from django.utils.translation import ugettext_lazy as _
+
+
+class ParametersConfig(AppConfig):
+    name = 'parameters'
+    verbose_name = _(u'Parameters')
+
+    def ready(self):
+        # Connects the signal receivers
+        from parameters import signals
@@ -0,0 +1,93 @@
+# -*- coding: utf8 -*-
+# React modules
+from react import versions
+from parameters.models import Holiday
+
+VERSION_KEY = u'parameters:calendar:version'
+
+
+class HolidayCalendar(object):
+    """
+    Per-process cache of the holiday dates, keyed by year.
+
+    Each process keeps its own materialised sets of dates. They are
+    tagged with a version counter stored in Django's cache framework,
+    which is bumped whenever a holiday changes, and again once the
+    transaction of the change is over, so that every process sharing
+    the cache drops its sets on the next lookup.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._years = {}
+        self._weekdays = {}
+
+    def version(self):
+        """
+        Returns the current calendar version shared by all processes.
+        """
+        return versions.get(VERSION_KEY)
+
+    def invalidate(self):
+        """
+        Drops the cached dates in every process.
+        """
+        versions.bump(VERSION_KEY)
+        self._clear()
+
+    def holidays_for_year(self, year):
+        """
+        Returns the set of holiday dates of the given year.
+        """
+        version = self.version()
+        if version != self._version:
+            self._clear()
+            self._version = version
+        try:
+            return self._years[year]
+        except KeyError:
+            dates = self._load(year)
+            self._years[year] = dates
+            return dates
+
+    def weekday_holidays_for_year(self, year):
+        """
+        Returns the sorted tuple of the holiday dates of the given year
+        which fall on a weekday.
+        """
+        dates = self.holidays_for_year(year)
+        try:
+            return self._weekdays[year]
+        except KeyError:
+            weekdays = tuple(sorted(d for d in dates if d.weekday() < 5))
+            self._weekdays[year] = weekdays
+            return weekdays
+
+    def is_holiday(self, date):
+        """
+        Returns True if the given date is a holiday.
+        """
+        return date in self.holidays_for_year(date.year)
+
+    def _clear(self):
+        self._version = None
+        self._years = {}
+        self._weekdays = {}
+
+    def _load(self, year):
+        return frozenset(Holiday.objects.dates_for_year(year))
+
+
+holiday_calendar = HolidayCalendar()
+
+
+def is_holiday(date):
+    return holiday_calendar.is_holiday(date)
+
+
+def holidays_for_year(year):
+    return holiday_calendar.holidays_for_year(year)
+
+
+def weekday_holidays_for_year(year):
+    return holiday_calendar.weekday_holidays_for_year(year)
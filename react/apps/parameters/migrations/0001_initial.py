@@ -0,0 +1,58 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.core.validators
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+            ],
+            options={
+                'verbose_name': 'Holiday',
+                'verbose_name_plural': 'Holidays',
+            },
+            bases=(models.Model,),
+        ),
+        migrations.CreateModel(
+            name='FixedHoliday',
+            fields=[
+                ('holiday_ptr', models.OneToOneField(parent_link=True, auto_created=True, primary_key=True, serialize=False, to='parameters.Holiday')),
+                ('name', models.CharField(unique=True, max_length=b'255', verbose_name='name')),
+                ('date', models.CharField(unique=True, max_length=b'5', verbose_name='date', validators=[django.core.validators.RegexValidator(regex=b'^(\\d{2})\\\\(\\d{2})$')])),
+            ],
+            options={
+                'verbose_name': 'Fixed Holiday',
+                'verbose_name_plural': 'Fixed Holidays',
+            },
+            bases=('parameters.holiday',),
+        ),
+        migrations.CreateModel(
+            name='NonFixedHoliday',
+            fields=[
+                ('holiday_ptr', models.OneToOneField(parent_link=True, auto_created=True, primary_key=True, serialize=False, to='parameters.Holiday')),
+                ('name', models.CharField(max_length=b'255', verbose_name='name')),
+                ('date', models.DateField(unique=True, verbose_name='date')),
+            ],
+            options={
+                'verbose_name': 'Non Fixed Holiday',
+                'verbose_name_plural': 'Non Fixed Holidays',
+            },
+            bases=('parameters.holiday',),
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='content_type',
+            field=models.ForeignKey(editable=False, to='contenttypes.ContentType', null=True),
+            preserve_default=True,
+        ),
+    ]
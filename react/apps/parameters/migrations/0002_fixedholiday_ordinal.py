@@ -0,0 +1,44 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.core.validators
+
+
+def populate_ordinals(apps, schema_editor):
+    FixedHoliday = apps.get_model('parameters', 'FixedHoliday')
+    for holiday in FixedHoliday.objects.all():
+        day, month = holiday.date.split('/')
+        holiday.ordinal = int(month) * 100 + int(day)
+        holiday.save(update_fields=['ordinal'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parameters', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fixedholiday',
+            name='ordinal',
+            field=models.PositiveSmallIntegerField(verbose_name='ordinal', null=True, editable=False, blank=True),
+            preserve_default=True,
+        ),
+        migrations.RunPython(populate_ordinals),
+        migrations.AlterField(
+            model_name='fixedholiday',
+            name='ordinal',
+            field=models.PositiveSmallIntegerField(unique=True, verbose_name='ordinal', editable=False, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='fixedholiday',
+            name='date',
+            field=models.CharField(unique=True, max_length=b'5', verbose_name='date', validators=[django.core.validators.RegexValidator(regex=b'^(\\d{2})/(\\d{2})$')]),
+        ),
+        migrations.AlterModelOptions(
+            name='fixedholiday',
+            options={'ordering': ('ordinal',), 'verbose_name': 'Fixed Holiday', 'verbose_name_plural': 'Fixed Holidays'},
+        ),
+    ]
@@ -0,0 +1,129 @@
+# encoding: utf8
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.core.validators
+
+
+def copy_holidays(apps, schema_editor):
+    Holiday = apps.get_model('parameters', 'Holiday')
+    FixedHoliday = apps.get_model('parameters', 'FixedHoliday')
+    NonFixedHoliday = apps.get_model('parameters', 'NonFixedHoliday')
+    pks = []
+    for holiday in FixedHoliday.objects.all():
+        Holiday.objects.filter(pk=holiday.pk).update(
+            kind='fixed', name=holiday.old_name, fixed_date=holiday.date,
+            ordinal=holiday.old_ordinal)
+        pks.append(holiday.pk)
+    for holiday in NonFixedHoliday.objects.all():
+        Holiday.objects.filter(pk=holiday.pk).update(
+            kind='nonfixed', name=holiday.old_name,
+            nonfixed_date=holiday.date)
+        pks.append(holiday.pk)
+    # Base rows without a subclass row are not holidays of any kind
+    Holiday.objects.exclude(pk__in=pks).delete()
+
+
+def create_fixed_name_index(apps, schema_editor):
+    schema_editor.execute(
+        "CREATE UNIQUE INDEX parameters_holiday_fixed_name "
+        "ON parameters_holiday (name) WHERE kind = 'fixed'")
+
+
+def drop_fixed_name_index(apps, schema_editor):
+    schema_editor.execute("DROP INDEX parameters_holiday_fixed_name")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parameters', '0002_fixedholiday_ordinal'),
+    ]
+
+    operations = [
+        # Renamed first, the base model cannot get fields of the same names
+        # as its subclasses
+        migrations.RenameField(
+            model_name='fixedholiday',
+            old_name='name',
+            new_name='old_name',
+        ),
+        migrations.RenameField(
+            model_name='fixedholiday',
+            old_name='ordinal',
+            new_name='old_ordinal',
+        ),
+        migrations.RenameField(
+            model_name='nonfixedholiday',
+            old_name='name',
+            new_name='old_name',
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='kind',
+            field=models.CharField(default='fixed', verbose_name='kind', max_length=8, editable=False, choices=[(b'fixed', 'Fixed'), (b'nonfixed', 'Non fixed')], db_index=True),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='name',
+            field=models.CharField(default='', max_length=255, verbose_name='name'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='fixed_date',
+            field=models.CharField(blank=True, validators=[django.core.validators.RegexValidator(regex=b'^(\\d{2})/(\\d{2})$')], max_length=5, unique=True, null=True, verbose_name='date'),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='ordinal',
+            field=models.PositiveSmallIntegerField(verbose_name='ordinal', unique=True, null=True, editable=False, blank=True),
+            preserve_default=True,
+        ),
+        migrations.AddField(
+            model_name='holiday',
+            name='nonfixed_date',
+            field=models.DateField(unique=True, null=True, verbose_name='date', blank=True),
+            preserve_default=True,
+        ),
+        migrations.RunPython(copy_holidays),
+        migrations.DeleteModel(
+            name='FixedHoliday',
+        ),
+        migrations.DeleteModel(
+            name='NonFixedHoliday',
+        ),
+        migrations.RemoveField(
+            model_name='holiday',
+            name='content_type',
+        ),
+        migrations.CreateModel(
+            name='FixedHoliday',
+            fields=[
+            ],
+            options={
+                'ordering': ('ordinal',),
+                'verbose_name': 'Fixed Holiday',
+                'proxy': True,
+                'verbose_name_plural': 'Fixed Holidays',
+            },
+            bases=('parameters.holiday',),
+        ),
+        migrations.CreateModel(
+            name='NonFixedHoliday',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'Non Fixed Holiday',
+                'proxy': True,
+                'verbose_name_plural': 'Non Fixed Holidays',
+            },
+            bases=('parameters.holiday',),
+        ),
+        # Fixed holiday names are unique among the fixed holidays only.
+        # Created last, as SQLite rebuilds the table without it when a
+        # field is removed.
+        migrations.RunPython(create_fixed_name_index, drop_fixed_name_index),
+    ]
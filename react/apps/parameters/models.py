@@ -7,33 +7,149 @@ from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.contrib.contenttypes.models import ContentType
+
+
+# Format of the fixed holiday dates: 'DD/MM'
+FIXED_DATE_REGEX = r'^(\d{2})/(\d{2})$'
+
+# Kinds of holidays, stored in the discriminator column of the single
+# holiday table
+FIXED = 'fixed'
+NONFIXED = 'nonfixed'
+
+
+def fixed_date_to_ordinal(date):
+    """
+    Returns the MMDD integer ordinal of a 'DD/MM' fixed holiday date.
+    """
+    match = re.match(FIXED_DATE_REGEX, unicode(date))
+    if match is None:
+        raise ValueError(u'Invalid fixed holiday date: %r' % date)
+    return int(match.group(2)) * 100 + int(match.group(1))
+
+
+def ordinal_to_date(ordinal, year):
+    """
+    Returns the date of the given year matching a MMDD integer ordinal.
+    """
+    month, day = divmod(ordinal, 100)
+    return datetime.date(year, month, day)
 
 
 class HolidayQuerySet(models.QuerySet):
-    def __getitem__(self, k):
-        result = super(HolidayQuerySet, self).__getitem__(k)
-        if isinstance(result, models.Model) :
-            return result.as_leaf_class()
-        else :
-            return result
-    
-    def __iter__(self):
-        for item in super(HolidayQuerySet, self).__iter__():
-            yield item.as_leaf_class()
+    def iterator(self):
+        """
+        Yields leaf class instances (FixedHoliday, NonFixedHoliday...)
+        instead of Holiday ones, in the order of the query.
+
+        All the holidays live in the same table, so each row is given the
+        proxy class of its kind without any further query.
+        """
+        for item in super(HolidayQuerySet, self).iterator():
+            model = HOLIDAY_MODELS.get(item.kind)
+            if model is not None and model is not item.__class__:
+                item.__class__ = model
+            yield item
+
+    def _date_lookup(self, name):
+        """
+        Returns the field name or lookup with 'date' replaced by the date
+        column of the kind of the proxy model, if any.
+        """
+        field = self.model.date_field
+        sign, bare = u'', name
+        if name.startswith(u'-'):
+            sign, bare = u'-', name[1:]
+        if field is None or not (bare == u'date' or
+                                 bare.startswith(u'date__')):
+            return name
+        return sign + field + bare[len(u'date'):]
+
+    def _date_q(self, node):
+        """
+        Returns a copy of the Q object with the 'date' lookups of its
+        children rewritten like _date_lookup() does.
+        """
+        clone = models.Q()
+        clone.connector = node.connector
+        clone.negated = node.negated
+        clone.children = [
+            self._date_q(child) if isinstance(child, models.Q)
+            else (self._date_lookup(child[0]), child[1])
+            for child in node.children
+        ]
+        return clone
+
+    def _filter_or_exclude(self, negate, *args, **kwargs):
+        args = [self._date_q(arg) if isinstance(arg, models.Q) else arg
+                for arg in args]
+        kwargs = dict((self._date_lookup(name), value)
+                      for name, value in kwargs.items())
+        return super(HolidayQuerySet, self)._filter_or_exclude(
+            negate, *args, **kwargs)
+
+    def order_by(self, *field_names):
+        return super(HolidayQuerySet, self).order_by(
+            *[self._date_lookup(name) for name in field_names])
+
+    def values(self, *fields):
+        return super(HolidayQuerySet, self).values(
+            *[self._date_lookup(name) for name in fields])
+
+    def values_list(self, *fields, **kwargs):
+        return super(HolidayQuerySet, self).values_list(
+            *[self._date_lookup(name) for name in fields], **kwargs)
+
+    def update(self, **kwargs):
+        return super(HolidayQuerySet, self).update(
+            **dict((self._date_lookup(name), value)
+                   for name, value in kwargs.items()))
 
     def get_fixed(self):
-        return self.filter(content_type=ContentType.objects.get_for_model(FixedHoliday))
+        return self.filter(kind=FIXED)
 
     def get_nonfixed(self):
-        return self.filter(content_type=ContentType.objects.get_for_model(NonFixedHoliday))
+        return self.filter(kind=NONFIXED)
+
+    def get_year(self, year):
+        """
+        Returns the fixed holidays and the non fixed holidays of the given
+        year, fetched with a single query.
+        """
+        return self.filter(
+            models.Q(kind=FIXED) |
+            models.Q(kind=NONFIXED,
+                     nonfixed_date__range=(datetime.date(year, 1, 1),
+                                           datetime.date(year, 12, 31)))
+        )
 
-    def get_get_year(self, year):
-        return self.get_fixed() | self.get_nonfixed().filter(date__year=year)
+    def dates_for_year(self, year):
+        """
+        Returns the set of the holiday dates of the given year, fixed
+        holidays being resolved for that year.
+        """
+        dates = set()
+        for ordinal, nonfixed in self.get_year(year).values_list(
+                'ordinal', 'nonfixed_date'):
+            if nonfixed is not None:
+                dates.add(nonfixed)
+            elif ordinal is not None:
+                try:
+                    dates.add(ordinal_to_date(ordinal, year))
+                except ValueError:
+                    # 29/02 outside leap years
+                    continue
+        return dates
 
 class HolidayManager(models.Manager):
+    # Kind of the holidays of the manager, None for all of them
+    kind = None
+
     def get_queryset(self):
-        return HolidayQuerySet(self.model)
+        queryset = HolidayQuerySet(self.model, using=self._db)
+        if self.kind is not None:
+            queryset = queryset.filter(kind=self.kind)
+        return queryset
     
     def get_fixed(self):
         return self.get_queryset().get_fixed()
@@ -41,25 +157,112 @@ class HolidayManager(models.Manager):
     def get_nonfixed(self):
         return self.get_queryset().get_nonfixed()
 
-    def get_year(self, year=datetime.date.today().year):
+    def get_year(self, year=None):
+        if year is None:
+            year = datetime.date.today().year
         return self.get_queryset().get_year(year=year)
 
+    def dates_for_year(self, year=None):
+        if year is None:
+            year = datetime.date.today().year
+        return self.get_queryset().dates_for_year(year=year)
+
+
+class FixedHolidayManager(HolidayManager):
+    kind = FIXED
+
+
+class NonFixedHolidayManager(HolidayManager):
+    kind = NONFIXED
+
+
 class Holiday(models.Model):
-    content_type = models.ForeignKey(ContentType, editable=False, null=True)
+    """
+    Holidays of every kind, stored in a single table.
+
+    The kind column tells which of the per-kind columns are used, and
+    the FixedHoliday and NonFixedHoliday proxies present each kind with
+    its own 'date' attribute, validation and ordering.
+    """
+    KIND_CHOICES = (
+        (FIXED, _(u'Fixed')),
+        (NONFIXED, _(u'Non fixed')),
+    )
+
+    kind = models.CharField(_(u'kind'), max_length=8, choices=KIND_CHOICES,
+                            editable=False, db_index=True)
+    name = models.CharField(_(u'name'), max_length=255)
+    # Fixed holidays
+    fixed_date = models.CharField(_(u'date'), max_length=5,
+                                  validators=[RegexValidator(
+                                      regex=FIXED_DATE_REGEX)
+                                  ],
+                                  null=True,
+                                  blank=True,
+                                  unique=True)
+    ordinal = models.PositiveSmallIntegerField(_(u'ordinal'),
+                                               editable=False,
+                                               null=True,
+                                               blank=True,
+                                               unique=True)
+    # Non fixed holidays
+    nonfixed_date = models.DateField(_(u'date'), null=True, blank=True,
+                                     unique=True)
+
+    # Kind of the proxy models, and the column of their date
+    holiday_kind = None
+    date_field = None
 
     class Meta:
         verbose_name = _('Holiday')
         verbose_name_plural = _('Holidays')
 
-    def save(self, *args, **kwargs):
-        if not self.content_type:
-            self.content_type = ContentType.objects.get_for_model(self.__class__)
-        super(Holiday, self).save(*args, **kwargs)
+    def __unicode__(self):
+        return u'%s' % self.name
+
+    def __init__(self, *args, **kwargs):
+        super(Holiday, self).__init__(*args, **kwargs)
+        if self.holiday_kind is not None:
+            self.kind = self.holiday_kind
+
+    def _date_field(self):
+        if self.date_field is not None:
+            return self.date_field
+        model = HOLIDAY_MODELS.get(self.kind)
+        if model is None:
+            # Lets getattr() and hasattr() tell that there is no date
+            raise AttributeError(u'Holiday without a kind has no date')
+        return model.date_field
+
+    def _get_date(self):
+        return getattr(self, self._date_field())
+
+    def _set_date(self, value):
+        setattr(self, self._date_field(), value)
+
+    # 'DD/MM' for fixed holidays, a date for non fixed ones
+    date = property(_get_date, _set_date)
+
+    def clean_fields(self, exclude=None):
+        errors = {}
+        try:
+            super(Holiday, self).clean_fields(exclude=exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+        # The date column of the kind is only required for that kind
+        field = self.date_field
+        if (field is not None and field not in (exclude or ()) and
+                field not in errors and
+                getattr(self, field) in self._meta.get_field(
+                    field).empty_values):
+            errors[field] = [self._meta.get_field(
+                field).error_messages['blank']]
+        if errors:
+            raise ValidationError(errors)
 
     def as_leaf_class(self):
-        content_type = self.content_type
-        model = content_type.model_class()
-        if (model == Holiday):
+        model = HOLIDAY_MODELS.get(self.kind)
+        if model is None or isinstance(self, model):
             return self
         return model.objects.get(id=self.id)
 
@@ -67,40 +270,57 @@ class Holiday(models.Model):
 
 
 class FixedHoliday(Holiday):
-    name = models.CharField(_(u'name'), max_length='255', unique=True)
-    date = models.CharField(_(u'date'), max_length='5',
-                            validators=[RegexValidator(
-                                regex=r'^(\d{2})\\(\d{2})$')
-                            ],
-                            unique=True)
+    holiday_kind = FIXED
+    date_field = 'fixed_date'
 
-    objects = models.Manager()
+    objects = FixedHolidayManager()
 
     class Meta:
+        proxy = True
         verbose_name = _('Fixed Holiday')
         verbose_name_plural = _('Fixed Holidays')
-
-    def __unicode__(self):
-        return u'%s' % self.name
+        ordering = ('ordinal',)
 
     def save(self, *args, **kwargs):
         self.name = self.name.title()
+        self.ordinal = fixed_date_to_ordinal(self.date)
         super(FixedHoliday, self).save(*args, **kwargs)
 
+    def _get_unique_checks(self, exclude=None):
+        unique_checks, date_checks = super(
+            FixedHoliday, self)._get_unique_checks(exclude=exclude)
+        # Names are unique among the fixed holidays only, which a partial
+        # unique index enforces (migration 0003, to recreate if SQLite
+        # ever rebuilds the table). Checked against the manager of the
+        # fixed holidays.
+        if 'name' not in (exclude or ()):
+            unique_checks.append((FixedHoliday, ('name',)))
+        return unique_checks, date_checks
+
+    def date_for_year(self, year):
+        """
+        Returns the date of the holiday for the given year.
+        """
+        return ordinal_to_date(self.ordinal, year)
+
     def clean(self):
         if self.date is not None:
-            date = unicode(self.date)
-            regex = re.compile(r'^(\d{2})\\(\d{2})$')
-            if regex.match(date) is None:
+            match = re.match(FIXED_DATE_REGEX, unicode(self.date))
+            if match is None:
                 raise ValidationError(
                     _(u'Invalid format : please use the '
                       u'following format \'DD/MM\' to define date.'))
-            date_components = date.split(u'/')
-            day = int(date_components[0])
-            month = int(date_components[1])
+            day = int(match.group(1))
+            month = int(match.group(2))
+            if month < 1:
+                raise ValidationError(
+                    _(u'Month number cannot be lower than 1.'))
             if month > 12:
                 raise ValidationError(
                     _(u'Month number cannot be greater than 12.'))
+            if day < 1:
+                raise ValidationError(
+                    _(u'Day number cannot be lower than 1.'))
             if month in [1, 3, 5, 7, 8, 10, 12]:
                 if day > 31:
                     raise ValidationError(
@@ -117,21 +337,27 @@ class FixedHoliday(Holiday):
                         raise ValidationError(
                             _(u'Day number cannot be greater than '
                               u'30 for this month.'))
+            self.ordinal = month * 100 + day
 
 
 class NonFixedHoliday(Holiday):
-    name = models.CharField(_(u'name'), max_length='255')
-    date = models.DateField(_(u'date'), unique=True)
+    holiday_kind = NONFIXED
+    date_field = 'nonfixed_date'
 
-    objects = models.Manager()
+    objects = NonFixedHolidayManager()
 
     class Meta:
+        proxy = True
         verbose_name = _('Non Fixed Holiday')
         verbose_name_plural = _('Non Fixed Holidays')
 
-    def __unicode__(self):
-        return u'%s' % self.name
-
     def save(self, *args, **kwargs):
         self.name = self.name.title()
         super(NonFixedHoliday, self).save(*args, **kwargs)
+
+
+# Proxy model of each kind of holiday
+HOLIDAY_MODELS = {
+    FIXED: FixedHoliday,
+    NONFIXED: NonFixedHoliday,
+}
@@ -0,0 +1,23 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+# React modules
+from parameters.models import (
+    Holiday,
+    FixedHoliday,
+    NonFixedHoliday
+)
+from parameters.cache import holiday_calendar
+
+
+# Receivers are bound to the holiday models only, so that deleting other
+# models keeps using fast deletes.
+@receiver([post_save, post_delete], sender=Holiday)
+@receiver([post_save, post_delete], sender=FixedHoliday)
+@receiver([post_save, post_delete], sender=NonFixedHoliday)
+def invalidate_holiday_calendar(sender, **kwargs):
+    """
+    Invalidates the holiday calendar cache when a holiday changes.
+    """
+    holiday_calendar.invalidate()
@@ -0,0 +1,18 @@
+# -*- coding: utf8 -*-
+# React modules
+from parameters.cache import holiday_calendar
+from parameters.views import RENDERERS, cached_calendar
+
+
+def render_calendars(job, years):
+    """
+    Renders the calendars of the given years in every format into the
+    cache, so that the calendar endpoint serves them without querying the
+    database.
+    """
+    version = holiday_calendar.version()
+    steps = [(year, format) for year in years for format in sorted(RENDERERS)]
+    for done, (year, format) in enumerate(steps, 1):
+        cached_calendar(version, year, format)
+        job.set_progress(done, len(steps))
+    return len(steps)
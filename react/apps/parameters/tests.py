@@ -1,17 +1,31 @@
 # -*- coding: utf8 -*-
 # Built-in modules
+import json
 import datetime
 # Django modules
 from django.test import TestCase
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
 # React modules
 from parameters.models import (
     Holiday,
     FixedHoliday,
     NonFixedHoliday
 )
+from parameters.cache import (
+    VERSION_KEY,
+    holiday_calendar,
+    holidays_for_year,
+    is_holiday
+)
+from parameters.workingdays import (
+    count_working_days,
+    is_working_day
+)
 
 
 class FixedHolidayModelTest(TestCase):
@@ -173,6 +187,48 @@ class FixedHolidayModelTest(TestCase):
             pk=1
         )
 
+    def test_f_date_is_stored_as_an_ordinal(self):
+        """
+        Tests that holiday dates are materialised as MMDD integers which
+        resolve dates and sort holidays in the calendar order.
+        """
+        fholiday = FixedHoliday(
+            name=u'Noël',
+            date=u'25/12'
+        )
+        fholiday.full_clean()
+        fholiday.save()
+        FixedHoliday.objects.create(
+            name=u'Fête du Travail',
+            date=u'01/05'
+        )
+        self.assertEqual(
+            FixedHoliday.objects.get(name=u'Noël').ordinal,
+            1225
+        )
+        self.assertEqual(
+            fholiday.date_for_year(2014),
+            datetime.date(2014, 12, 25)
+        )
+        self.assertEqual(
+            list(FixedHoliday.objects.values_list('date', flat=True)),
+            [u'01/01', u'01/05', u'25/12']
+        )
+        self.assertEqual(
+            list(FixedHoliday.objects.filter(
+                ordinal__range=(200, 1231)).values_list('date', flat=True)),
+            [u'01/05', u'25/12']
+        )
+        fholiday = FixedHoliday(
+            name=u'Test',
+            date=u'00/05'
+        )
+        self.assertRaises(
+            ValidationError,
+            FixedHoliday.full_clean,
+            fholiday
+        )
+
 
 class NonNonFixedHolidayModelTest(TestCase):
 
@@ -296,7 +352,10 @@ class HolidayModelTest(TestCase):
         nonfixed_holidays = Holiday.objects.get_year(year=2014).get_nonfixed()
         self.assertEqual(
             nonfixed_holidays[0].date,
-            datetime.date(2014, 1, 1)
+            datetime.date(2014, 4, 21)
+        )
+        self.assertFalse(
+            Holiday.objects.get_year(year=2015).get_nonfixed().exists()
         )
 
     def test_c_holidays_are_simple_to_fetch(self):
@@ -312,7 +371,346 @@ class HolidayModelTest(TestCase):
         )
         self.assertIn(
             FixedHoliday.objects.get(
-                pk=1
+                name=u'Nouvel An'
             ),
             holidays
         )
+        self.assertEqual(
+            Holiday.objects.dates_for_year(year=2014),
+            set([datetime.date(2014, 1, 1), datetime.date(2014, 4, 21)])
+        )
+        self.assertEqual(
+            Holiday.objects.dates_for_year(year=2015),
+            set([datetime.date(2015, 1, 1)])
+        )
+        with self.assertNumQueries(1):
+            Holiday.objects.dates_for_year(year=2016)
+
+    def test_d_holidays_are_resolved_in_batches(self):
+        """
+        Tests that iterating over holidays costs a single query whatever
+        their kinds, each row getting the proxy class of its kind, and
+        keeps the query order.
+        """
+        for day in range(1, 11):
+            NonFixedHoliday.objects.create(
+                name=u'Test %d' % day,
+                date=datetime.date(2015, 3, day)
+            )
+            FixedHoliday.objects.create(
+                name=u'Test %d' % day,
+                date=u'%02d/03' % day
+            )
+        with self.assertNumQueries(1):
+            holidays = list(Holiday.objects.order_by('-pk'))
+        self.assertEqual(
+            [h.pk for h in holidays],
+            list(Holiday.objects.order_by('-pk').values_list('pk', flat=True))
+        )
+        for h in holidays:
+            self.assertIsInstance(
+                h,
+                (FixedHoliday, NonFixedHoliday)
+            )
+        with self.assertNumQueries(1):
+            holidays = Holiday.objects.order_by('pk')[2:6]
+            self.assertEqual(
+                [h.pk for h in holidays],
+                [3, 4, 5, 6]
+            )
+        with self.assertNumQueries(1):
+            self.assertIsInstance(
+                Holiday.objects.order_by('pk')[1],
+                FixedHoliday
+            )
+
+    def test_e_holidays_share_a_single_table(self):
+        """
+        Tests that holidays of every kind live in the same table, told
+        apart by their kind, and that names are only unique among the
+        fixed holidays.
+        """
+        NonFixedHoliday.objects.create(
+            name=u'Pâques',
+            date=datetime.date(2015, 4, 6)
+        )
+        self.assertEqual(
+            sorted(Holiday.objects.values_list('kind', flat=True)),
+            [u'fixed', u'nonfixed', u'nonfixed']
+        )
+        self.assertEqual(
+            NonFixedHoliday.objects.filter(
+                date__year=2015).get().date,
+            datetime.date(2015, 4, 6)
+        )
+        self.assertFalse(
+            FixedHoliday.objects.filter(name=u'Pâques').exists()
+        )
+        self.assertEqual(
+            list(FixedHoliday.objects.filter(
+                Q(date=u'01/01') | ~Q(date__gte=u'00/00')).values_list(
+                    'name', flat=True)),
+            [u'Nouvel An']
+        )
+        fholiday = FixedHoliday(
+            name=u'Pâques',
+            date=u'14/07'
+        )
+        fholiday.full_clean()
+        fholiday.save()
+        fholiday = FixedHoliday(
+            name=u'Pâques',
+            date=u'15/08'
+        )
+        self.assertRaises(
+            ValidationError,
+            FixedHoliday.full_clean,
+            fholiday
+        )
+        with transaction.atomic():
+            self.assertRaises(
+                IntegrityError,
+                FixedHoliday.objects.create,
+                name=u'Pâques',
+                date=u'15/08'
+            )
+        self.assertEqual(
+            Holiday.objects.get(name=u'Nouvel An').date, u'01/01')
+        self.assertEqual(getattr(Holiday(), 'date', None), None)
+        self.assertFalse(hasattr(Holiday(), 'date'))
+
+
+class HolidayCalendarCacheTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        NonFixedHoliday.objects.create(
+            name=u'Pâques',
+            date=datetime.date(2014, 4, 21)
+        )
+        FixedHoliday.objects.create(
+            name=u'Nouvel An',
+            date=u'01/01'
+        )
+
+    def test_a_holidays_are_resolved_for_a_year(self):
+        """
+        Tests that fixed and non fixed holidays are resolved to the dates
+        of the requested year.
+        """
+        self.assertEqual(
+            holidays_for_year(2014),
+            frozenset([datetime.date(2014, 1, 1), datetime.date(2014, 4, 21)])
+        )
+        self.assertEqual(
+            holidays_for_year(2015),
+            frozenset([datetime.date(2015, 1, 1)])
+        )
+
+    def test_b_warm_cache_costs_no_query(self):
+        """
+        Tests that lookups on a warm cache do not hit the database.
+        """
+        holidays_for_year(2014)
+        with self.assertNumQueries(0):
+            self.assertTrue(is_holiday(datetime.date(2014, 4, 21)))
+            self.assertTrue(is_holiday(datetime.date(2014, 1, 1)))
+            self.assertFalse(is_holiday(datetime.date(2014, 1, 2)))
+
+    def test_c_cache_is_invalidated_on_holiday_changes(self):
+        """
+        Tests that saving or deleting a holiday invalidates the cache.
+        """
+        self.assertFalse(is_holiday(datetime.date(2014, 12, 25)))
+        fholiday = FixedHoliday.objects.create(
+            name=u'Noël',
+            date=u'25/12'
+        )
+        self.assertTrue(is_holiday(datetime.date(2014, 12, 25)))
+        fholiday.delete()
+        self.assertFalse(is_holiday(datetime.date(2014, 12, 25)))
+        nfholiday = NonFixedHoliday.objects.get(name=u'Pâques')
+        nfholiday.date = datetime.date(2014, 4, 22)
+        nfholiday.save()
+        self.assertFalse(is_holiday(datetime.date(2014, 4, 21)))
+        self.assertTrue(is_holiday(datetime.date(2014, 4, 22)))
+
+    def test_d_cache_follows_the_shared_version(self):
+        """
+        Tests that a version bumped by another process drops the dates
+        cached by this one.
+        """
+        self.assertFalse(is_holiday(datetime.date(2014, 5, 1)))
+        # Simulates a change made by another process
+        NonFixedHoliday.objects.filter(name=u'Pâques').update(
+            date=datetime.date(2014, 5, 1))
+        cache.incr(VERSION_KEY)
+        self.assertTrue(is_holiday(datetime.date(2014, 5, 1)))
+
+
+
+class HolidayCalendarViewTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        NonFixedHoliday.objects.create(
+            name=u'Pâques',
+            date=datetime.date(2014, 4, 21)
+        )
+        FixedHoliday.objects.create(
+            name=u'Nouvel An',
+            date=u'01/01'
+        )
+        self.url = reverse('parameters_calendar', args=('2014', 'json'))
+
+    def test_a_calendar_is_served_as_json_and_icalendar(self):
+        """
+        Tests that the holidays of a year are served as JSON and as
+        iCalendar.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {
+            'year': 2014,
+            'holidays': [
+                {'date': '2014-01-01', 'name': u'Nouvel An'},
+                {'date': '2014-04-21', 'name': u'Pâques'},
+            ],
+        })
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age', response['Cache-Control'])
+        response = self.client.get(
+            reverse('parameters_calendar', args=('2014', 'ics')))
+        self.assertEqual(response['Content-Type'],
+                         'text/calendar; charset=utf-8')
+        lines = response.content.split(b'\r\n')
+        self.assertEqual(lines[0], b'BEGIN:VCALENDAR')
+        self.assertIn(b'DTSTART;VALUE=DATE:20140421', lines)
+        self.assertIn(u'SUMMARY:Pâques'.encode('utf-8'), lines)
+
+    def test_b_unchanged_calendar_costs_no_query(self):
+        """
+        Tests that a known calendar is answered with 304 and a cached one
+        is served again, both without hitting the database.
+        """
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(json.loads(response.content)['holidays']), 2)
+
+    def test_c_calendar_follows_holiday_changes(self):
+        """
+        Tests that changing a holiday changes the ETag and the calendar.
+        """
+        etag = self.client.get(self.url)['ETag']
+        FixedHoliday.objects.create(
+            name=u'Noël',
+            date=u'25/12'
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(json.loads(response.content)['holidays']), 3)
+
+    def test_d_years_out_of_range_are_not_found(self):
+        """
+        Tests that years which dates cannot hold are not found, and that
+        the first and last years are rendered.
+        """
+        response = self.client.get(
+            reverse('parameters_calendar', args=('0000', 'json')))
+        self.assertEqual(response.status_code, 404)
+        FixedHoliday.objects.create(
+            name=u'Saint-Sylvestre',
+            date=u'31/12'
+        )
+        for year in ('0001', '9999'):
+            response = self.client.get(
+                reverse('parameters_calendar', args=(year, 'ics')))
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'DTSTART;VALUE=DATE:%s1231' % year,
+                          response.content)
+
+
+class WorkingDaysTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        NonFixedHoliday.objects.create(
+            name=u'Pâques',
+            date=datetime.date(2014, 4, 21)
+        )
+        FixedHoliday.objects.create(
+            name=u'Nouvel An',
+            date=u'01/01'
+        )
+        FixedHoliday.objects.create(
+            name=u'Noël',
+            date=u'25/12'
+        )
+
+    def test_a_weekends_and_holidays_are_not_working_days(self):
+        """
+        Tests that weekends and holidays are excluded from working days.
+        """
+        self.assertTrue(is_working_day(datetime.date(2014, 1, 2)))
+        self.assertFalse(is_working_day(datetime.date(2014, 1, 1)))
+        self.assertFalse(is_working_day(datetime.date(2014, 1, 4)))
+        self.assertFalse(is_working_day(datetime.date(2014, 1, 5)))
+        self.assertFalse(is_working_day(datetime.date(2014, 4, 21)))
+        self.assertEqual(
+            count_working_days(
+                datetime.date(2014, 1, 1),
+                datetime.date(2014, 1, 31)
+            ),
+            22
+        )
+        self.assertEqual(
+            count_working_days(
+                datetime.date(2014, 1, 4),
+                datetime.date(2014, 1, 5)
+            ),
+            0
+        )
+        self.assertEqual(
+            count_working_days(
+                datetime.date(2014, 1, 31),
+                datetime.date(2014, 1, 1)
+            ),
+            0
+        )
+
+    def test_b_count_matches_a_day_by_day_count(self):
+        """
+        Tests that counting working days over ranges of various lengths
+        and bounds gives the same result as walking day by day.
+        """
+        origin = datetime.date(2013, 12, 20)
+        days = [origin + datetime.timedelta(days=i) for i in range(800)]
+        flags = [is_working_day(day) for day in days]
+        for first in range(0, 30):
+            for last in range(first, 800, 37):
+                self.assertEqual(
+                    count_working_days(days[first], days[last]),
+                    sum(flags[first:last + 1])
+                )
+
+    def test_c_count_costs_no_query_on_a_warm_cache(self):
+        """
+        Tests that counting working days over several years only queries
+        the database to warm the holiday calendar.
+        """
+        count_working_days(
+            datetime.date(2013, 1, 1),
+            datetime.date(2016, 12, 31)
+        )
+        with self.assertNumQueries(0):
+            count_working_days(
+                datetime.date(2013, 3, 1),
+                datetime.date(2016, 6, 30)
+            )
@@ -0,0 +1,6 @@
+from django.conf.urls import patterns, url
+
+urlpatterns = patterns('parameters.views',
+    url(r'^calendar/(?P<year>\d{4})\.(?P<format>json|ics)$',
+        'holiday_calendar_view', name='parameters_calendar'),
+)
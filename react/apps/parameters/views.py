@@ -1,3 +1,134 @@
-from django.shortcuts import render
+# -*- coding: utf8 -*-
+# Built-in modules
+import json
+import datetime
+# Django modules
+from django.http import HttpResponse, HttpResponseNotModified, Http404
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+# React modules
+from parameters.models import Holiday, FixedHoliday
+from parameters.cache import holiday_calendar
 
-# Create your views here.
+# Seconds during which clients and proxies reuse a calendar without
+# revalidating it
+MAX_AGE = 300
+
+# Seconds during which a rendered calendar is kept in the cache. Entries
+# are keyed by calendar version, so stale ones are never read again.
+CACHE_TIMEOUT = 24 * 60 * 60
+
+RESPONSE_KEY = u'parameters:calendar:%s:%s:%s'
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'ics': 'text/calendar; charset=utf-8',
+}
+
+
+def holidays_of_year(year):
+    """
+    Returns the sorted (date, name) holidays of the given year.
+    """
+    holidays = []
+    for holiday in Holiday.objects.get_year(year):
+        if isinstance(holiday, FixedHoliday):
+            try:
+                date = holiday.date_for_year(year)
+            except ValueError:
+                # 29/02 outside leap years
+                continue
+        else:
+            date = holiday.date
+        holidays.append((date, holiday.name))
+    return sorted(holidays)
+
+
+def render_json(year, holidays):
+    return json.dumps({
+        'year': year,
+        'holidays': [{'date': date.isoformat(), 'name': name}
+                     for date, name in holidays],
+    }, sort_keys=True)
+
+
+def ics_escape(text):
+    for char, escaped in ((u'\\', u'\\\\'), (u';', u'\\;'),
+                          (u',', u'\\,'), (u'\n', u'\\n')):
+        text = text.replace(char, escaped)
+    return text
+
+
+def ics_date(date):
+    # strftime() does not handle the years before 1900
+    return u'%04d%02d%02d' % (date.year, date.month, date.day)
+
+
+def render_ics(year, holidays):
+    lines = [
+        u'BEGIN:VCALENDAR',
+        u'VERSION:2.0',
+        u'PRODID:-//React//Holidays %d//FR' % year,
+        u'CALSCALE:GREGORIAN',
+    ]
+    for date, name in holidays:
+        day = ics_date(date)
+        lines.extend([
+            u'BEGIN:VEVENT',
+            u'UID:%s@react.holidays' % day,
+            # Stamped with the holiday itself to keep the body stable
+            u'DTSTAMP:%sT000000Z' % day,
+            u'DTSTART;VALUE=DATE:%s' % day,
+            # Rather than the next day as DTEND, which 31/12/9999 lacks
+            u'DURATION:P1D',
+            u'SUMMARY:%s' % ics_escape(name),
+            u'TRANSP:TRANSPARENT',
+            u'END:VEVENT',
+        ])
+    lines.append(u'END:VCALENDAR')
+    return (u'\r\n'.join(lines) + u'\r\n').encode('utf-8')
+
+
+RENDERERS = {
+    'json': render_json,
+    'ics': render_ics,
+}
+
+
+def cached_calendar(version, year, format):
+    """
+    Returns the rendered calendar of the year for the given calendar
+    version, rendering and caching it if needed.
+    """
+    key = RESPONSE_KEY % (version, year, format)
+    body = cache.get(key)
+    if body is None:
+        body = RENDERERS[format](year, holidays_of_year(year))
+        cache.set(key, body, CACHE_TIMEOUT)
+    return body
+
+
+@require_safe
+def holiday_calendar_view(request, year, format):
+    """
+    Returns the holidays of the year as JSON or iCalendar.
+
+    The ETag is derived from the shared calendar version, so a matching
+    If-None-Match is answered without building the calendar, and the
+    rendered calendar is kept in the cache until the version changes.
+    """
+    year = int(year)
+    if not datetime.MINYEAR <= year <= datetime.MAXYEAR:
+        raise Http404
+    version = holiday_calendar.version()
+    etag = '"%s-%d-%s"' % (version, year, format)
+    if etag in [tag.strip() for tag in
+                request.META.get('HTTP_IF_NONE_MATCH', '').split(',')]:
+        response = HttpResponseNotModified()
+    else:
+        body = cached_calendar(version, year, format)
+        response = HttpResponse(body, content_type=CONTENT_TYPES[format])
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
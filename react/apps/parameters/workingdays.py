@@ -0,0 +1,98 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import bisect
+# Third-party modules
+try:
+    import numpy
+except ImportError:
+    numpy = None
+# React modules
+from parameters.cache import (
+    is_holiday,
+    weekday_holidays_for_year
+)
+
+
+def is_working_day(date):
+    """
+    Returns True if the given date is neither a weekend day nor a holiday.
+    """
+    return date.weekday() < 5 and not is_holiday(date)
+
+
+def count_weekdays(start, end):
+    """
+    Returns the number of days from Monday to Friday between start and
+    end, both included.
+    """
+    if start > end:
+        return 0
+    weeks, remainder = divmod((end - start).days + 1, 7)
+    count = weeks * 5
+    first = start.weekday()
+    for offset in range(remainder):
+        if (first + offset) % 7 < 5:
+            count += 1
+    return count
+
+
+def count_weekday_holidays(start, end):
+    """
+    Returns the number of holidays falling on a weekday between start
+    and end, both included.
+    """
+    count = 0
+    for year in range(start.year, end.year + 1):
+        holidays = weekday_holidays_for_year(year)
+        low = 0
+        high = len(holidays)
+        if year == start.year:
+            low = bisect.bisect_left(holidays, start)
+        if year == end.year:
+            high = bisect.bisect_right(holidays, end)
+        count += max(high - low, 0)
+    return count
+
+
+def count_working_days(start, end):
+    """
+    Returns the number of working days between start and end, both
+    included: weekends and holidays are excluded.
+    """
+    if start > end:
+        return 0
+    return count_weekdays(start, end) - count_weekday_holidays(start, end)
+
+
+def weekday_holidays_between(first_year, last_year):
+    """
+    Returns the sorted list of the holidays falling on a weekday from
+    the first to the last given years, both included.
+    """
+    holidays = []
+    for year in range(first_year, last_year + 1):
+        holidays.extend(weekday_holidays_for_year(year))
+    return holidays
+
+
+def bulk_count_working_days(starts, ends):
+    """
+    Returns the list of the numbers of working days between each pair of
+    start and end dates, both included.
+
+    Counts are computed in one pass with NumPy's business day functions
+    when NumPy is installed, and pair by pair otherwise.
+    """
+    starts = list(starts)
+    ends = list(ends)
+    if not starts:
+        return []
+    if numpy is None:
+        return [count_working_days(s, e) for s, e in zip(starts, ends)]
+    holidays = weekday_holidays_between(
+        min(starts).year, max(ends).year)
+    counts = numpy.busday_count(
+        numpy.array(starts, dtype='datetime64[D]'),
+        numpy.array(ends, dtype='datetime64[D]') + numpy.timedelta64(1, 'D'),
+        holidays=numpy.array(holidays, dtype='datetime64[D]'))
+    return numpy.clip(counts, 0, None).tolist()
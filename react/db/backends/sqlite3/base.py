@@ -0,0 +1,43 @@
+# -*- coding: utf8 -*-
+"""
+SQLite backend tuned for concurrent access.
+
+The given PRAGMAs are run on every new connection. By default they
+switch the database to write-ahead logging, so that readers no longer
+block the writer, relax the synchronisation to once per checkpoint,
+wait for locks instead of failing with "database is locked", and read
+the file through memory-mapped I/O.
+
+They can be replaced through the 'pragmas' entry of the database OPTIONS,
+as a sequence of (name, value) pairs.
+"""
+# Django modules
+from django.db.backends.sqlite3.base import (
+    DatabaseWrapper as SQLiteDatabaseWrapper
+)
+
+DEFAULT_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    # Milliseconds
+    ('busy_timeout', 5000),
+    # Bytes
+    ('mmap_size', 256 * 1024 * 1024),
+)
+
+
+class DatabaseWrapper(SQLiteDatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super(DatabaseWrapper, self).get_connection_params()
+        # Not an argument of sqlite3.connect()
+        kwargs.pop('pragmas', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super(DatabaseWrapper, self).get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas',
+                                                    DEFAULT_PRAGMAS)
+        for name, value in pragmas:
+            conn.execute('PRAGMA %s = %s' % (name, value)).fetchall()
+        return conn
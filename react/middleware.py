@@ -0,0 +1,183 @@
+# -*- coding: utf8 -*-
+"""
+Request-level performance instrumentation.
+
+PerformanceMiddleware measures the wall time of each request, the number
+of queries and the time spent in the database, and reports them in a
+Server-Timing header and a log line of the 'react.performance' logger.
+Streaming responses run the queries of their body after the middleware,
+so they are measured until the stream is over and only logged, their
+headers being sent already. Requests over the thresholds below, or
+running the same SQL statement over and over (typically an N+1 pattern),
+are logged as warnings:
+
+- PERFORMANCE_SLOW_REQUEST: milliseconds (default 500);
+- PERFORMANCE_MAX_QUERIES: queries per request (default 50);
+- PERFORMANCE_REPEATED_QUERIES: runs of the same statement (default 10).
+"""
+# Built-in modules
+import re
+import time
+import logging
+# Django modules
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('react.performance')
+
+IN_LIST_REGEX = re.compile(r'\bIN \([^)]*\)', re.IGNORECASE)
+LITERAL_REGEX = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def sql_shape(sql):
+    """
+    Returns the statement with its literals and IN lists collapsed, so that
+    the same query run with other parameters has the same shape.
+    """
+    return LITERAL_REGEX.sub(u'?', IN_LIST_REGEX.sub(u'IN (...)', sql))
+
+
+class QueryStats(object):
+    """
+    Number, duration and shapes of the queries run during a request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = {}
+
+    def record(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        shape = sql_shape(sql)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def most_repeated(self):
+        """
+        Returns the (shape, count) of the most run statement.
+        """
+        if not self.shapes:
+            return None, 0
+        return max(self.shapes.items(), key=lambda item: item[1])
+
+
+class TimedCursor(object):
+    """
+    Database cursor recording the duration of its statements.
+    """
+
+    def __init__(self, cursor, stats):
+        self.cursor = cursor
+        self.stats = stats
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def execute(self, sql, *args):
+        started = time.time()
+        try:
+            return self.cursor.execute(sql, *args)
+        finally:
+            self.stats.record(sql, time.time() - started)
+
+    def executemany(self, sql, *args):
+        started = time.time()
+        try:
+            return self.cursor.executemany(sql, *args)
+        finally:
+            self.stats.record(sql, time.time() - started)
+
+
+def instrument(connection, stats):
+    """
+    Makes the cursors of the connection record their statements into
+    stats, until uninstrument() is called.
+    """
+    # Left over by a stream which was never consumed
+    uninstrument(connection)
+    create_cursor = connection._cursor
+    connection._cursor = lambda: TimedCursor(create_cursor(), stats)
+
+
+def uninstrument(connection):
+    connection.__dict__.pop('_cursor', None)
+
+
+class PerformanceMiddleware(object):
+
+    def process_request(self, request):
+        stats = QueryStats()
+        for connection in connections.all():
+            instrument(connection, stats)
+        request._performance = (time.time(), stats)
+
+    def process_response(self, request, response):
+        try:
+            started, stats = request._performance
+        except AttributeError:
+            # A previous middleware answered before process_request
+            return response
+        if response.streaming:
+            response.streaming_content = self.measure_stream(
+                request, response, response.streaming_content, started,
+                stats)
+            return response
+        total, database = self.report(request, response, started, stats)
+        response['Server-Timing'] = (
+            u'total;dur=%.1f, db;dur=%.1f;desc="%d queries"' % (
+                total, database, stats.count))
+        return response
+
+    def measure_stream(self, request, response, content, started, stats):
+        """
+        Yields the chunks of the streamed content, then reports the
+        request once the stream is over.
+        """
+        try:
+            for chunk in content:
+                yield chunk
+        finally:
+            self.report(request, response, started, stats)
+
+    def report(self, request, response, started, stats):
+        """
+        Stops the measure of the request and logs its figures. Returns its
+        total duration and the time spent in the database, in milliseconds.
+        """
+        for connection in connections.all():
+            uninstrument(connection)
+        total = (time.time() - started) * 1000
+        database = stats.duration * 1000
+        shape, repeated = stats.most_repeated()
+        flags = []
+        if total > getattr(settings, 'PERFORMANCE_SLOW_REQUEST', 500):
+            flags.append(u'slow')
+        if stats.count > getattr(settings, 'PERFORMANCE_MAX_QUERIES', 50):
+            flags.append(u'queries')
+        if repeated >= getattr(settings, 'PERFORMANCE_REPEATED_QUERIES', 10):
+            flags.append(u'n+1')
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total, 1),
+            'db_ms': round(database, 1),
+            'queries': stats.count,
+            'repeated': repeated,
+            'flags': flags,
+        }
+        message = (u'method=%(method)s path=%(path)s status=%(status)d '
+                   u'total_ms=%(total_ms).1f db_ms=%(db_ms).1f '
+                   u'queries=%(queries)d repeated=%(repeated)d' % record)
+        if flags:
+            message += u' flags=%s' % u','.join(flags)
+            if u'n+1' in flags:
+                message += u' statement="%s"' % shape
+            logger.warning(message, extra={'performance': record})
+        else:
+            logger.info(message, extra={'performance': record})
+        return total, database
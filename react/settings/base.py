@@ -54,9 +54,12 @@ INSTALLED_APPS = (
     # React apps
     'business',
     'parameters',
+    'activity',
+    'jobs',
 )
 
 MIDDLEWARE_CLASSES = (
+    'react.middleware.PerformanceMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -88,3 +91,26 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 AUTH_USER_MODEL = 'auth.User'
+
+# Performance instrumentation (see react.middleware)
+
+PERFORMANCE_SLOW_REQUEST = 500
+PERFORMANCE_MAX_QUERIES = 50
+PERFORMANCE_REPEATED_QUERIES = 10
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'null': {
+            'class': 'logging.NullHandler',
+        },
+    },
+    'loggers': {
+        'react.performance': {
+            'handlers': ['null'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -1,6 +1,113 @@
 # -*- coding: utf8 -*-
+import os
+import tempfile
+from django.core.exceptions import ImproperlyConfigured
 from react.settings.base import *
 
 WSGI_APPLICATION = 'react.wsgi.prod.application'
 
-STATIC_URL = ''
\ No newline at end of file
+STATIC_URL = ''
+
+# Database
+# Configured from the environment: REACT_DB_ENGINE is either 'postgresql'
+# or 'sqlite' (default), the latter using the tuned SQLite backend.
+
+DB_ENGINE = os.environ.get('REACT_DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql_psycopg2',
+            'NAME': os.environ.get('REACT_DB_NAME', 'react'),
+            'USER': os.environ.get('REACT_DB_USER', ''),
+            'PASSWORD': os.environ.get('REACT_DB_PASSWORD', ''),
+            'HOST': os.environ.get('REACT_DB_HOST', ''),
+            'PORT': os.environ.get('REACT_DB_PORT', ''),
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'react.db.backends.sqlite3',
+            'NAME': os.environ.get('REACT_DB_NAME',
+                                   os.path.join(DB_DIR, 'db.sqlite3')),
+        }
+    }
+
+# Seconds a connection is kept open between requests (0 closes it at the
+# end of each request, as Django does by default)
+DATABASES['default']['CONN_MAX_AGE'] = int(
+    os.environ.get('REACT_DB_CONN_MAX_AGE', 600))
+
+# Cache
+# REACT_CACHE_BACKEND is 'locmem' (default), 'file' or 'memcached', at
+# REACT_CACHE_LOCATION. The version counters of the holiday calendar and
+# of the capacity planner must reach every process: they are kept in the
+# 'versions' cache, whose REACT_VERSIONS_CACHE_BACKEND is 'file' (default)
+# or 'memcached', at REACT_VERSIONS_CACHE_LOCATION. The file cache suits a
+# single host, memcached (python-memcached) increments the counters
+# atomically across hosts.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    # Requires python-memcached
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+}
+
+# Outside of the source tree, one directory per cache
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'react-cache')
+
+
+def cache_settings(name, default_backend, alias):
+    """
+    Returns the settings of a cache from the REACT_<name>_BACKEND and
+    REACT_<name>_LOCATION environment variables.
+    """
+    backend = os.environ.get('REACT_%s_BACKEND' % name, default_backend)
+    if backend not in CACHE_BACKENDS:
+        raise ImproperlyConfigured(
+            'REACT_%s_BACKEND must be one of %s, not %r.' % (
+                name, ', '.join(sorted(CACHE_BACKENDS)), backend))
+    locations = {
+        'locmem': alias,
+        'file': os.path.join(CACHE_DIR, alias),
+        'memcached': '127.0.0.1:11211',
+    }
+    return {
+        'BACKEND': CACHE_BACKENDS[backend],
+        'LOCATION': os.environ.get('REACT_%s_LOCATION' % name,
+                                   locations[backend]),
+        'KEY_PREFIX': 'react',
+    }
+
+
+CACHES = {
+    'default': cache_settings('CACHE', 'locmem', 'default'),
+    'versions': cache_settings('VERSIONS_CACHE', 'file', 'versions'),
+}
+
+if CACHES['versions']['BACKEND'] == CACHE_BACKENDS['locmem']:
+    raise ImproperlyConfigured(
+        'REACT_VERSIONS_CACHE_BACKEND must be shared by every process, '
+        'not locmem.')
+
+# Sessions are read from the cache and written through to the database
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Templates are compiled once per process
+
+TEMPLATE_LOADERS = (
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    )),
+)
+
+# Performance log lines go to the standard error of the workers
+
+LOGGING['handlers']['console'] = {
+    'class': 'logging.StreamHandler',
+}
+LOGGING['loggers']['react.performance']['handlers'] = ['console']
@@ -0,0 +1,52 @@
+# -*- coding: utf8 -*-
+# Django modules
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin(object):
+    """
+    TestCase mixin asserting that the number of queries run by a piece of
+    code does not depend on the number of rows in the database.
+
+    Test cases define populate(size), which creates `size` rows of each
+    model involved. Each size is populated in a savepoint rolled back once
+    its queries are counted, so the sizes do not add up.
+    """
+    # Number of rows of each model seeded for each measure
+    budget_sizes = (5, 50)
+
+    def populate(self, size):
+        raise NotImplementedError
+
+    def count_queries(self, func):
+        """
+        Returns the number of queries run by func(), after a first call
+        warming up the caches.
+        """
+        func()
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return len(context)
+
+    def measure_queries(self, func, size):
+        """
+        Returns the number of queries run by func() with `size` rows.
+        """
+        with transaction.atomic():
+            self.populate(size)
+            count = self.count_queries(func)
+            transaction.set_rollback(True)
+        return count
+
+    def assertQueriesDoNotGrow(self, func, msg=None):
+        """
+        Fails if func() runs more queries on the largest data set than on
+        the smallest one.
+        """
+        counts = [self.measure_queries(func, size)
+                  for size in self.budget_sizes]
+        if len(set(counts)) != 1:
+            self.fail(msg or u'Queries grow with the number of rows: %s' %
+                      u', '.join(u'%d rows: %d' % measure for measure in
+                                 zip(self.budget_sizes, counts)))
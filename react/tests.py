@@ -0,0 +1,449 @@
+# -*- coding: utf8 -*-
+# Built-in modules
+import os
+import shutil
+import logging
+import datetime
+import tempfile
+# Django modules
+from django.db import connection, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf.urls import patterns, url
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import override_settings
+from django.core.urlresolvers import reverse
+from django.core.exceptions import ValidationError
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.signals import request_finished
+# React modules
+from react import versions
+from react.db.backends.sqlite3.base import DatabaseWrapper
+from react.middleware import sql_shape
+from react.testcases import QueryBudgetMixin
+from react.warmup import PHASES, warm_up
+from react.validation import full_clean_batch, validate_unique_batch
+from activity.models import Activity, Consumption
+from business.models import Company, Contact, Contract
+from business.capacity import capacity_planner
+from business.exports import contracts_to_export, contract_rows
+from business.synthetic import seed
+from parameters.models import (
+    Holiday,
+    FixedHoliday,
+    NonFixedHoliday
+)
+from parameters.cache import holiday_calendar
+
+
+class SQLiteBackendTest(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def connect(self, options):
+        wrapper = DatabaseWrapper({
+            'NAME': os.path.join(self.directory, 'db.sqlite3'),
+            'OPTIONS': options,
+            'AUTOCOMMIT': True,
+            'CONN_MAX_AGE': 0,
+            'TIME_ZONE': 'UTC',
+            'USER': '',
+            'PASSWORD': '',
+            'HOST': '',
+            'PORT': '',
+        })
+        self.addCleanup(wrapper.close)
+        return wrapper.cursor()
+
+    def pragma(self, cursor, name):
+        cursor.execute('PRAGMA %s' % name)
+        return cursor.fetchone()[0]
+
+    def test_a_connections_are_tuned_for_concurrency(self):
+        """
+        Tests that new connections use write-ahead logging, relaxed
+        synchronisation, a busy timeout and memory-mapped I/O.
+        """
+        cursor = self.connect({})
+        self.assertEqual(self.pragma(cursor, 'journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma(cursor, 'synchronous'), 1)
+        self.assertEqual(self.pragma(cursor, 'busy_timeout'), 5000)
+
+    def test_b_pragmas_can_be_configured(self):
+        """
+        Tests that the PRAGMAs are read from the database options.
+        """
+        cursor = self.connect({'pragmas': [('busy_timeout', 100)],
+                               'timeout': 1})
+        self.assertEqual(self.pragma(cursor, 'journal_mode'), 'delete')
+        self.assertEqual(self.pragma(cursor, 'busy_timeout'), 100)
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class PerformanceMiddlewareTest(TestCase):
+
+    def setUp(self):
+        holiday_calendar.invalidate()
+        for day in range(1, 4):
+            NonFixedHoliday.objects.create(
+                name=u'Holiday %d' % day,
+                date=datetime.date(2014, 5, day)
+            )
+        self.url = reverse('parameters_calendar', args=('2014', 'json'))
+        self.handler = RecordingHandler()
+        logger = logging.getLogger('react.performance')
+        logger.addHandler(self.handler)
+        self.addCleanup(logger.removeHandler, self.handler)
+
+    def test_a_statements_are_reduced_to_their_shape(self):
+        """
+        Tests that statements only differing by their literals share
+        their shape.
+        """
+        self.assertEqual(
+            sql_shape(u"SELECT a FROM t WHERE b = 12 AND c IN (1, 2) "
+                      u"AND d = 'it''s'"),
+            u'SELECT a FROM t WHERE b = ? AND c IN (...) AND d = ?'
+        )
+
+    def test_b_requests_are_measured(self):
+        """
+        Tests that the duration and queries of a request are reported in
+        the Server-Timing header and logged.
+        """
+        response = self.client.get(self.url)
+        self.assertRegexpMatches(
+            response['Server-Timing'],
+            r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+        record = self.handler.records[-1].performance
+        self.assertEqual(record['path'], self.url)
+        self.assertEqual(record['status'], 200)
+        self.assertTrue(record['queries'] > 0)
+        self.assertEqual(record['flags'], [])
+        self.assertEqual(self.handler.records[-1].levelno, logging.INFO)
+        self.assertNotIn('_cursor', connection.__dict__)
+
+    @override_settings(ROOT_URLCONF='react.tests',
+                       PERFORMANCE_REPEATED_QUERIES=3)
+    def test_c_repeated_statements_are_flagged(self):
+        """
+        Tests that requests running the same statement once per object are
+        logged as warnings along with the statement.
+        """
+        self.client.get('/holidays/')
+        record = self.handler.records[-1]
+        self.assertEqual(record.levelno, logging.WARNING)
+        self.assertEqual(record.performance['flags'], [u'n+1'])
+        self.assertEqual(record.performance['repeated'], 3)
+        self.assertIn(u'statement="SELECT', record.getMessage())
+
+    @override_settings(ROOT_URLCONF='react.tests',
+                       PERFORMANCE_SLOW_REQUEST=0,
+                       PERFORMANCE_MAX_QUERIES=1)
+    def test_d_slow_requests_are_flagged(self):
+        """
+        Tests that requests over the time and query thresholds are logged
+        as warnings.
+        """
+        self.client.get('/holidays/')
+        self.assertEqual(self.handler.records[-1].performance['flags'],
+                         [u'slow', u'queries'])
+
+    @override_settings(ROOT_URLCONF='react.tests')
+    def test_e_streams_are_measured_until_they_are_over(self):
+        """
+        Tests that the queries run while streaming a response are counted,
+        the request being logged once the stream is over.
+        """
+        response = self.client.get('/holidays/stream/')
+        self.assertFalse(response.has_header('Server-Timing'))
+        count = len(self.handler.records)
+        self.assertEqual(
+            b''.join(response.streaming_content).count(b'Holiday'), 3)
+        self.assertEqual(len(self.handler.records), count + 1)
+        record = self.handler.records[-1].performance
+        self.assertEqual(record['path'], '/holidays/stream/')
+        self.assertEqual(record['queries'], 4)
+        self.assertNotIn('_cursor', connection.__dict__)
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        get_user_model().objects.create_superuser(
+            username='admin',
+            email='admin@ssii.org',
+            password='admin'
+        )
+        self.client.login(username='admin', password='admin')
+
+    def populate(self, size):
+        holiday_calendar.invalidate()
+        capacity_planner.invalidate()
+        seed(companies=size, contacts=size, contracts=size, actors=size,
+             seed=size)
+        for i in range(size):
+            FixedHoliday.objects.create(
+                name=u'Fixed %d' % i,
+                date=u'%02d/%02d' % (i % 28 + 1, i // 28 + 1)
+            )
+            NonFixedHoliday.objects.create(
+                name=u'Non fixed %d' % i,
+                date=datetime.date(2012, 1, 1) + datetime.timedelta(days=i)
+            )
+        Activity.objects.bulk_create([
+            Activity(actor_id=actor_id, contract_id=pk, date=start, days=1)
+            for pk, actor_id, start in Contract.objects.values_list(
+                'pk', 'actor', 'start')
+        ])
+        Consumption.objects.rebuild()
+
+    def get(self, url):
+        def func():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return func
+
+    def test_a_admin_changelists(self):
+        """
+        Tests that the queries of every admin changelist do not grow with
+        the number of rows.
+        """
+        for model in admin.site._registry:
+            url = reverse('admin:%s_%s_changelist' % (
+                model._meta.app_label, model._meta.model_name))
+            self.assertQueriesDoNotGrow(self.get(url), msg=url)
+
+    def test_b_admin_change_forms(self):
+        """
+        Tests that the queries of every admin change form do not grow with
+        the number of rows.
+        """
+        for model in admin.site._registry:
+            def func(model=model):
+                obj = model._default_manager.order_by('pk').first()
+                if obj is not None:
+                    self.get(reverse('admin:%s_%s_change' % (
+                        model._meta.app_label, model._meta.model_name),
+                        args=(obj.pk,)))()
+            self.assertQueriesDoNotGrow(func, msg=model._meta.model_name)
+
+    def test_c_querysets(self):
+        """
+        Tests that the queries of the public queryset and cache methods do
+        not grow with the number of rows.
+        """
+        def capacity():
+            capacity_planner.invalidate()
+            capacity_planner.over_capacity(2012, 1)
+
+        def burn_down():
+            contract = Contract.objects.order_by('pk').first()
+            Consumption.objects.burn_down(contract)
+
+        def remaining_days():
+            for contract in Contract.objects.with_consumption():
+                contract.remaining_days
+
+        for name, func in (
+                ('holidays', lambda: list(Holiday.objects.all())),
+                ('fixed', lambda: list(Holiday.objects.get_fixed())),
+                ('nonfixed', lambda: list(Holiday.objects.get_nonfixed())),
+                ('year', lambda: list(Holiday.objects.get_year(2012))),
+                ('dates', lambda: Holiday.objects.dates_for_year(2012)),
+                ('working days', Contract.objects.working_days),
+                ('remaining days', remaining_days),
+                ('export', lambda: list(contract_rows(
+                    contracts_to_export()))),
+                ('deltas', Activity.objects.all().consumption_deltas),
+                ('burn down', burn_down),
+                ('rebuild', Consumption.objects.rebuild),
+                ('capacity', capacity)):
+            self.assertQueriesDoNotGrow(func, msg=name)
+
+    def test_d_endpoints(self):
+        """
+        Tests that the queries of the JSON and CSV endpoints do not grow
+        with the number of rows.
+        """
+        for name in ('business_api_companies', 'business_api_contacts',
+                     'business_api_contracts', 'business_export_contracts'):
+            self.assertQueriesDoNotGrow(self.get(reverse(name)), msg=name)
+        self.assertQueriesDoNotGrow(self.get(
+            reverse('parameters_calendar', args=('2012', 'ics'))))
+
+
+class WarmUpTest(TestCase):
+
+    def test_a_warm_up_primes_the_caches(self):
+        """
+        Tests that after the warm-up, the first request-time lookups of
+        content types and holidays cost no query.
+        """
+        ContentType.objects.clear_cache()
+        holiday_calendar.invalidate()
+        application = WSGIHandler()
+        timings = warm_up(application)
+        self.assertEqual([name for name, seconds in timings],
+                         ['middleware'] + [name for name, phase in PHASES])
+        self.assertNotEqual(application._request_middleware, None)
+        with self.assertNumQueries(0):
+            ContentType.objects.get_for_model(Contract)
+            ContentType.objects.get_for_model(FixedHoliday)
+            holiday_calendar.is_holiday(datetime.date.today())
+
+
+class VersionsTest(TransactionTestCase):
+
+    def test_a_counters_are_bumped_again_after_the_transaction(self):
+        """
+        Tests that a counter bumped in a transaction is bumped again once
+        the transaction is over, so that data cached from a version seen
+        before the commit is dropped.
+        """
+        key = u'react:test:version'
+        version = versions.get(key)
+        with transaction.atomic():
+            self.assertEqual(versions.bump(key), version + 1)
+            self.assertEqual(versions.get(key), version + 1)
+        self.assertEqual(versions.get(key), version + 2)
+        versions.bump(key)
+        self.assertEqual(versions.get(key), version + 3)
+        with transaction.atomic():
+            versions.bump(key)
+        request_finished.send(sender=self.__class__)
+        self.assertEqual(versions.get_cache().get(key), version + 5)
+
+
+class BatchValidationTest(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name=u'Acme')
+        Contact.objects.create(
+            first_name=u'Jane',
+            last_name=u'Doe',
+            email=u'jane@acme.com',
+            company=self.company
+        )
+        FixedHoliday.objects.create(name=u'Noël', date=u'25/12')
+
+    def full_clean_errors(self, instance):
+        try:
+            instance.full_clean()
+        except ValidationError as e:
+            return e.message_dict
+        return {}
+
+    def test_a_errors_match_full_clean(self):
+        """
+        Tests that batch validation returns the errors that full_clean()
+        raises for each instance.
+        """
+        contacts = [
+            Contact(first_name=u'Jane', last_name=u'Doe',
+                    email=u'jane@acme.com', company=self.company),
+            Contact(first_name=u'', last_name=u'Doe', email=u'john',
+                    company_id=self.company.pk + 1),
+            Contact(first_name=u'Bob', last_name=u'Smith',
+                    email=u'bob@acme.com', company=self.company),
+        ]
+        holidays = [
+            FixedHoliday(name=u'Noël', date=u'14/07'),
+            FixedHoliday(name=u'Test 1', date=u'25/12'),
+            FixedHoliday(name=u'Test 2', date=u'31/02'),
+            FixedHoliday(name=u'Test 3'),
+        ]
+        for instances in (contacts, holidays):
+            self.assertEqual(
+                full_clean_batch(instances),
+                [self.full_clean_errors(i) for i in instances]
+            )
+        self.assertEqual(
+            [sorted(errors) for errors in full_clean_batch(contacts)],
+            [['email'], ['company', 'email', 'first_name'], []]
+        )
+        with self.assertRaises(ValidationError) as context:
+            contacts[0].validate_unique()
+        self.assertEqual(
+            validate_unique_batch(contacts),
+            [context.exception.message_dict, {}, {}]
+        )
+
+    def test_b_duplicates_within_the_batch_are_rejected(self):
+        """
+        Tests that an instance reusing the unique values of a previous
+        instance of the batch is rejected, while existing instances do not
+        conflict with themselves.
+        """
+        contacts = [
+            Contact(first_name=u'Bob', last_name=u'Smith',
+                    email=u'bob@acme.com', company=self.company),
+            Contact(first_name=u'Bob', last_name=u'Smith',
+                    email=u'bob@acme.com', company=self.company),
+            Contact.objects.get(email=u'jane@acme.com'),
+        ]
+        self.assertEqual(
+            [sorted(errors) for errors in full_clean_batch(contacts)],
+            [[], ['email'], []]
+        )
+
+    def test_c_queries_do_not_depend_on_the_batch_size(self):
+        """
+        Tests that a batch costs one query per foreign key and per unique
+        constraint, whatever its size.
+        """
+        for size in (1, 50):
+            contacts = [
+                Contact(first_name=u'Test', last_name=u'Test',
+                        email=u'test%d@acme.com' % i, company=self.company)
+                for i in range(size)
+            ]
+            # company and email
+            with self.assertNumQueries(2):
+                full_clean_batch(contacts)
+            holidays = [
+                FixedHoliday(name=u'Test %d' % i,
+                             date=u'%02d/01' % (i % 28 + 1))
+                for i in range(size)
+            ]
+            # fixed_date, ordinal and name among the fixed holidays
+            with self.assertNumQueries(3):
+                full_clean_batch(holidays)
+
+
+def holiday_names(request):
+    # Fetches the holidays one by one on purpose
+    names = [NonFixedHoliday.objects.get(pk=pk).name for pk in
+             NonFixedHoliday.objects.values_list('pk', flat=True)]
+    return HttpResponse(u', '.join(names))
+
+
+def holiday_names_stream(request):
+    # The holidays are only fetched while the response is streamed
+    return StreamingHttpResponse(
+        NonFixedHoliday.objects.get(pk=pk).name for pk in
+        NonFixedHoliday.objects.values_list('pk', flat=True))
+
+
+urlpatterns = patterns('',
+    url(r'^holidays/$', holiday_names),
+    url(r'^holidays/stream/$', holiday_names_stream),
+)
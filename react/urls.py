@@ -7,4 +7,7 @@ urlpatterns = patterns('',
     # url(r'^blog/', include('blog.urls')),
 
     url(r'^admin/', include(admin.site.urls)),
+    url(r'^business/', include('business.urls')),
+    url(r'^activity/', include('activity.urls')),
+    url(r'^parameters/', include('parameters.urls')),
 )
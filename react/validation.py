@@ -0,0 +1,222 @@
+# -*- coding: utf8 -*-
+"""
+Validation of batches of model instances.
+
+full_clean() runs one query per foreign key and per unique constraint of
+each instance. full_clean_batch() validates the fields and the clean()
+rules of every instance in Python like full_clean() does, but checks each
+foreign key and each unique constraint for the whole batch with a single
+IN query. Instances reusing the unique values of a previous instance of
+the batch are rejected as well, since saving both would fail.
+"""
+# Built-in modules
+from collections import OrderedDict
+# Django modules
+from django.db import connection
+from django.db.models import ForeignKey
+from django.core.exceptions import ValidationError, NON_FIELD_ERRORS
+
+# Maximum number of values of a single IN lookup, kept under the SQLite
+# limit of 999 parameters per statement.
+IN_LOOKUP_SIZE = 500
+
+
+def foreign_keys(instance, exclude):
+    return [field for field in instance._meta.fields
+            if isinstance(field, ForeignKey) and
+            not field.rel.parent_link and field.name not in exclude]
+
+
+def target_value(field, value):
+    """
+    Returns the value of a foreign key converted like a lookup would.
+    """
+    return field.rel.to._meta.get_field(field.rel.field_name).to_python(value)
+
+
+def existing_targets(instances, excludes):
+    """
+    Returns, for each (model, name) foreign key of the instances, the set
+    of the values they reference which exist in the database.
+    """
+    values = OrderedDict()
+    for instance, exclude in zip(instances, excludes):
+        for field in foreign_keys(instance, exclude):
+            value = getattr(instance, field.attname)
+            if value in field.empty_values:
+                continue
+            try:
+                value = target_value(field, value)
+            except ValidationError:
+                # Reported when the field is validated
+                continue
+            values.setdefault((field.model, field.name), (field, set()))[
+                1].add(value)
+    existing = {}
+    for key, (field, field_values) in values.items():
+        field_values = list(field_values)
+        queryset = field.rel.to._default_manager.complex_filter(
+            field.get_limit_choices_to())
+        existing[key] = set()
+        for i in range(0, len(field_values), IN_LOOKUP_SIZE):
+            existing[key].update(queryset.filter(**{
+                '%s__in' % field.rel.field_name:
+                    field_values[i:i + IN_LOOKUP_SIZE]
+            }).values_list(field.rel.field_name, flat=True))
+    return existing
+
+
+def clean_foreign_key(field, instance, existing):
+    """
+    Validates a foreign key of the instance like ForeignKey.clean() does,
+    looking the referenced value up in the existing ones.
+    """
+    value = getattr(instance, field.attname)
+    super(ForeignKey, field).validate(value, instance)
+    if value is not None and target_value(field, value) not in existing.get(
+            (field.model, field.name), ()):
+        raise ValidationError(
+            field.error_messages['invalid'],
+            code='invalid',
+            params={'model': field.rel.to._meta.verbose_name, 'pk': value},
+        )
+    field.run_validators(value)
+
+
+def unique_values(instance, unique_check):
+    """
+    Returns the values of the instance for the fields of a unique check,
+    or None when validate_unique() would skip the check.
+    """
+    values = []
+    for name in unique_check:
+        field = instance._meta.get_field(name)
+        value = getattr(instance, field.attname)
+        if (value is None or
+                (value == '' and
+                 connection.features.interprets_empty_strings_as_nulls)):
+            return None
+        if field.primary_key and not instance._state.adding:
+            return None
+        values.append(value)
+    return tuple(values)
+
+
+def existing_values(model_class, unique_check, values):
+    """
+    Returns a mapping from the given values of the fields of a unique
+    check to the primary keys of the rows already using them.
+    """
+    first = list(set(value[0] for value in values))
+    queryset = model_class._default_manager.all()
+    rows = {}
+    for i in range(0, len(first), IN_LOOKUP_SIZE):
+        for row in queryset.filter(**{
+            '%s__in' % unique_check[0]: first[i:i + IN_LOOKUP_SIZE]
+        }).values_list('pk', *unique_check):
+            rows.setdefault(tuple(row[1:]), set()).add(row[0])
+    return rows
+
+
+def unique_errors(instances, excludes):
+    """
+    Returns the unique errors of each instance as a dictionary of lists
+    of ValidationError, the fields of the matching exclude list being
+    left out like in validate_unique().
+    """
+    errors = [{} for instance in instances]
+    checks = OrderedDict()
+    date_checks = []
+    for index, (instance, exclude) in enumerate(zip(instances, excludes)):
+        instance_checks, instance_date_checks = instance._get_unique_checks(
+            exclude=exclude)
+        for model_class, unique_check in instance_checks:
+            values = unique_values(instance, unique_check)
+            if values is not None:
+                checks.setdefault((model_class, unique_check), []).append(
+                    (index, values))
+        if instance_date_checks:
+            date_checks.append((index, instance_date_checks))
+    for (model_class, unique_check), entries in checks.items():
+        existing = existing_values(
+            model_class, unique_check, [values for index, values in entries])
+        seen = set()
+        for index, values in entries:
+            instance = instances[index]
+            pks = existing.get(values, set())
+            if not instance._state.adding:
+                pks = pks - set([instance._get_pk_val(model_class._meta)])
+            if pks or values in seen:
+                if len(unique_check) == 1:
+                    key = unique_check[0]
+                else:
+                    key = NON_FIELD_ERRORS
+                errors[index].setdefault(key, []).append(
+                    instance.unique_error_message(model_class, unique_check))
+            seen.add(values)
+    # unique_for_date constraints are checked instance by instance
+    for index, instance_date_checks in date_checks:
+        for key, messages in instances[index]._perform_date_checks(
+                instance_date_checks).items():
+            errors[index].setdefault(key, []).extend(messages)
+    return errors
+
+
+def message_dict(errors):
+    if not errors:
+        return {}
+    return ValidationError(errors).message_dict
+
+
+def validate_unique_batch(instances, exclude=None):
+    """
+    Returns, for each instance, the error dictionary that its
+    validate_unique() would raise, or an empty one, checking each unique
+    constraint with one query for all the instances.
+    """
+    instances = list(instances)
+    return [message_dict(errors) for errors in unique_errors(
+        instances, [list(exclude or ()) for instance in instances])]
+
+
+def full_clean_batch(instances, exclude=None):
+    """
+    Returns, for each instance, the error dictionary that its full_clean()
+    would raise, or an empty one, checking each foreign key and each
+    unique constraint with one query for all the instances.
+    """
+    instances = list(instances)
+    excludes = [list(exclude or ()) for instance in instances]
+    existing = existing_targets(instances, excludes)
+    errors = []
+    for instance, instance_exclude in zip(instances, excludes):
+        instance_errors = {}
+        keys = foreign_keys(instance, instance_exclude)
+        try:
+            # Foreign keys are checked against the whole batch below
+            instance.clean_fields(exclude=instance_exclude + [
+                field.name for field in keys])
+        except ValidationError as e:
+            instance_errors = e.update_error_dict(instance_errors)
+        for field in keys:
+            value = getattr(instance, field.attname)
+            if field.blank and value in field.empty_values:
+                continue
+            try:
+                clean_foreign_key(field, instance, existing)
+            except ValidationError as e:
+                instance_errors[field.name] = e.error_list
+        try:
+            instance.clean()
+        except ValidationError as e:
+            instance_errors = e.update_error_dict(instance_errors)
+        # Fields which failed are not checked for uniqueness
+        for name in instance_errors:
+            if name != NON_FIELD_ERRORS and name not in instance_exclude:
+                instance_exclude.append(name)
+        errors.append(instance_errors)
+    for instance_errors, unique in zip(
+            errors, unique_errors(instances, excludes)):
+        for key, messages in unique.items():
+            instance_errors.setdefault(key, []).extend(messages)
+    return [message_dict(instance_errors) for instance_errors in errors]
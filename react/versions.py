@@ -0,0 +1,86 @@
+# -*- coding: utf8 -*-
+"""
+Version counters shared by all processes through Django's cache
+framework, which tag the data cached from the database. They are kept
+in the 'versions' cache when it is configured, in the default cache
+otherwise, which must then be shared by every process.
+
+A counter bumped inside a transaction is seen by the other processes
+before the transaction commits. They may then reload the data they can
+still see, i.e. the old data, and cache it under the new version. Such
+counters are bumped again once the transaction is over: at the end of
+the request, or on the next use of a counter outside a transaction.
+"""
+# Built-in modules
+import time
+import threading
+# Django modules
+from django.db import connection
+from django.conf import settings
+from django.core.cache import caches, DEFAULT_CACHE_ALIAS
+from django.core.signals import request_finished
+
+CACHE_ALIAS = 'versions'
+
+# Keys of the counters bumped in the current transaction of each thread
+_pending = threading.local()
+
+
+def get_cache():
+    """
+    Returns the cache holding the counters.
+    """
+    if CACHE_ALIAS in settings.CACHES:
+        return caches[CACHE_ALIAS]
+    return caches[DEFAULT_CACHE_ALIAS]
+
+
+def _increment(key):
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Seeded from the clock so that a counter evicted from the cache
+        # never comes back with a value already seen.
+        version = int(time.time() * 1000)
+        cache.set(key, version, None)
+        return version
+
+
+def get(key):
+    """
+    Returns the current value of the counter.
+    """
+    flush()
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump(key):
+    """
+    Increments the counter and returns its new value. Inside a transaction,
+    the counter is incremented again once the transaction is over.
+    """
+    if connection.in_atomic_block:
+        if not hasattr(_pending, 'keys'):
+            _pending.keys = set()
+        _pending.keys.add(key)
+    return _increment(key)
+
+
+def flush(**kwargs):
+    """
+    Increments again the counters bumped in a transaction which is over.
+    """
+    keys = getattr(_pending, 'keys', None)
+    if keys and not connection.in_atomic_block:
+        _pending.keys = set()
+        for key in keys:
+            _increment(key)
+
+
+request_finished.connect(flush)
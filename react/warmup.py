@@ -0,0 +1,131 @@
+# -*- coding: utf8 -*-
+"""
+Warm-up of a process before it serves requests.
+
+warm_up() does the work that a fresh process would otherwise do on its
+first requests: compiling the URL patterns, filling the ContentType cache,
+loading the translation catalogs, building the field validators and
+loading the holiday calendar. When it runs at WSGI import time in a server
+preloading the application before forking its workers, every worker
+starts warm and shares that memory copy-on-write.
+
+The database connections and caches opened by the warm-up are closed
+afterwards, so that forked workers do not share them.
+"""
+# Built-in modules
+import re
+import time
+import logging
+import datetime
+
+logger = logging.getLogger('react.warmup')
+
+
+def warm_urls():
+    from django.core.urlresolvers import get_resolver
+
+    def compile_patterns(resolver):
+        for pattern in resolver.url_patterns:
+            pattern.regex
+            if hasattr(pattern, 'url_patterns'):
+                compile_patterns(pattern)
+
+    resolver = get_resolver(None)
+    compile_patterns(resolver)
+    # Builds the reverse lookup tables of every namespace
+    resolver.reverse_dict
+    resolver.namespace_dict
+    resolver.app_dict
+
+
+def warm_content_types():
+    from django.apps import apps
+    from django.contrib.contenttypes.models import ContentType
+    ContentType.objects.get_for_models(*apps.get_models())
+
+
+def warm_translations():
+    from django.conf import settings
+    from django.utils import translation
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+
+
+def warm_validators():
+    from django.apps import apps
+    from parameters.models import FIXED_DATE_REGEX
+    for model in apps.get_models():
+        for field in model._meta.fields:
+            field.validators
+    # Fills the cache of the re module, used by the fixed holiday checks
+    re.compile(FIXED_DATE_REGEX)
+
+
+def warm_holiday_calendar():
+    from parameters.cache import holiday_calendar
+    year = datetime.date.today().year
+    for year in range(year - 1, year + 2):
+        holiday_calendar.weekday_holidays_for_year(year)
+
+
+PHASES = (
+    ('urls', warm_urls),
+    ('content types', warm_content_types),
+    ('translations', warm_translations),
+    ('validators', warm_validators),
+    ('holiday calendar', warm_holiday_calendar),
+)
+
+
+def close_connections():
+    from django.db import connections
+    from django.core.cache import close_caches
+    for connection in connections.all():
+        connection.close()
+    close_caches()
+
+
+def warm_up(application=None):
+    """
+    Runs the warm-up phases and returns their (name, seconds) durations,
+    loading first the middleware of the given WSGI application.
+
+    A failing phase, e.g. when the database is not reachable yet, is
+    logged and skipped so that the process still starts.
+    """
+    phases = PHASES
+    if application is not None:
+        phases = (('middleware', application.load_middleware),) + phases
+    timings = []
+    try:
+        for name, phase in phases:
+            began = time.time()
+            try:
+                phase()
+            except Exception:
+                logger.exception(u'Warm-up phase failed: %s', name)
+            timings.append((name, time.time() - began))
+    finally:
+        close_connections()
+    logger.info(u'Warm-up done: %s', u', '.join(
+        u'%s %.1fms' % (name, seconds * 1000) for name, seconds in timings))
+    return timings
+
+
+def profile_startup():
+    """
+    Starts Django in the current process, which must not have done so
+    yet, and returns the (name, seconds) durations of the startup phases
+    followed by the warm-up ones.
+    """
+    import django
+    from django.conf import settings
+    from django.core.handlers.wsgi import WSGIHandler
+    timings = []
+    began = time.time()
+    settings.INSTALLED_APPS
+    timings.append(('settings', time.time() - began))
+    began = time.time()
+    django.setup()
+    timings.append(('applications', time.time() - began))
+    return timings + warm_up(WSGIHandler())
@@ -4,9 +4,18 @@ WSGI config for react project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+Setting the REACT_WARMUP environment variable to 1 warms the process up
+before it serves requests (see react.warmup), which is worth it with
+servers preloading the application before forking their workers.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/dev/howto/deployment/wsgi/
 """
+import os
 
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+if os.environ.get('REACT_WARMUP', '').lower() in ('1', 'true', 'yes'):
+    from react.warmup import warm_up
+    warm_up(application)
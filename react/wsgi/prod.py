@@ -1,5 +1,6 @@
 # -*- coding: utf8 -*-
-from react.wsgi.base import *
-
 import os
-os.environ.setdefault("DJANGO_SETTINGS_MODULE", "react.settings.prod")
\ No newline at end of file
+# Set before the application is created by the base module
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "react.settings.prod")
+
+from react.wsgi.base import *